@@ -0,0 +1,317 @@
+"""
+Analytics module - numbers from past auctions, for tuning each item's
+starting_price and max_bid.
+
+The bids table is read a chunk at a time into NumPy arrays (one per
+column: item_id, bidder_id, amount, timestamp) and every figure is
+worked out with whole-array operations instead of a Python loop per bid,
+so a season with millions of bids takes seconds:
+
+    - each item's price curve (its bids in time order)
+    - bid velocity - bids per minute across the auction, and per item
+    - time to first bid
+    - the share of bids near the item's max_bid
+    - bidder concentration - how much of an item's bidding came from one
+      or two people (the Herfindahl index of each bidder's share of bids)
+
+Amounts are in pence, like everywhere else (see money.py). Only this
+module needs NumPy - the auction itself runs without it.
+
+Run it with `python analytics.py --db auction.db --json report.json --csv items.csv`
+(--curves writes every item's price curve to a CSV file too). The
+database is opened read-only, so it's safe to point at an archived
+season - a file from an older version has to be opened by the auction
+once first, to upgrade it.
+"""
+import argparse
+import csv
+import json
+import pathlib
+import sqlite3
+import time
+
+try:
+    import numpy as np
+except ImportError:  # checked when analytics is actually used
+    np = None
+
+import db
+
+CHUNK_SIZE = 100000      # bids read from the database at a time
+NEAR_MAX_PERCENT = 90    # a bid of at least this % of max_bid is "near the limit"
+SECONDS_PER_MINUTE = 60
+
+ITEM_CSV_COLUMNS = ["item_id", "item_name", "starting_price", "max_bid", "final_price", "final_to_max",
+                    "bid_count", "bidders", "time_to_first_bid", "bids_per_minute", "near_max_share",
+                    "concentration", "top_bidder_share"]
+CURVE_CSV_COLUMNS = ["item_id", "seconds", "amount", "bidder_id"]
+
+# Per-item figures that only mean something once an item has a bid (None until then)
+_NEEDS_BIDS = ("final_price", "final_to_max", "time_to_first_bid", "bids_per_minute",
+               "near_max_share", "concentration", "top_bidder_share")
+
+
+def _require_numpy():
+    """Stop with a helpful message if NumPy isn't installed"""
+    if np is None:
+        raise ImportError("analytics.py needs NumPy - install it with `pip install numpy`")
+
+
+# ============ LOADING ============
+def open_database(path):
+    """Open a database file read-only (nothing here can change it).
+
+    Raises ValueError if the file is from an older version of the auction.
+    """
+    conn = sqlite3.connect(pathlib.Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < len(db.MIGRATIONS):
+        conn.close()
+        raise ValueError(f"{path} is schema version {version} (this needs {len(db.MIGRATIONS)}) - "
+                         f"open it with the auction once to upgrade it")
+    return conn
+
+
+def load_bids(conn=None, chunk_size=CHUNK_SIZE):
+    """Read every bid into arrays: {"item_id", "bidder_id", "amount", "timestamp"}.
+
+    Rows come from SQLite chunk_size at a time and go straight into
+    NumPy, so no list of millions of tuples is ever built.
+    """
+    _require_numpy()
+    conn = conn or db.get_connection()
+    dtype = np.dtype([("item_id", np.int64), ("bidder_id", np.int64),
+                      ("amount", np.int64), ("timestamp", np.float64)])
+
+    cursor = conn.execute("""
+        SELECT item_id, bidder_id, bid_amount, timestamp FROM bids
+        WHERE item_id IS NOT NULL AND timestamp IS NOT NULL
+        ORDER BY id
+    """)
+    chunks = []
+    while rows := cursor.fetchmany(chunk_size):
+        chunks.append(np.array(rows, dtype=dtype))
+
+    bids = np.concatenate(chunks) if chunks else np.empty(0, dtype=dtype)
+    return {name: np.ascontiguousarray(bids[name]) for name in dtype.names}
+
+
+def load_items(conn=None):
+    """Read every item into arrays (id order), plus a list of their names"""
+    _require_numpy()
+    conn = conn or db.get_connection()
+    rows = conn.execute("SELECT id, name, starting_price, max_bid FROM items ORDER BY id").fetchall()
+    ids, names, starting_prices, max_bids = zip(*rows) if rows else ((), (), (), ())
+    return {
+        "id": np.array(ids, dtype=np.int64),
+        "name": list(names),
+        "starting_price": np.array(starting_prices, dtype=np.int64),
+        "max_bid": np.array(max_bids, dtype=np.int64),
+    }
+
+
+# ============ WORKING IT OUT ============
+def _sort_by_item(bids, items):
+    """Each bid's item index (position in items), with the bids sorted by item then time.
+
+    Returns (index, amount, timestamp, bidder_id), all in that order.
+    Bids on items that no longer exist are left out.
+    """
+    item_ids = items["id"]
+    index = np.searchsorted(item_ids, bids["item_id"])
+    known = index < len(item_ids)
+    known[known] = item_ids[index[known]] == bids["item_id"][known]
+
+    index = index[known]
+    timestamp = bids["timestamp"][known]
+    order = np.lexsort((timestamp, index))
+    return index[order], bids["amount"][known][order], timestamp[order], bids["bidder_id"][known][order]
+
+
+def _group_starts(sorted_keys):
+    """Where each run of equal keys starts in a sorted array"""
+    if len(sorted_keys) == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+
+
+def _concentration(index, bidder_id, counts):
+    """Per item: (distinct bidders, Herfindahl index, biggest bidder's share of bids)"""
+    n = len(counts)
+    distinct = np.zeros(n, dtype=np.int64)
+    hhi = np.zeros(n)
+    top_share = np.zeros(n)
+    if len(index) == 0:
+        return distinct, hhi, top_share
+
+    # One key per (item, bidder) pair - np.unique counts each pair's bids
+    span = int(bidder_id.max()) + 1
+    pair_keys, pair_counts = np.unique(index * span + bidder_id, return_counts=True)
+    pair_item = pair_keys // span
+    shares = pair_counts / counts[pair_item]
+
+    distinct = np.bincount(pair_item, minlength=n)
+    hhi = np.bincount(pair_item, weights=shares ** 2, minlength=n)
+    starts = _group_starts(pair_item)
+    top_share[pair_item[starts]] = np.maximum.reduceat(shares, starts)
+    return distinct, hhi, top_share
+
+
+def analyse(bids, items, opened=None):
+    """Work out every figure from load_bids and load_items arrays.
+
+    opened is when bidding started (a time.time() timestamp) - by default
+    the first bid of the auction. Returns a report dictionary: totals for
+    the whole auction, "bids_per_minute" (bids in each minute since
+    opened) and "items" (one dictionary per item, id order, with None
+    where an item had no bids).
+    """
+    _require_numpy()
+    index, amount, timestamp, bidder_id = _sort_by_item(bids, items)
+    n = len(items["id"])
+    total = len(index)
+    if opened is None:
+        opened = float(timestamp.min()) if total else 0.0
+
+    # Bids are sorted by item, so each item's bids are one slice
+    counts = np.bincount(index, minlength=n)
+    has_bids = counts > 0
+    starts = np.searchsorted(index, np.arange(n))[has_bids]
+    first_bid = np.zeros(n)
+    last_bid = np.zeros(n)
+    final_price = np.zeros(n, dtype=np.int64)
+    first_bid[has_bids] = timestamp[starts]
+    last_bid[has_bids] = timestamp[starts + counts[has_bids] - 1]
+    if total:
+        final_price[has_bids] = np.maximum.reduceat(amount, starts)
+
+    # Velocity - an item's bids over the minutes between its first and last bid (at least one)
+    active_minutes = np.maximum((last_bid - first_bid) / SECONDS_PER_MINUTE, 1.0)
+    minute = ((timestamp - opened) // SECONDS_PER_MINUTE).astype(np.int64)
+    per_minute = np.bincount(np.maximum(minute, 0)) if total else np.zeros(0, dtype=np.int64)
+
+    # Near the limit - whole pence, so compare amount * 100 with max_bid * percent exactly
+    near = amount * 100 >= items["max_bid"][index] * NEAR_MAX_PERCENT
+    near_counts = np.bincount(index, weights=near, minlength=n)
+
+    distinct, hhi, top_share = _concentration(index, bidder_id, counts)
+    overall_shares = np.unique(bidder_id, return_counts=True)[1] / total if total else np.zeros(0)
+
+    # (Items without bids divide by zero here - _rows gives them None instead)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        columns = {
+            "item_id": items["id"],
+            "starting_price": items["starting_price"],
+            "max_bid": items["max_bid"],
+            "final_price": final_price,
+            "final_to_max": final_price / items["max_bid"],
+            "bid_count": counts,
+            "bidders": distinct,
+            "time_to_first_bid": first_bid - opened,
+            "bids_per_minute": counts / active_minutes,
+            "near_max_share": near_counts / counts,
+            "concentration": hhi,
+            "top_bidder_share": top_share,
+        }
+
+    return {
+        "opened": opened,
+        "bids": total,
+        "bidders": len(overall_shares),
+        "items_with_bids": int(has_bids.sum()),
+        "near_max_share": float(near.mean()) if total else None,
+        "concentration": float((overall_shares ** 2).sum()) if total else None,
+        "bids_per_minute": per_minute.tolist(),
+        "items": _rows(columns, items["name"], has_bids),
+    }
+
+
+def _rows(columns, names, has_bids):
+    """Turn per-item columns into a dictionary per item"""
+    lists = {name: values.tolist() for name, values in columns.items()}
+    rows = []
+    for position, (name, bid_on) in enumerate(zip(names, has_bids.tolist())):
+        row = {"item_id": lists["item_id"][position], "item_name": name}
+        for column in ITEM_CSV_COLUMNS[2:]:
+            row[column] = lists[column][position] if bid_on or column not in _NEEDS_BIDS else None
+        rows.append(row)
+    return rows
+
+
+def price_curves(bids, items):
+    """Yield (item_id, seconds since its first bid, amount, bidder_id) for every bid,
+    by item then time - each item's price curve"""
+    index, amount, timestamp, bidder_id = _sort_by_item(bids, items)
+    if len(index) == 0:
+        return
+    starts = _group_starts(index)
+    first = np.repeat(timestamp[starts], np.diff(np.r_[starts, len(index)]))
+    yield from zip(items["id"][index].tolist(), (timestamp - first).tolist(), amount.tolist(), bidder_id.tolist())
+
+
+# ============ WRITING ============
+def write_json(report, file):
+    """Write the whole report as JSON to an open file"""
+    json.dump(report, file, indent=2)
+    file.write("\n")
+
+
+def write_items_csv(report, file):
+    """Write one CSV row per item to an open file"""
+    writer = csv.DictWriter(file, fieldnames=ITEM_CSV_COLUMNS)
+    writer.writeheader()
+    writer.writerows(report["items"])
+
+
+def write_curves_csv(bids, items, file):
+    """Write every item's price curve (one row per bid) to an open file"""
+    writer = csv.writer(file)
+    writer.writerow(CURVE_CSV_COLUMNS)
+    writer.writerows(price_curves(bids, items))
+
+
+def main():
+    """Run the analytics from the command line"""
+    parser = argparse.ArgumentParser(description="Group 2 - Auction Zone bid analytics")
+    parser.add_argument("--db", default=db.DATABASE_FILE, help="database file")
+    parser.add_argument("--json", metavar="FILE", help="save the whole report as JSON")
+    parser.add_argument("--csv", metavar="FILE", help="save one row per item as CSV")
+    parser.add_argument("--curves", metavar="FILE", help="save every item's price curve as CSV")
+    parser.add_argument("--opened", type=float, help="when bidding started (default: the first bid)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="bids read at a time")
+    args = parser.parse_args()
+    _require_numpy()
+
+    try:
+        conn = open_database(args.db)
+    except (sqlite3.Error, ValueError) as error:
+        parser.error(f"can't read {args.db}: {error}")
+
+    started = time.perf_counter()
+    bids = load_bids(conn, chunk_size=args.chunk_size)
+    items = load_items(conn)
+    conn.close()
+    loaded = time.perf_counter()
+    report = analyse(bids, items, args.opened)
+    done = time.perf_counter()
+
+    print(f"📈 {report['bids']} bids from {report['bidders']} bidders on {report['items_with_bids']} items "
+          f"(loaded in {loaded - started:.2f}s, analysed in {done - loaded:.2f}s)")
+    if report["bids"]:
+        print(f"   {report['near_max_share']:.0%} of bids were within {100 - NEAR_MAX_PERCENT}% of the limit, "
+              f"busiest minute had {max(report['bids_per_minute'])} bids")
+
+    # newline="" stops the csv module doubling line endings on Windows
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            write_json(report, file)
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8", newline="") as file:
+            write_items_csv(report, file)
+    if args.curves:
+        with open(args.curves, "w", encoding="utf-8", newline="") as file:
+            write_curves_csv(bids, items, file)
+
+
+if __name__ == "__main__":
+    main()
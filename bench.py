@@ -0,0 +1,321 @@
+"""
+Bench module - a load test for the bid path.
+
+Starts N pretend bidders (as threads, then as separate processes, like
+kiosks sharing one auction.db) against a temporary database. Each bidder
+keeps picking an item - mostly the popular ones - reading its price and
+bidding a bit more, until the item's max bid stops them.
+
+Every run is done with each bid path (MODES):
+    legacy    - db.get_item then db.update_bid, like the game used to do
+    place_bid - db.place_bid, one transaction per bid
+    journal   - db.place_bid with the journal open: what the journal
+                costs on top of a transaction per bid
+    writer    - place_bid with the journal, through a Writer - how the
+                kiosk and the server save bids. Bids waiting at the same
+                time share one SQLite transaction and one journal append.
+
+The report shows accepted bids per second, bid latency, how often SQLite
+was busy and how many bids were lost by being overwritten with a lower
+one. Save it with --json and compare commits.
+
+    python bench.py --bidders 8 --bids 250 --json bench.json
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import db
+import journal
+from writer import Writer
+
+MODES = ("legacy", "place_bid", "journal", "writer")  # see the module docstring
+CONCURRENCY = ("threads", "processes")
+
+BENCH_ITEMS = 20           # items added on top of the default ones
+BENCH_PRICE = 1000         # starting price of each added item (pence)
+BENCH_PRICE_RANGE = 200000  # max_bid - starting price, so busy items do hit their cap
+HOT_ITEM_SHARE = 0.2       # the most popular 20% of items...
+HOT_BID_SHARE = 0.8        # ...get 80% of the bids
+INCREMENTS = (100, 200, 500, 1000, 2000)  # how much more than the current price people bid (pence)
+MAX_RETRIES = 20           # give up on a bid after this many busy errors
+RETRY_DELAY = 0.001        # seconds, doubled after each busy error
+
+_writer = None  # the Writer every bidder in this process shares in "writer" mode
+
+
+def percentiles(values):
+    """p50 / p95 / p99 / max of a list of numbers (nearest rank)"""
+    if not values:
+        return {"p50": 0, "p95": 0, "p99": 0, "max": 0}
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    return {"p50": rank(50), "p95": rank(95), "p99": rank(99), "max": ordered[-1]}
+
+
+def is_busy(error):
+    """True if an sqlite3 error means another connection held the lock"""
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+# ============ SETUP ============
+def create_database(path, num_items):
+    """Make a fresh auction database with extra items to bid on"""
+    db.init(path)
+    with db.transaction():
+        for number in range(1, num_items + 1):
+            db.add_item(f"Bench Item {number}", "Load test", BENCH_PRICE, BENCH_PRICE + BENCH_PRICE_RANGE)
+    item_ids = db.get_item_ids()
+    db.close_connection()
+    return item_ids
+
+
+@contextlib.contextmanager
+def journalled(mode, database_file):
+    """Open the journal (and the shared Writer) for the modes that use them"""
+    global _writer
+    if mode not in ("journal", "writer"):
+        yield
+        return
+
+    db.DATABASE_FILE = database_file
+    journal.open_journal(database_file)
+    if mode == "writer":
+        _writer = Writer()
+    try:
+        yield
+    finally:
+        if _writer is not None:
+            _writer.stop()
+            _writer = None
+        journal.close_journal()
+        db.close_connection()
+
+
+# ============ BIDDER ============
+def _bid_once(mode, item_id, bidder_name, rng):
+    """Read an item and bid a bit more than its price - returns True if accepted"""
+    item = db.get_item(item_id)
+    price = max(item["current_bid"], item["starting_price"])
+    amount = price + rng.choice(INCREMENTS)
+
+    if mode == "writer":
+        accepted, _ = _writer.place_bid(item_id, bidder_name, amount).result()
+        return accepted
+    if mode in ("place_bid", "journal"):
+        accepted, _ = db.place_bid(item_id, bidder_name, amount)
+        return accepted
+
+    # The old way: check in Python, then write whatever we decided
+    if amount > price and amount <= item["max_bid"]:
+        db.update_bid(item_id, amount, bidder_name)
+        return True
+    return False
+
+
+def run_bidder(database_file, bidder, item_ids, num_bids, mode, seed, busy_timeout_ms):
+    """Place num_bids bids as one bidder (runs in a thread or a process).
+
+    Returns counts, each bid's latency in milliseconds and the wall-clock
+    start and end times.
+    """
+    db.DATABASE_FILE = database_file
+    db.BUSY_TIMEOUT_MS = busy_timeout_ms
+    rng = random.Random(seed * 1000 + bidder)
+    bidder_name = f"Bidder {bidder}"
+
+    hot_count = max(1, int(len(item_ids) * HOT_ITEM_SHARE))
+    hot_items, other_items = item_ids[:hot_count], item_ids[hot_count:] or item_ids
+
+    result = {"accepted": 0, "rejected": 0, "errors": 0, "busy_retries": 0, "latency_ms": []}
+    started = time.time()
+
+    for _ in range(num_bids):
+        item_id = rng.choice(hot_items if rng.random() < HOT_BID_SHARE else other_items)
+        bid_started = time.perf_counter()
+        delay = RETRY_DELAY
+
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                accepted = _bid_once(mode, item_id, bidder_name, rng)
+                result["accepted" if accepted else "rejected"] += 1
+                break
+            except sqlite3.OperationalError as error:
+                if not is_busy(error) or attempt == MAX_RETRIES:
+                    result["errors"] += 1
+                    break
+                result["busy_retries"] += 1
+                time.sleep(delay)
+                delay *= 2
+
+        result["latency_ms"].append((time.perf_counter() - bid_started) * 1000)
+
+    result["started"] = started
+    result["finished"] = time.time()
+    db.close_connection()
+    return result
+
+
+def _run_bidder_quietly(database_file, bidder, item_ids, num_bids, mode, *args):
+    """run_bidder without the 'Bid saved' line for every bid (for worker processes,
+    each one a kiosk with its own journal and Writer)"""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        with journalled(mode, database_file):
+            return run_bidder(database_file, bidder, item_ids, num_bids, mode, *args)
+
+
+# ============ CHECKING ============
+def count_lost_updates(database_file):
+    """Count bids that were overwritten by a lower (or equal) bid.
+
+    With a correct bid path every item's history only ever goes up, and
+    the item's current bid is the highest bid in its history.
+    """
+    conn = sqlite3.connect(database_file)
+    lost = 0
+    try:
+        best = {}
+        for item_id, amount in conn.execute("SELECT item_id, bid_amount FROM bids ORDER BY id"):
+            if amount <= best.get(item_id, float("-inf")):
+                lost += 1
+            best[item_id] = max(amount, best.get(item_id, float("-inf")))
+
+        # The item row should show its highest bid
+        for item_id, current_bid in conn.execute("SELECT id, current_bid FROM items"):
+            if item_id in best and current_bid < best[item_id]:
+                lost += 1
+    finally:
+        conn.close()
+    return lost
+
+
+# ============ SCENARIOS ============
+def run_scenario(mode, concurrency, bidders, bids_per_bidder, num_items, seed, busy_timeout_ms):
+    """Run one mode with one kind of concurrency on a fresh database"""
+    workdir = tempfile.mkdtemp(prefix="auction-bench-")
+    database_file = os.path.join(workdir, "bench.db")
+
+    try:
+        # Threads share our stdout, so hide the "Bid saved" lines here once
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            item_ids = create_database(database_file, num_items)
+
+            jobs = [(database_file, bidder, item_ids, bids_per_bidder, mode, seed, busy_timeout_ms)
+                    for bidder in range(bidders)]
+
+            if concurrency == "threads":
+                with journalled(mode, database_file), ThreadPoolExecutor(max_workers=bidders) as pool:
+                    results = list(pool.map(run_bidder, *zip(*jobs)))
+            else:
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(max_workers=bidders, mp_context=context) as pool:
+                    results = list(pool.map(_run_bidder_quietly, *zip(*jobs)))
+
+        lost_updates = count_lost_updates(database_file)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    accepted = sum(result["accepted"] for result in results)
+    seconds = max(result["finished"] for result in results) - min(result["started"] for result in results)
+    latencies = [ms for result in results for ms in result["latency_ms"]]
+
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "bidders": bidders,
+        "attempted": bidders * bids_per_bidder,
+        "accepted": accepted,
+        "rejected": sum(result["rejected"] for result in results),
+        "errors": sum(result["errors"] for result in results),
+        "seconds": seconds,
+        "accepted_per_sec": accepted / seconds if seconds else 0.0,
+        "latency_ms": percentiles(latencies),
+        "busy_retries": sum(result["busy_retries"] for result in results),
+        "lost_updates": lost_updates,
+    }
+
+
+def git_commit():
+    """The current commit, so reports from different commits can be told apart"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(bidders=8, bids_per_bidder=250, num_items=BENCH_ITEMS, seed=1,
+                  busy_timeout_ms=db.BUSY_TIMEOUT_MS, modes=MODES, concurrency=CONCURRENCY):
+    """Run every scenario and return the whole report"""
+    scenarios = []
+    for kind in concurrency:
+        for mode in modes:
+            scenarios.append(run_scenario(mode, kind, bidders, bids_per_bidder, num_items, seed, busy_timeout_ms))
+
+    return {
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "sqlite": sqlite3.sqlite_version,
+        "settings": {
+            "bidders": bidders,
+            "bids_per_bidder": bids_per_bidder,
+            "items": num_items,
+            "seed": seed,
+            "busy_timeout_ms": busy_timeout_ms,
+        },
+        "scenarios": scenarios,
+    }
+
+
+def print_report(report):
+    """Print a table of the scenarios"""
+    print(f"\n🏁 {report['settings']['bidders']} bidders x {report['settings']['bids_per_bidder']} bids "
+          f"(commit {report['commit']}, SQLite {report['sqlite']})")
+    print(f"  {'scenario':<20} {'bids/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'busy':>6} {'lost':>6}")
+    for scenario in report["scenarios"]:
+        name = f"{scenario['mode']}/{scenario['concurrency']}"
+        latency = scenario["latency_ms"]
+        print(f"  {name:<20} {scenario['accepted_per_sec']:8.0f} {latency['p50']:8.2f} {latency['p95']:8.2f} "
+              f"{latency['p99']:8.2f} {scenario['busy_retries']:6} {scenario['lost_updates']:6}")
+
+
+def main():
+    """Run the benchmark from the command line"""
+    parser = argparse.ArgumentParser(description="Load test the auction bid path")
+    parser.add_argument("--bidders", type=int, default=8, help="number of simulated bidders")
+    parser.add_argument("--bids", type=int, default=250, help="bids per bidder")
+    parser.add_argument("--items", type=int, default=BENCH_ITEMS, help="extra items to bid on")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the bid sequences")
+    parser.add_argument("--busy-timeout", type=int, default=db.BUSY_TIMEOUT_MS,
+                        help="SQLite busy timeout in ms (lower it to see more busy retries)")
+    parser.add_argument("--mode", choices=MODES, action="append", help="only run this bid path")
+    parser.add_argument("--concurrency", choices=CONCURRENCY, action="append",
+                        help="only run with threads or processes")
+    parser.add_argument("--json", metavar="FILE", help="save the report as JSON")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.bidders, args.bids, args.items, args.seed, args.busy_timeout,
+                           modes=args.mode or MODES, concurrency=args.concurrency or CONCURRENCY)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
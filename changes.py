@@ -0,0 +1,87 @@
+"""
+Changes module - tells the rest of the program what changed in the database.
+
+Every accepted bid, new item and reset is numbered in db's changes table.
+A ChangeFeed remembers the last number it has seen and hands each new
+change to its subscribers, so they can update what they show one item at
+a time instead of reading every item again.
+
+    feed = ChangeFeed()
+    feed.subscribe(print)   # called with a list of changes
+    feed.start()            # or call feed.poll() yourself
+
+Changes made by this process are picked up straight away. Other kiosks'
+changes are noticed by checking PRAGMA data_version, which is cheap.
+"""
+import threading
+
+import db
+
+POLL_SECONDS = 0.5  # how often to check for other kiosks' changes
+
+
+class ChangeFeed:
+    """Reads new changes from the database and passes them to subscribers"""
+
+    def __init__(self, since_seq=None):
+        # Start from now unless asked to catch up from an earlier change
+        self.seq = db.get_change_seq() if since_seq is None else since_seq
+        self.subscribers = []
+        self.running = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback):
+        """Call callback(changes) with every batch of new changes"""
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """Stop sending changes to callback"""
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def poll(self):
+        """Hand any new changes to the subscribers - returns them"""
+        with self._lock:
+            changes = db.get_changes(self.seq)
+            if not changes:
+                return []
+            self.seq = changes[-1]["seq"]
+
+        for callback in list(self.subscribers):
+            callback(changes)
+        return changes
+
+    # ============ BACKGROUND THREAD ============
+    def start(self):
+        """Keep polling on a background thread"""
+        self.running = True
+        db.add_commit_listener(self._wake.set)
+        self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread"""
+        self.running = False
+        db.remove_commit_listener(self._wake.set)
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        """Poll whenever this process or another kiosk commits something"""
+        version = db.get_data_version()
+        self.poll()  # catch up first if we started from an older change
+
+        while self.running:
+            # Our own commits wake us up straight away
+            self._wake.wait(POLL_SECONDS)
+            self._wake.clear()
+
+            # data_version moves when any other connection commits
+            new_version = db.get_data_version()
+            if new_version != version:
+                version = new_version
+                self.poll()
+        db.close_connection()
@@ -0,0 +1,317 @@
+"""
+Client module - lets a kiosk use an auction server (server.py) instead of
+opening auction.db itself.
+
+RemoteDB has the same read functions main.py uses from db.py and the
+same write functions as writer.Writer, so the game doesn't care which
+one it has. It keeps a copy of every item, updated from the changes the
+server sends (see changes.py), so drawing a frame never waits for the
+network - only bids, new items, resets and the final results make a
+round trip.
+
+If the connection drops, RemoteDB keeps trying to connect again (waiting
+a little longer after each failure) and then subscribes with "since" set
+to the last change it saw, so it only fetches what it missed. Requests
+sent while it's disconnected fail with ConnectionError.
+"""
+import bisect
+import itertools
+import json
+import socket
+import threading
+from concurrent.futures import Future
+
+import db
+
+REQUEST_TIMEOUT = 10      # seconds to wait for the server to answer
+RECONNECT_DELAY = 0.5     # seconds before trying to connect again (doubled after each failure)
+RECONNECT_MAX_DELAY = 10  # longest wait between tries
+
+
+class RemoteError(Exception):
+    """The server couldn't do what we asked"""
+
+
+def parse_address(address):
+    """Split "host:port" into (host, port)"""
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class RemoteDB:
+    """A connection to the auction server, standing in for db and Writer"""
+
+    def __init__(self, address, on_change=None):
+        self.on_change = on_change  # called with a list of changes (on the reader thread)
+        self.address = parse_address(address)
+        self.sock = self._connect()
+
+        self._send_lock = threading.Lock()  # also held while self.sock is swapped
+        self._ids = itertools.count(1)
+        self._pending = {}  # request id -> Future
+
+        # Our copy of the server's items
+        self._items_lock = threading.Lock()
+        self._items = {}
+        self._item_ids = []
+        self._version = 0
+        self._results = None  # (version, the server's get_results) - see get_results
+        self.seq = 0  # the last change we've applied
+        self.stats = {"local": 0, "remote": 0, "reconnects": 0}
+
+        self._ready = threading.Event()
+        self._stopping = threading.Event()
+        self._reader = threading.Thread(target=self._run, name="server-reader", daemon=True)
+        self._reader.start()
+
+        self.call("subscribe", on_reply=self._on_subscribe).result(REQUEST_TIMEOUT)
+        self._ready.wait(REQUEST_TIMEOUT)
+
+    # ============ CONNECTING ============
+    def _connect(self):
+        """Open a new connection to the server"""
+        sock = socket.create_connection(self.address, timeout=REQUEST_TIMEOUT)
+        sock.settimeout(None)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _run(self):
+        """Read from the server, connecting again whenever the connection drops (reader thread)"""
+        while True:
+            self._read_replies()
+            if self._stopping.is_set() or not self._reconnect():
+                return
+
+    def _reconnect(self):
+        """Keep trying to connect, then catch up on the changes we missed.
+
+        Returns False if stop() was called instead.
+        """
+        delay = RECONNECT_DELAY
+        while not self._stopping.wait(delay):
+            try:
+                sock = self._connect()
+            except OSError:
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+                continue
+
+            with self._send_lock:
+                if self._stopping.is_set():
+                    sock.close()
+                    return False
+                self.sock = sock
+            self.stats["reconnects"] += 1
+            print(f"🔌 Reconnected to the auction server - catching up from change {self.seq}")
+            self.call("subscribe", since=self.seq, on_reply=self._on_subscribe)
+            return True
+        return False
+
+    # ============ TALKING TO THE SERVER ============
+    def call(self, op, on_reply=None, **args):
+        """Send a request - returns a Future for the server's reply.
+
+        on_reply(future) runs on the reader thread before it reads anything
+        else, so it sees the reply in order with the changes around it.
+        """
+        request_id = next(self._ids)
+        future = Future()
+        if on_reply is not None:
+            future.add_done_callback(on_reply)
+        self._pending[request_id] = future
+        line = json.dumps({"id": request_id, "op": op, "args": args}) + "\n"
+        try:
+            with self._send_lock:
+                self.sock.sendall(line.encode("utf-8"))
+        except OSError as error:
+            self._pending.pop(request_id, None)
+            future.set_exception(error)
+        self.stats["remote"] += 1
+        return future
+
+    def _read_replies(self):
+        """Hand replies to their Futures and apply item changes until the connection drops"""
+        try:
+            for line in self.sock.makefile("r", encoding="utf-8"):
+                message = json.loads(line)
+                if message.get("event") == "changes":
+                    self._apply_changes(message["changes"])
+                    continue
+
+                future = self._pending.pop(message.get("id"), None)
+                if future is None:
+                    continue
+                if "error" in message:
+                    future.set_exception(RemoteError(message["error"]))
+                else:
+                    future.set_result(message.get("result"))
+        except (OSError, ValueError):
+            pass
+
+        # The connection is gone - nothing else is going to be answered
+        for future in list(self._pending.values()):
+            if not future.done():
+                future.set_exception(ConnectionError("Lost connection to the auction server"))
+        self._pending.clear()
+
+    def _apply_changes(self, changes):
+        """Update our copy of the items from changes the server sent"""
+        applied = []
+        with self._items_lock:
+            for change in changes:
+                if change["seq"] <= self.seq:
+                    continue  # already seen (e.g. sent again while subscribing)
+                if change["kind"] == "reload":
+                    # We missed too much - fetch everything (without blocking this thread)
+                    self.call("subscribe", on_reply=self._on_subscribe)
+                    return
+
+                item_id = change["item_id"]
+                if change["kind"] == "item" and change["item"] is not None:
+                    if item_id not in self._items:
+                        bisect.insort(self._item_ids, item_id)
+                    self._items[item_id] = change["item"]
+                elif change["kind"] in ("item", "delete") and item_id in self._items:
+                    del self._items[item_id]
+                    self._item_ids.remove(item_id)
+
+                self.seq = change["seq"]
+                applied.append(change)
+            if applied:
+                self._version += 1
+
+        if applied and self.on_change:
+            self.on_change(applied)
+
+    def _on_subscribe(self, future):
+        """Catch up from subscribe's reply: the changes we missed, or every item"""
+        if future.exception() is not None:
+            return
+        snapshot = future.result()
+        if "changes" in snapshot:
+            self._apply_changes(snapshot["changes"])
+            self._ready.set()
+            return
+
+        # Every item - replace our copy
+        with self._items_lock:
+            self._items = {item["id"]: item for item in snapshot["items"]}
+            self._item_ids = sorted(self._items)
+            self.seq = snapshot["seq"]
+            self._version += 1
+        self._ready.set()
+        if self.on_change:
+            self.on_change([{"seq": self.seq, "kind": "reload", "item_id": None, "item": None}])
+
+    def _then(self, future, convert):
+        """A Future for convert(result of future)"""
+        converted = Future()
+
+        def done(source):
+            error = source.exception()
+            if error is not None:
+                converted.set_exception(error)
+            else:
+                converted.set_result(convert(source.result()))
+
+        future.add_done_callback(done)
+        return converted
+
+    # ============ READS (like db.py) ============
+    def get_all_items(self):
+        """Get all items in id order"""
+        with self._items_lock:
+            self.stats["local"] += 1
+            return [self._items[item_id] for item_id in self._item_ids]
+
+    def get_item(self, item_id):
+        """Get a single item by ID (None if it doesn't exist)"""
+        with self._items_lock:
+            self.stats["local"] += 1
+            return self._items.get(item_id)
+
+    def get_item_ids(self):
+        """Get every item id in order"""
+        with self._items_lock:
+            self.stats["local"] += 1
+            return list(self._item_ids)
+
+    def item_count(self):
+        """Count the items"""
+        with self._items_lock:
+            self.stats["local"] += 1
+            return len(self._item_ids)
+
+    def get_items_page(self, after_id=0, limit=db.ITEMS_PAGE_SIZE):
+        """Get up to limit items with an id above after_id"""
+        with self._items_lock:
+            self.stats["local"] += 1
+            start = bisect.bisect_right(self._item_ids, after_id)
+            return [self._items[item_id] for item_id in self._item_ids[start:start + limit]]
+
+    def get_auction_end(self):
+        """When the last item closes (None if the auction hasn't started)"""
+        with self._items_lock:
+            self.stats["local"] += 1
+            end_times = [item["end_time"] for item in self._items.values() if item["end_time"] is not None]
+        return max(end_times, default=None)
+
+    def get_results(self):
+        """Every item's result, from the server (asked again only after something changes)"""
+        version = self._version
+        if self._results is None or self._results[0] != version:
+            self._results = (version, self.call("results").result(REQUEST_TIMEOUT))
+        else:
+            self.stats["local"] += 1
+        return self._results[1]
+
+    def get_data_version(self):
+        """A number that changes whenever our copy of the items changes"""
+        return self._version
+
+    def get_cache_stats(self):
+        """Reads answered from our copy (hits) vs requests sent to the server (misses)"""
+        hits, misses = self.stats["local"], self.stats["remote"]
+        total = hits + misses
+        return {"hits": hits, "misses": misses, "hit_rate": hits / total if total else 0.0}
+
+    def print_results(self):
+        """Print the server's results report"""
+        print(self.call("report").result(REQUEST_TIMEOUT), end="")
+
+    def close_connection(self):
+        """Nothing to do - kept so RemoteDB can stand in for db"""
+
+    # ============ WRITES (like writer.Writer) ============
+    def place_bid(self, item_id, bidder_name, bid_amount):
+        """Send a bid - the Future's result is (accepted, item)"""
+        future = self.call("place_bid", item_id=item_id, bidder_name=bidder_name, bid_amount=bid_amount)
+        return self._then(future, tuple)
+
+    def set_proxy_bid(self, item_id, bidder_name, max_amount):
+        """Send an automatic bid - the Future's result is (accepted, item)"""
+        future = self.call("set_proxy_bid", item_id=item_id, bidder_name=bidder_name, max_amount=max_amount)
+        return self._then(future, tuple)
+
+    def add_item(self, name, description, starting_price, max_bid):
+        """Send a new item - the Future's result is the new item's id"""
+        return self.call("add_item", name=name, description=description,
+                         starting_price=starting_price, max_bid=max_bid)
+
+    def reset_auction(self, duration=None, stagger=0):
+        """Ask the server to clear every bid and start the items' clocks again"""
+        return self.call("reset_auction", duration=duration, stagger=stagger)
+
+    def flush(self):
+        """Wait until everything sent so far has been saved"""
+        self.call("flush").result(REQUEST_TIMEOUT)
+
+    def stop(self):
+        """Disconnect from the server (for good)"""
+        self._stopping.set()
+        with self._send_lock:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.sock.close()
+        self._reader.join(timeout=1)
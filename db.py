@@ -1,429 +1,1471 @@
+"""
+Database module - handles all database operations using SQLite
+SQLite is a simple file-based database built into Python!
 
-# Database module - handles all database operations using SQLite
+Every function goes through one long-lived connection per thread (see
+get_connection) instead of opening and closing the file on each call.
+
+Prices and bids are whole pence (ints) - see money.py.
+"""
+import json
+import os
 import sqlite3
+import sys
+import threading
 import time
+from contextlib import contextmanager
+
+import money
+import proxy
 
+# Database file name
 DATABASE_FILE = "auction.db"
 
+# Connection settings
+BUSY_TIMEOUT_MS = 5000       # how long to wait for another kiosk's write lock
+CACHE_SIZE_KB = 8192         # SQLite page cache per connection
+STATEMENT_CACHE_SIZE = 64    # prepared statements kept per connection
+BULK_CHUNK_SIZE = 1000       # bids per transaction in update_bids_many
+ITEMS_PAGE_SIZE = 30         # default number of items in get_items_page
+CHANGE_LOG_SIZE = 10000      # changes kept for screens catching up (see prune_changes)
+SOFT_CLOSE_SECONDS = 30      # a bid this close to an item's end time pushes it back this far
+
+# Where every timestamp comes from - end times, bids, closes (replay.py swaps in a fake clock)
+clock = time.time
+
+# Columns read for an item, in the order _row_to_item expects
+ITEM_COLUMNS = "id, name, description, starting_price, max_bid, current_bid, highest_bidder_id, end_time, closed"
+
+# Each thread keeps its own connection (sqlite3 connections can't be shared)
+_local = threading.local()
+
+# Item cache counters - check these to see how often reads skip SQLite
+cache_stats = {"hits": 0, "misses": 0}
+
+# Statements run while count_queries is on (used by the replay benchmark)
+query_stats = {"count": 0}
+
+# Bumped every time one of our own transactions commits (see _cached)
+_cache_generation = 0
+_cache_lock = threading.Lock()
+
+# Functions called after each of our own commits (see add_commit_listener)
+_commit_listeners = []
+
+# Bidder name <-> id, shared by every thread (see intern_bidder)
+_bidder_ids = {}
+_bidder_names = {}
+
+# Append-only record of every change, written just before each commit.
+# journal.open_journal sets this - leave it None to run without one.
+journal = None
+
+
+# ============ CONNECTION ============
+def get_connection():
+    """Get this thread's database connection, opening it the first time"""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.path == DATABASE_FILE:
+        return conn
+
+    # DATABASE_FILE changed (or first call) - open a fresh connection
+    close_connection()
+
+    # isolation_level=None means we control transactions ourselves
+    conn = sqlite3.connect(DATABASE_FILE,
+                           timeout=BUSY_TIMEOUT_MS / 1000,
+                           isolation_level=None,
+                           cached_statements=STATEMENT_CACHE_SIZE)
+
+    # WAL lets readers keep reading while another kiosk writes
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+
+    _local.conn = conn
+    _local.path = DATABASE_FILE
+    _local.cache = {}
+    _local.cache_version = None
+    return conn
+
+
+def close_connection():
+    """Close this thread's connection (it reopens on next use)"""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+    _local.conn = None
+    _local.path = None
+    _local.cache = {}
+    _local.cache_version = None
+
+
+@contextmanager
+def transaction():
+    """Run a block of statements as one transaction.
+
+    Nested calls join the outer transaction, so helpers can be combined
+    and still commit once.
+    """
+    conn = get_connection()
+
+    if conn.in_transaction:
+        yield conn
+        return
+
+    # IMMEDIATE takes the write lock up front instead of failing half way
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        # Journal first - if we crash now, recovery replays it into SQLite
+        if journal is not None:
+            journal.before_commit(conn)
+    except BaseException:
+        _forget_bidders()  # before the lock goes, so nobody can pick up an id that was never saved
+        conn.execute("ROLLBACK")
+        _invalidate_cache()  # reads made inside the transaction saw writes that are gone now
+        if journal is not None:
+            journal.discard()
+        raise
+    conn.execute("COMMIT")
+    _publish_bidders()
+    _invalidate_cache()
+    for listener in _commit_listeners:
+        listener()
+
+
+@contextmanager
+def savepoint():
+    """Run part of a transaction so that, if it raises, only that part is undone.
+
+    The rest of the transaction carries on (and still commits) - this is
+    how writer.Writer keeps one failed command from saving half its work
+    with the rest of its batch.
+    """
+    conn = get_connection()
+    mark = journal.mark() if journal is not None else 0
+    new_bidders = dict(_new_bidders())
+    conn.execute("SAVEPOINT command")
+    try:
+        yield conn
+    except BaseException:
+        _local.new_bidders = new_bidders  # forget the bidders it added
+        conn.execute("ROLLBACK TO command")
+        conn.execute("RELEASE command")
+        _invalidate_cache()
+        if journal is not None:
+            journal.discard(mark)
+        raise
+    conn.execute("RELEASE command")
+
+
+# ============ ITEM CACHE ============
+def _invalidate_cache():
+    """Make every thread's cached reads stale (called after we write or roll back)"""
+    global _cache_generation
+    with _cache_lock:
+        _cache_generation += 1
+
+
+def _cached(key, loader):
+    """Return loader()'s result, reusing the last one if nothing has changed.
+
+    Our own commits bump _cache_generation. Commits from other connections
+    (other kiosks) change PRAGMA data_version, which is a cheap check that
+    doesn't touch any table.
+    """
+    version = (_cache_generation, get_data_version())
+
+    # Something changed - everything cached so far is out of date
+    if _local.cache_version != version:
+        _local.cache = {}
+        _local.cache_version = version
+
+    if key in _local.cache:
+        cache_stats["hits"] += 1
+        return _local.cache[key]
+
+    cache_stats["misses"] += 1
+    value = loader()
+    _local.cache[key] = value
+    return value
+
+
+def add_commit_listener(listener):
+    """Call listener() after every commit made in this process (from any thread)"""
+    _commit_listeners.append(listener)
+
+
+def remove_commit_listener(listener):
+    """Stop calling a listener added with add_commit_listener"""
+    if listener in _commit_listeners:
+        _commit_listeners.remove(listener)
+
+
+def get_data_version():
+    """Get a number that changes whenever another connection commits"""
+    return get_connection().execute("PRAGMA data_version").fetchone()[0]
+
+
+def get_cache_stats():
+    """Get cache hits, misses and hit rate (0.0 - 1.0)"""
+    total = cache_stats["hits"] + cache_stats["misses"]
+    hit_rate = cache_stats["hits"] / total if total else 0.0
+    return {"hits": cache_stats["hits"], "misses": cache_stats["misses"], "hit_rate": hit_rate}
+
+
+def _count_query(sql):
+    """Trace callback - SQLite calls this for every statement it runs"""
+    query_stats["count"] += 1
+
+
+def count_queries(enabled=True):
+    """Start (or stop) counting this thread's SQL statements in query_stats"""
+    get_connection().set_trace_callback(_count_query if enabled else None)
+
+
+# ============ SETUP ============
 def create_tables():
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS items (
+    """Create the database tables (and their indexes) if they don't exist"""
+    with transaction() as conn:
+        is_new = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'items'"
+        ).fetchone()[0] == 0
+        if not is_new:
+            return  # migrate() brings older files up to date
+
+        create_bidders_table(conn)
+        create_items_table(conn)
+        create_bids_table(conn)
+        create_proxy_table(conn)
+        create_indexes(conn)
+        create_change_log(conn)
+        create_meta(conn)
+        create_results_tables(conn)
+
+        # A brand new file already has the latest schema - no migrations needed
+        conn.execute(f"PRAGMA user_version = {len(MIGRATIONS)}")
+
+
+def create_items_table(conn, name="items"):
+    """Create the items table"""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {name} (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL,
             description TEXT,
-            starting_price REAL NOT NULL,
-            max_bid REAL NOT NULL,
-            current_bid REAL DEFAULT 0,
-            highest_bidder TEXT DEFAULT ''
+            starting_price INTEGER NOT NULL,
+            max_bid INTEGER NOT NULL,
+            current_bid INTEGER DEFAULT 0,
+            highest_bidder_id INTEGER,
+            end_time REAL,
+            closed INTEGER DEFAULT 0,
+            FOREIGN KEY (highest_bidder_id) REFERENCES bidders(id)
         )
     """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS bids (
+
+
+def create_bids_table(conn, name="bids"):
+    """Create the bids table (the history of every accepted bid)"""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {name} (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             item_id INTEGER,
-            bidder_name TEXT NOT NULL,
-            bid_amount REAL NOT NULL,
+            bidder_id INTEGER NOT NULL,
+            bid_amount INTEGER NOT NULL,
             timestamp REAL,
-            FOREIGN KEY (item_id) REFERENCES items(id)
+            FOREIGN KEY (item_id) REFERENCES items(id),
+            FOREIGN KEY (bidder_id) REFERENCES bidders(id)
         )
     """)
-    conn.commit()
-    conn.close()
 
-def add_default_items():
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM items")
-    count = cursor.fetchone()[0]
-    if count == 0:
-        default_items = [
-            ("Wireless Headphones", "RGB Gaming Edition", 50.00, 150.00),
-            ("Gaming Controller", "Glow in the dark!", 35.00, 100.00),
-            ("Phone Ring Light", "Perfect for TikToks!", 15.00, 50.00),
-            ("LED Backpack", "Changes colors!", 40.00, 120.00),
-            ("Mini Skateboard", "Fingerboard pro set", 10.00, 40.00),
-            ("Bubble Tea Kit", "Make your own boba!", 20.00, 60.00),
-            ("Karaoke Mic", "Bluetooth speaker", 25.00, 80.00),
-            ("LED Strip Lights", "16 million colors!", 18.00, 55.00),
-        ]
-        cursor.executemany("""
-            INSERT INTO items (name, description, starting_price, max_bid)
-            VALUES (?, ?, ?, ?)
-        """, default_items)
-        conn.commit()
-        print("Added default items to database!")
-    conn.close()
 
-def get_all_items():
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id, name, description, starting_price, max_bid, current_bid, highest_bidder
+# ============ INDEXES & MIGRATIONS ============
+# Indexes: name -> what it covers
+INDEXES = {
+    "idx_bids_item_amount": "bids (item_id, bid_amount DESC)",  # top bids per item
+    "idx_bids_timestamp": "bids (timestamp)",                   # history in time order
+    "idx_bids_bidder": "bids (bidder_id)",                      # one bidder's bids
+    "idx_bids_item_bidder": "bids (item_id, bidder_id)",        # has this bidder bid on this item before?
+    # Highest maximum first (earliest first on a tie) - see _run_proxies
+    "idx_proxy_bids_item_max": "proxy_bids (item_id, max_amount DESC, id)",
+}
+
+
+def create_indexes(conn):
+    """Create any missing indexes from INDEXES"""
+    for name, columns in INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {columns}")
+
+
+# Migrations run on files made by older versions, so each one uses the
+# schema as it was then - later migrations change it further.
+def _migrate_add_bid_indexes(conn):
+    """Version 1: index the bids table"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_bids_item_amount ON bids (item_id, bid_amount DESC)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_bids_timestamp ON bids (timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_bids_bidder ON bids (bidder_name)")
+
+
+def _migrate_add_change_log(conn):
+    """Version 2: the changes table and its triggers"""
+    create_change_log(conn)
+
+
+def _migrate_add_meta(conn):
+    """Version 3: the meta table (remembers how much of the journal is saved)"""
+    create_meta(conn)
+
+
+def _migrate_add_proxy_bids(conn):
+    """Version 4: the proxy_bids table for automatic bidding"""
+    create_proxy_table(conn)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_proxy_bids_item_max ON {INDEXES['idx_proxy_bids_item_max']}")
+
+
+def _migrate_add_close_times(conn):
+    """Version 5: each item's own end time, and whether it has closed"""
+    conn.execute("ALTER TABLE items ADD COLUMN end_time REAL")
+    conn.execute("ALTER TABLE items ADD COLUMN closed INTEGER DEFAULT 0")
+
+
+def _migrate_add_results(conn):
+    """Version 6: the item_stats and results tables (version 7 fills them in)"""
+    create_results_tables(conn)
+
+
+def _migrate_bidder_ids(conn):
+    """Version 7: a bidders table - bids, items and automatic bids store bidder ids, not names"""
+    create_bidders_table(conn)
+
+    # The triggers mention the old columns - they're made again at the end
+    for name in [*CHANGE_TRIGGERS, *RESULT_TRIGGERS]:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+    if _has_column(conn, "items", "highest_bidder"):
+        conn.execute("INSERT OR IGNORE INTO bidders (name) SELECT highest_bidder FROM items WHERE highest_bidder != ''")
+        _rebuild_table(conn, "items", create_items_table, """
+            SELECT i.id, i.name, i.description, i.starting_price, i.max_bid, i.current_bid,
+                   p.id, i.end_time, i.closed
+            FROM items i
+            LEFT JOIN bidders p ON p.name = i.highest_bidder
+        """)
+
+    if _has_column(conn, "bids", "bidder_name"):
+        conn.execute("INSERT OR IGNORE INTO bidders (name) SELECT bidder_name FROM bids ORDER BY id")
+        _rebuild_table(conn, "bids", create_bids_table, """
+            SELECT b.id, b.item_id, p.id, b.bid_amount, b.timestamp
+            FROM bids b
+            JOIN bidders p ON p.name = b.bidder_name
+        """)
+
+    # (A file from before version 4 got the new proxy_bids table straight away)
+    if _has_column(conn, "proxy_bids", "bidder_name"):
+        conn.execute("INSERT OR IGNORE INTO bidders (name) SELECT bidder_name FROM proxy_bids ORDER BY id")
+        _rebuild_table(conn, "proxy_bids", create_proxy_table, """
+            SELECT x.id, x.item_id, p.id, x.max_amount, x.created
+            FROM proxy_bids x
+            JOIN bidders p ON p.name = x.bidder_name
+        """)
+
+    # A version 6 file named the winner too (rebuild_results fills in the ids)
+    if _has_column(conn, "results", "winner"):
+        _rebuild_table(conn, "results", _create_results_table,
+                       "SELECT item_id, NULL, amount, settled FROM results")
+
+    create_indexes(conn)
+    create_change_log(conn)
+    create_results_tables(conn)
+    rebuild_results(conn)
+
+
+def _migrate_money_to_pence(conn):
+    """Version 8: prices, bids and maximums are whole pence (INTEGER), not pounds (REAL)"""
+    for name in [*CHANGE_TRIGGERS, *RESULT_TRIGGERS]:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+    pence = "CAST(ROUND({} * 100) AS INTEGER)".format
+    _rebuild_table(conn, "items", create_items_table, f"""
+        SELECT id, name, description, {pence('starting_price')}, {pence('max_bid')}, {pence('current_bid')},
+               highest_bidder_id, end_time, closed
         FROM items
     """)
-    rows = cursor.fetchall()
-    conn.close()
-    items = []
-    for row in rows:
-        items.append({
-            "id": row[0],
-            "name": row[1],
-            "description": row[2],
-            "starting_price": row[3],
-            "max_bid": row[4],
-            "current_bid": row[5],
-            "highest_bidder": row[6]
-        })
-    return items
+    _rebuild_table(conn, "bids", create_bids_table, f"""
+        SELECT id, item_id, bidder_id, {pence('bid_amount')}, timestamp FROM bids
+    """)
+    _rebuild_table(conn, "proxy_bids", create_proxy_table, f"""
+        SELECT id, item_id, bidder_id, {pence('max_amount')}, created FROM proxy_bids
+    """)
+    _rebuild_table(conn, "results", _create_results_table, f"""
+        SELECT item_id, winner_id, {pence('amount')}, settled FROM results
+    """)
 
-def get_item(item_id):
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM items WHERE id = ?", (item_id,))
-    row = cursor.fetchone()
-    conn.close()
-    if row:
-        return {
-            "id": row[0],
-            "name": row[1],
-            "description": row[2],
-            "starting_price": row[3],
-            "max_bid": row[4],
-            "current_bid": row[5],
-            "highest_bidder": row[6]
-        }
-    return None
+    create_indexes(conn)
+    create_change_log(conn)
+    create_results_tables(conn)
 
-def add_item(name, description, starting_price, max_bid):
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO items (name, description, starting_price, max_bid)
-        VALUES (?, ?, ?, ?)
-    """, (name, description, starting_price, max_bid))
-    new_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    print(f"Added item: {name} (ID: {new_id})")
-    return new_id
 
-def update_bid(item_id, bid_amount, bidder_name):
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE items 
-        SET current_bid = ?, highest_bidder = ?
-        WHERE id = ?
-    """, (bid_amount, bidder_name, item_id))
-    cursor.execute("""
-        INSERT INTO bids (item_id, bidder_name, bid_amount, timestamp)
-        VALUES (?, ?, ?, ?)
-    """, (item_id, bidder_name, bid_amount, time.time()))
-    conn.commit()
-    conn.close()
-    print(f"Bid saved: {bidder_name} bid £{bid_amount:.2f} on item {item_id}")
+def _has_column(conn, table, column):
+    """Does a table have a column?"""
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})"))
 
-def get_all_bids():
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT b.id, b.item_id, i.name, b.bidder_name, b.bid_amount, b.timestamp
-        FROM bids b
-        JOIN items i ON b.item_id = i.id
-        ORDER BY b.timestamp
+
+def _rebuild_table(conn, table, create, select_sql):
+    """Swap a table for a new version, copying its rows with select_sql.
+
+    create(conn, name) makes the new table. Indexes and triggers on the
+    old table are dropped with it.
+    """
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+    create(conn, f"{table}_new")
+    conn.execute(f"INSERT INTO {table}_new {select_sql}")
+    conn.execute(f"DROP TABLE {table}")
+    conn.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+
+    # Don't hand out ids of rows deleted before the rebuild again
+    if row is not None:
+        conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (row[0], table))
+        conn.execute("""
+            INSERT INTO sqlite_sequence (name, seq)
+            SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = ?)
+        """, (table, row[0], table))
+
+
+# Schema upgrades for older auction.db files, oldest first.
+# PRAGMA user_version stores how many of them a file has had.
+MIGRATIONS = [
+    _migrate_add_bid_indexes,
+    _migrate_add_change_log,
+    _migrate_add_meta,
+    _migrate_add_proxy_bids,
+    _migrate_add_close_times,
+    _migrate_add_results,
+    _migrate_bidder_ids,
+    _migrate_money_to_pence,
+]
+
+
+def migrate():
+    """Bring an existing database file up to the latest schema"""
+    with transaction() as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+        for number in range(version, len(MIGRATIONS)):
+            MIGRATIONS[number](conn)
+            conn.execute(f"PRAGMA user_version = {number + 1}")
+            print(f"Upgraded database to version {number + 1}")
+
+
+def explain_query(sql, params=()):
+    """Show how SQLite will run a query (handy for checking index use)"""
+    conn = get_connection()
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return [row[-1] for row in rows]
+
+
+# ============ JOURNAL BOOKKEEPING ============
+def create_meta(conn):
+    """Create the meta table - a few named values about the database itself"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value
+        )
     """)
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
-
-def reset_auction():
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE items SET current_bid = 0, highest_bidder = ''")
-    cursor.execute("DELETE FROM bids")
-    conn.commit()
-    conn.close()
-    print("Auction reset!")
 
-def print_results():
-    print("\n" + "=" * 50)
-    print("AUCTION RESULTS")
-    print("=" * 50)
-    items = get_all_items()
-    for item in items:
-        if item["current_bid"] > 0:
-            print(f"✓ {item['name']}: {item['highest_bidder']} won with £{item['current_bid']:.2f}")
-        else:
-            print(f"✗ {item['name']}: No bids")
-    print("\n" + "-" * 50)
-    print("ALL BIDS:")
-    print("-" * 50)
-    bids = get_all_bids()
-    for bid in bids:
-        print(f"  {bid[3]} bid £{bid[4]:.2f} on {bid[2]}")
-    print("=" * 50 + "\n")
 
-def reset_to_default_items():
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM bids")
-    cursor.execute("DELETE FROM items")
-    conn.commit()
-    conn.close()
-    add_default_items()
-    print("Database reset to original 8 items!")
+def get_journal_seq(conn=None):
+    """Get the number of the last journal record saved in this database"""
+    conn = conn or get_connection()
+    row = conn.execute("SELECT value FROM meta WHERE key = 'journal_seq'").fetchone()
+    return row[0] if row else 0
 
-def init():
-    create_tables()
-    add_default_items()
 
-# Run init when module loads
-init()
-"""
-Database module - handles all database operations using SQLite
-SQLite is a simple file-based database built into Python!
-"""
-import sqlite3
-import time
+def set_journal_seq(conn, seq):
+    """Remember that journal records up to seq are saved in this database"""
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('journal_seq', ?)", (seq,))
 
-# Database file name
-DATABASE_FILE = "auction.db"
 
+def _journal(conn, *records):
+    """Number some records and hand them to the journal (if there is one).
 
-def create_tables():
-    """Create the database tables if they don't exist"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    
-    # Create items table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS items (
+    The numbers come from the database, inside the transaction, so every
+    kiosk writing to this file numbers its records in the same sequence.
+    """
+    if journal is None or not records:
+        return
+    seq = get_journal_seq(conn)
+    for record in records:
+        seq += 1
+        record["seq"] = seq
+    set_journal_seq(conn, seq)
+    journal.write(records)
+
+
+# ============ BIDDERS ============
+# Every bidder has a row in the bidders table, and bids, items and
+# automatic bids store the bidder's id instead of their name. A name never
+# changes once it has an id, so names and ids are cached for good - but a
+# bidder added by a transaction only goes in the shared cache once it
+# commits, so no other thread can see an id that might be rolled back.
+def create_bidders_table(conn):
+    """Create the bidders table: one row per name"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS bidders (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            description TEXT,
-            starting_price REAL NOT NULL,
-            max_bid REAL NOT NULL,
-            current_bid REAL DEFAULT 0,
-            highest_bidder TEXT DEFAULT ''
+            name TEXT NOT NULL UNIQUE
         )
     """)
-    
-    # Create bids table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS bids (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
+
+
+def intern_bidder(conn, name):
+    """Get a bidder's id, adding them to the bidders table the first time.
+
+    Call it inside a transaction.
+    """
+    bidder_id = find_bidder(name, conn)
+    if bidder_id is None:
+        # We hold the write lock, so nobody else can add this name meanwhile
+        bidder_id = conn.execute("INSERT INTO bidders (name) VALUES (?)", (name,)).lastrowid
+        _new_bidders()[name] = bidder_id
+    return bidder_id
+
+
+def find_bidder(name, conn=None):
+    """Get a bidder's id (None if that name has never bid)"""
+    bidder_id = _bidder_ids.get(name) or _new_bidders().get(name)
+    if bidder_id is None:
+        conn = conn or get_connection()
+        row = conn.execute("SELECT id FROM bidders WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        bidder_id = row[0]
+        _bidder_ids[name] = bidder_id
+        _bidder_names[bidder_id] = name
+    return bidder_id
+
+
+def get_bidder_name(bidder_id):
+    """Get a bidder's name from their id ("" for no bidder, None if no bidder has that id)"""
+    if bidder_id is None:
+        return ""
+    name = _bidder_names.get(bidder_id)
+    if name is None:
+        name = next((new_name for new_name, new_id in _new_bidders().items() if new_id == bidder_id), None)
+    if name is None:
+        row = get_connection().execute("SELECT name FROM bidders WHERE id = ?", (bidder_id,)).fetchone()
+        if row is None:
+            return None
+        name = row[0]
+        _bidder_ids[name] = bidder_id
+        _bidder_names[bidder_id] = name
+    return name
+
+
+def _new_bidders():
+    """Bidders this thread's transaction has added: name -> id (not committed yet)"""
+    new_bidders = getattr(_local, "new_bidders", None)
+    if new_bidders is None:
+        new_bidders = _local.new_bidders = {}
+    return new_bidders
+
+
+def _publish_bidders():
+    """Share the bidders this thread's transaction added, now it has committed"""
+    for name, bidder_id in _new_bidders().items():
+        _bidder_ids[name] = bidder_id
+        _bidder_names[bidder_id] = name
+    _local.new_bidders = {}
+
+
+def _forget_bidders():
+    """Empty the bidder cache"""
+    _bidder_ids.clear()
+    _bidder_names.clear()
+    _local.new_bidders = {}
+
+
+def read_all_items(conn):
+    """Read every item straight from the table, skipping the cache
+    (so it's right even in the middle of a transaction)"""
+    rows = conn.execute(f"SELECT {ITEM_COLUMNS} FROM items ORDER BY id").fetchall()
+    return [_row_to_item(row) for row in rows]
+
+
+# ============ CHANGE LOG ============
+# Every change to an item is numbered in the changes table, so screens can
+# ask "what changed since number N?" instead of re-reading every item.
+# Triggers fill it in, so no write can forget to (not even another kiosk's).
+_NOW = "(julianday('now') - 2440587.5) * 86400.0"  # unix time in SQL
+
+CHANGE_TRIGGERS = {
+    "trg_items_insert_change": f"""
+        AFTER INSERT ON items BEGIN
+            INSERT INTO changes (kind, item_id, timestamp) VALUES ('item', NEW.id, {_NOW});
+        END""",
+    "trg_items_update_change": f"""
+        AFTER UPDATE ON items BEGIN
+            INSERT INTO changes (kind, item_id, timestamp) VALUES ('item', NEW.id, {_NOW});
+        END""",
+    "trg_items_delete_change": f"""
+        AFTER DELETE ON items BEGIN
+            INSERT INTO changes (kind, item_id, timestamp) VALUES ('delete', OLD.id, {_NOW});
+        END""",
+}
+
+# ITEM_COLUMNS read from the items table joined as "i"
+_JOINED_ITEM_COLUMNS = ", ".join(f"i.{column}" for column in ITEM_COLUMNS.split(", "))
+
+
+def create_change_log(conn):
+    """Create the changes table and the triggers that fill it"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
             item_id INTEGER,
-            bidder_name TEXT NOT NULL,
-            bid_amount REAL NOT NULL,
-            timestamp REAL,
-            FOREIGN KEY (item_id) REFERENCES items(id)
+            timestamp REAL
         )
     """)
-    
-    conn.commit()
-    conn.close()
+    for name, body in CHANGE_TRIGGERS.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def _log_change(conn, kind):
+    """Add a change that isn't about one item (like a reset)"""
+    conn.execute("INSERT INTO changes (kind, timestamp) VALUES (?, ?)", (kind, clock()))
+
+
+def get_change_seq():
+    """Get the number of the latest change (0 if there hasn't been one)"""
+    row = get_connection().execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+    return row[0] if row else 0
+
+
+def get_changes(since_seq=0):
+    """Get every change after since_seq, oldest first.
+
+    Each change is a dictionary with seq, kind ("item", "delete" or
+    "reset") and item_id, plus the item as it is now for "item" changes.
+    If since_seq is so old that some changes have been pruned, you get a
+    single "reload" change instead - read everything again.
+    """
+    conn = get_connection()
+    oldest = conn.execute("SELECT MIN(seq) FROM changes").fetchone()[0]
+    latest = get_change_seq()
+    if since_seq < (oldest if oldest is not None else latest + 1) - 1:
+        return [{"seq": latest, "kind": "reload", "item_id": None, "item": None}]
+
+    rows = conn.execute(f"""
+        SELECT c.seq, c.kind, c.item_id, {_JOINED_ITEM_COLUMNS}
+        FROM changes c
+        LEFT JOIN items i ON i.id = c.item_id AND c.kind = 'item'
+        WHERE c.seq > ?
+        ORDER BY c.seq
+    """, (since_seq,)).fetchall()
+
+    return [
+        {"seq": seq, "kind": kind, "item_id": item_id,
+         "item": _row_to_item(item_row) if item_row[0] is not None else None}
+        for seq, kind, item_id, *item_row in rows
+    ]
+
+
+def prune_changes(keep=CHANGE_LOG_SIZE):
+    """Forget all but the latest keep changes (on start-up, and every so often from the Writer)"""
+    with transaction() as conn:
+        conn.execute("DELETE FROM changes WHERE seq <= ?", (get_change_seq() - keep,))
 
 
 def add_default_items():
     """Add default items if the database is empty"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    
-    # Check if items exist
-    cursor.execute("SELECT COUNT(*) FROM items")
-    count = cursor.fetchone()[0]
-    
-    if count == 0:
+    with transaction() as conn:
+        # Check if items exist
+        count = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        if count > 0:
+            return
+
         default_items = [
-            ("Wireless Headphones", "RGB Gaming Edition", 50.00, 150.00),
-            ("Gaming Controller", "Glow in the dark!", 35.00, 100.00),
-            ("Phone Ring Light", "Perfect for TikToks!", 15.00, 50.00),
-            ("LED Backpack", "Changes colors!", 40.00, 120.00),
-            ("Mini Skateboard", "Fingerboard pro set", 10.00, 40.00),
-            ("Bubble Tea Kit", "Make your own boba!", 20.00, 60.00),
-            ("Karaoke Mic", "Bluetooth speaker", 25.00, 80.00),
-            ("LED Strip Lights", "16 million colors!", 18.00, 55.00),
+            ("Wireless Headphones", "RGB Gaming Edition", 5000, 15000),
+            ("Gaming Controller", "Glow in the dark!", 3500, 10000),
+            ("Phone Ring Light", "Perfect for TikToks!", 1500, 5000),
+            ("LED Backpack", "Changes colors!", 4000, 12000),
+            ("Mini Skateboard", "Fingerboard pro set", 1000, 4000),
+            ("Bubble Tea Kit", "Make your own boba!", 2000, 6000),
+            ("Karaoke Mic", "Bluetooth speaker", 2500, 8000),
+            ("LED Strip Lights", "16 million colors!", 1800, 5500),
         ]
-        
-        cursor.executemany("""
+
+        conn.executemany("""
             INSERT INTO items (name, description, starting_price, max_bid)
             VALUES (?, ?, ?, ?)
         """, default_items)
-        
-        conn.commit()
-        print("Added default items to database!")
-    
-    conn.close()
+
+    print("Added default items to database!")
+
+
+# ============ ITEMS ============
+def _row_to_item(row):
+    """Turn an items row (in ITEM_COLUMNS order) into a dictionary"""
+    return {
+        "id": row[0],
+        "name": row[1],
+        "description": row[2],
+        "starting_price": row[3],
+        "max_bid": row[4],
+        "current_bid": row[5],
+        "highest_bidder": get_bidder_name(row[6]),
+        "highest_bidder_id": row[6],
+        "end_time": row[7],
+        "closed": bool(row[8]),
+    }
 
 
 def get_all_items():
-    """Get all items from the database"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT id, name, description, starting_price, max_bid, current_bid, highest_bidder
-        FROM items
-    """)
-    
-    rows = cursor.fetchall()
-    conn.close()
-    
+    """Get all items from the database.
+
+    The list is cached until the database changes, so it's cheap to call
+    every frame - but don't modify the dictionaries you get back.
+    """
+    return _cached("all_items", _load_all_items)
+
+
+def _load_all_items():
+    """Read every item straight from the database"""
+    conn = get_connection()
+
+    rows = conn.execute(f"SELECT {ITEM_COLUMNS} FROM items ORDER BY id").fetchall()
+
     # Convert to list of dictionaries (easier to use)
-    items = []
-    for row in rows:
-        items.append({
-            "id": row[0],
-            "name": row[1],
-            "description": row[2],
-            "starting_price": row[3],
-            "max_bid": row[4],
-            "current_bid": row[5],
-            "highest_bidder": row[6]
-        })
-    
-    return items
+    return [_row_to_item(row) for row in rows]
+
+
+def get_items_page(after_id=0, limit=ITEMS_PAGE_SIZE):
+    """Get up to `limit` items whose id comes after after_id, in id order.
+
+    Pages are found with the primary key (no OFFSET), so any page is as
+    quick to read as the first one. Cached like get_all_items.
+    """
+    def load():
+        conn = get_connection()
+        rows = conn.execute(f"""
+            SELECT {ITEM_COLUMNS} FROM items
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        """, (after_id, limit)).fetchall()
+        return [_row_to_item(row) for row in rows]
+
+    return _cached(("items_page", after_id, limit), load)
+
+
+def get_item_ids():
+    """Get every item id in order (cached) - ids[i] is the item at grid index i"""
+    def load():
+        conn = get_connection()
+        return [row[0] for row in conn.execute("SELECT id FROM items ORDER BY id")]
+
+    return _cached("item_ids", load)
+
+
+def item_count():
+    """Get the number of items (cached)"""
+    return len(get_item_ids())
 
 
 def get_item(item_id):
     """Get a single item by ID"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM items WHERE id = ?", (item_id,))
-    row = cursor.fetchone()
-    conn.close()
-    
+    conn = get_connection()
+
+    row = conn.execute(f"SELECT {ITEM_COLUMNS} FROM items WHERE id = ?",
+                       (item_id,)).fetchone()
+
     if row:
-        return {
-            "id": row[0],
-            "name": row[1],
-            "description": row[2],
-            "starting_price": row[3],
-            "max_bid": row[4],
-            "current_bid": row[5],
-            "highest_bidder": row[6]
-        }
+        return _row_to_item(row)
     return None
 
 
 def add_item(name, description, starting_price, max_bid):
-    """Add a new item to the database"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        INSERT INTO items (name, description, starting_price, max_bid)
-        VALUES (?, ?, ?, ?)
-    """, (name, description, starting_price, max_bid))
-    
-    new_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    
+    """Add a new item to the database.
+
+    If the auction is running, the item closes with the last open item.
+    """
+    money.check_pence(starting_price)
+    money.check_pence(max_bid)
+    with transaction() as conn:
+        cursor = conn.execute("""
+            INSERT INTO items (name, description, starting_price, max_bid, end_time)
+            VALUES (?, ?, ?, ?, (SELECT MAX(end_time) FROM items WHERE closed = 0))
+        """, (name, description, starting_price, max_bid))
+        new_id = cursor.lastrowid
+        _journal(conn, {"type": "item", "item": get_item(new_id)})
+
     print(f"Added item: {name} (ID: {new_id})")
     return new_id
 
 
+# ============ BIDS ============
 def update_bid(item_id, bid_amount, bidder_name):
     """Update the current bid on an item"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    
-    # Update the item
-    cursor.execute("""
-        UPDATE items 
-        SET current_bid = ?, highest_bidder = ?
+    money.check_pence(bid_amount)
+    saved = f"Bid saved: {bidder_name} bid {money.format_money(bid_amount)} on item {item_id}"
+    with transaction() as conn:
+        bidder_id = intern_bidder(conn, bidder_name)
+
+        # Update the item
+        conn.execute("""
+            UPDATE items
+            SET current_bid = ?, highest_bidder_id = ?
+            WHERE id = ?
+        """, (bid_amount, bidder_id, item_id))
+
+        # Save to bids history
+        timestamp = clock()
+        conn.execute("""
+            INSERT INTO bids (item_id, bidder_id, bid_amount, timestamp)
+            VALUES (?, ?, ?, ?)
+        """, (item_id, bidder_id, bid_amount, timestamp))
+        _journal(conn, _bid_record(item_id, bidder_name, bid_amount, timestamp, True))
+
+    print(saved)
+
+
+def _bid_record(item_id, bidder_name, bid_amount, timestamp, accepted):
+    """A bid as a journal record"""
+    return {"type": "bid", "item_id": item_id, "bidder": bidder_name,
+            "amount": bid_amount, "timestamp": timestamp, "accepted": accepted}
+
+
+def place_bid(item_id, bidder_name, bid_amount):
+    """Place a bid if it beats the current price and stays under the limit.
+
+    The check and the write are one conditional UPDATE, so two kiosks
+    bidding at the same moment can't overwrite each other's bid. Anyone's
+    automatic bid on the item answers in the same transaction. Bids on an
+    item that has closed (or whose time is up) are rejected.
+    Returns (accepted, item) where item is the latest state from the database.
+    Raises TypeError (and saves nothing) if bid_amount isn't whole pence.
+    """
+    money.check_pence(bid_amount)
+    saved = f"Bid saved: {bidder_name} bid {money.format_money(bid_amount)} on item {item_id}"
+    with transaction() as conn:
+        accepted = _try_bid(conn, item_id, intern_bidder(conn, bidder_name), bid_amount)
+        if accepted:
+            _run_proxies(conn, item_id)
+        item = get_item(item_id)
+
+    if accepted:
+        print(saved)
+    return accepted, item
+
+
+def _try_bid(conn, item_id, bidder_id, bid_amount):
+    """Save a bid if it beats the current price - returns True if it did"""
+    now = clock()
+    # (_bid_allowed checks the same rule in memory for update_bids_many)
+    cursor = conn.execute("""
+        UPDATE items
+        SET current_bid = ?, highest_bidder_id = ?
         WHERE id = ?
-    """, (bid_amount, bidder_name, item_id))
-    
-    # Save to bids history
-    cursor.execute("""
-        INSERT INTO bids (item_id, bidder_name, bid_amount, timestamp)
-        VALUES (?, ?, ?, ?)
-    """, (item_id, bidder_name, bid_amount, time.time()))
-    
-    conn.commit()
-    conn.close()
-    
-    print(f"Bid saved: {bidder_name} bid £{bid_amount:.2f} on item {item_id}")
+          AND ? > MAX(current_bid, starting_price)
+          AND ? <= max_bid
+          AND closed = 0
+          AND (end_time IS NULL OR end_time > ?)
+    """, (bid_amount, bidder_id, item_id, bid_amount, bid_amount, now))
+    accepted = cursor.rowcount == 1
+
+    # Anti-sniping: a bid in the last few seconds gives everyone time to answer
+    if accepted:
+        _extend_close(conn, item_id, now + SOFT_CLOSE_SECONDS)
+
+    # Only winning bids go into the history (the journal keeps them all)
+    timestamp = now
+    if accepted:
+        conn.execute("""
+            INSERT INTO bids (item_id, bidder_id, bid_amount, timestamp)
+            VALUES (?, ?, ?, ?)
+        """, (item_id, bidder_id, bid_amount, timestamp))
+    # The journal keeps names, so it still makes sense without this database
+    _journal(conn, _bid_record(item_id, get_bidder_name(bidder_id), bid_amount, timestamp, accepted))
+    return accepted
+
+
+# ============ AUTOMATIC BIDS ============
+def create_proxy_table(conn, name="proxy_bids"):
+    """Create the proxy_bids table: each bidder's secret maximum per item"""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_id INTEGER NOT NULL,
+            bidder_id INTEGER NOT NULL,
+            max_amount INTEGER NOT NULL,
+            created REAL,
+            UNIQUE (item_id, bidder_id),
+            FOREIGN KEY (item_id) REFERENCES items(id),
+            FOREIGN KEY (bidder_id) REFERENCES bidders(id)
+        )
+    """)
+
+
+def _run_proxies(conn, item_id):
+    """Let automatic bids answer the latest bid on an item.
+
+    Only the top two maximums matter, and the index (idx_proxy_bids_item_max)
+    hands them over straight away. At most one bid is placed - the price the bidding war
+    would have ended at - instead of a bid for every step of it.
+    """
+    proxies = conn.execute("""
+        SELECT bidder_id, max_amount FROM proxy_bids
+        WHERE item_id = ?
+        ORDER BY max_amount DESC, id
+        LIMIT 2
+    """, (item_id,)).fetchall()
+    if not proxies:
+        return
+
+    move = proxy.resolve(get_item(item_id), proxies)
+    if move is not None:
+        bidder_id, amount = move
+        _try_bid(conn, item_id, bidder_id, amount)
+
+
+def set_proxy_bid(item_id, bidder_name, max_amount):
+    """Bid automatically for bidder_name, up to max_amount.
+
+    The maximum must beat the current price and stay under the item's
+    limit. Setting it again changes it. The automatic bid starts straight
+    away if somebody else is winning.
+    Returns (accepted, item) like place_bid.
+    """
+    money.check_pence(max_amount)
+    saved = f"Auto-bid set: {bidder_name} up to {money.format_money(max_amount)} on item {item_id}"
+    with transaction() as conn:
+        item = get_item(item_id)
+        if item is None:
+            return False, None
+
+        price = item["current_bid"] if item["current_bid"] > 0 else item["starting_price"]
+        if max_amount <= price or max_amount > item["max_bid"] or not is_open(item):
+            return False, item
+
+        conn.execute("""
+            INSERT INTO proxy_bids (item_id, bidder_id, max_amount, created)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (item_id, bidder_id) DO UPDATE SET max_amount = excluded.max_amount
+        """, (item_id, intern_bidder(conn, bidder_name), max_amount, clock()))
+        _journal(conn, {"type": "proxy", "item_id": item_id, "bidder": bidder_name, "max_amount": max_amount})
+
+        _run_proxies(conn, item_id)
+        item = get_item(item_id)
+
+    print(saved)
+    return True, item
+
+
+def update_bids_many(bids, chunk_size=BULK_CHUNK_SIZE, pounds=False):
+    """Apply lots of bids at once (e.g. from paper backups or another kiosk).
+
+    bids can be any iterable of (item_id, bidder_name, bid_amount, timestamp)
+    tuples or dictionaries like the ones in a bid log, or the path to a JSONL
+    bid log (see read_bid_log - pounds=True for an old log in pounds). Bids
+    go in order, with the same rules as place_bid at the bid's own timestamp
+    (now, for bids without one), and each chunk is saved in one transaction.
+    An amount that isn't whole pence raises TypeError before its chunk is
+    saved (earlier chunks stay saved).
+    Returns a list with True (accepted) or False (rejected) for each bid.
+    """
+    if isinstance(bids, (str, os.PathLike)):
+        bids = read_bid_log(bids, pounds)
+
+    results = []
+    chunk = []
+    for bid in bids:
+        if isinstance(bid, dict):
+            bid = (bid["item_id"], bid["bidder"], bid["amount"], bid.get("timestamp"))
+        money.check_pence(bid[2])
+        chunk.append(bid)
+
+        if len(chunk) >= chunk_size:
+            results.extend(_apply_bid_chunk(chunk))
+            chunk = []
+
+    if chunk:
+        results.extend(_apply_bid_chunk(chunk))
+
+    print(f"Imported {len(results)} bids ({sum(results)} accepted)")
+    return results
+
+
+def _apply_bid_chunk(chunk):
+    """Check and save one chunk of bids in a single transaction.
+
+    Automatic bids answer every accepted bid, just like in place_bid.
+    """
+    with transaction() as conn:
+        # Read every item this chunk touches (and its automatic bids) once,
+        # then check bids in memory
+        item_ids = list({bid[0] for bid in chunk})
+        placeholders = ", ".join("?" * len(item_ids))
+        rows = conn.execute(f"""
+            SELECT {ITEM_COLUMNS}
+            FROM items WHERE id IN ({placeholders})
+        """, item_ids).fetchall()
+        state = {row[0]: _row_to_item(row) for row in rows}
+        proxies = _read_proxies(conn, item_ids)
+        now = clock()
+
+        results = []
+        new_bids = []
+        records = []
+        changed = set()
+
+        def win(item, bidder_id, bid_amount, timestamp):
+            """Make a bid the item's new high bid (in memory, saved below)"""
+            item["current_bid"] = bid_amount
+            item["highest_bidder_id"] = bidder_id
+            changed.add(item["id"])
+            new_bids.append((item["id"], bidder_id, bid_amount, timestamp))
+            # Anti-sniping, like in _try_bid - later bids in the chunk see the new close
+            if item["end_time"] is not None:
+                item["end_time"] = max(item["end_time"], timestamp + SOFT_CLOSE_SECONDS)
+
+        for item_id, bidder_name, bid_amount, timestamp in chunk:
+            item = state.get(item_id)
+            if timestamp is None:
+                timestamp = now
+
+            # Same rule as place_bid, at the time the bid was made (so a
+            # backup restored after the close keeps the bids made before it)
+            accepted = item is not None and _bid_allowed(item, bid_amount, timestamp)
+            results.append(accepted)
+            records.append(_bid_record(item_id, bidder_name, bid_amount, timestamp, accepted))
+            if not accepted:
+                continue
+            win(item, intern_bidder(conn, bidder_name), bid_amount, timestamp)
+
+            # Anyone's automatic bid answers straight away, like in place_bid
+            move = proxy.resolve(item, proxies.get(item_id))
+            if move is not None:
+                proxy_id, amount = move
+                answered = _bid_allowed(item, amount, timestamp)
+                if answered:
+                    win(item, proxy_id, amount, timestamp)
+                records.append(_bid_record(item_id, get_bidder_name(proxy_id), amount, timestamp, answered))
+
+        conn.executemany("""
+            INSERT INTO bids (item_id, bidder_id, bid_amount, timestamp)
+            VALUES (?, ?, ?, ?)
+        """, new_bids)
+        conn.executemany("""
+            UPDATE items
+            SET current_bid = ?, highest_bidder_id = ?
+            WHERE id = ?
+        """, [(state[item_id]["current_bid"], state[item_id]["highest_bidder_id"], item_id)
+              for item_id in changed])
+        _journal(conn, *records)
+
+        for item_id in changed:
+            if state[item_id]["end_time"] is not None:
+                _extend_close(conn, item_id, state[item_id]["end_time"])
+
+    return results
+
+
+def _bid_allowed(item, bid_amount, now):
+    """Can bid_amount win the item at time now? It has to beat the price, stay
+    under the limit and come before the item closes - the same rule as
+    _try_bid's UPDATE, for bids checked in memory (keep the two in step)"""
+    return (not item["closed"]
+            and (item["end_time"] is None or item["end_time"] > now)
+            and max(item["current_bid"], item["starting_price"]) < bid_amount <= item["max_bid"])
+
+
+def _read_proxies(conn, item_ids):
+    """Get the top two (bidder_id, max_amount) automatic bids for each item, highest first"""
+    placeholders = ", ".join("?" * len(item_ids))
+    proxies = {}
+    for item_id, bidder_id, max_amount in conn.execute(f"""
+        SELECT item_id, bidder_id, max_amount FROM proxy_bids
+        WHERE item_id IN ({placeholders})
+        ORDER BY item_id, max_amount DESC, id
+    """, item_ids):
+        top = proxies.setdefault(item_id, [])
+        if len(top) < 2:
+            top.append((bidder_id, max_amount))
+    return proxies
+
+
+def read_bid_log(path, pounds=False):
+    """Read bids from a JSONL bid log, one at a time.
+
+    Each line looks like:
+    {"item_id": 1, "bidder": "Sam", "amount": 5500, "timestamp": 1700000000.0}
+
+    Amounts are in pence, like everywhere else (5500 is £55.00) - a line
+    with any other amount raises TypeError. Logs written before that had
+    pounds ("amount": 55.0): read them with pounds=True to convert them.
+    """
+    with open(path, encoding="utf-8") as log:
+        for number, line in enumerate(log, 1):
+            if line.strip():
+                bid = json.loads(line)
+                amount = bid["amount"]
+                if pounds:
+                    amount = money.to_pence(amount)
+                elif not isinstance(amount, int) or isinstance(amount, bool):
+                    raise TypeError(f"{path} line {number}: amount {amount!r} isn't whole pence "
+                                    f"(read an old log in pounds with pounds=True)")
+                yield (bid["item_id"], bid["bidder"], amount, bid.get("timestamp"))
 
 
 def get_all_bids():
     """Get all bids from the database"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        SELECT b.id, b.item_id, i.name, b.bidder_name, b.bid_amount, b.timestamp
+    conn = get_connection()
+
+    return conn.execute("""
+        SELECT b.id, b.item_id, i.name, p.name, b.bid_amount, b.timestamp
+        FROM bids b
+        JOIN items i ON b.item_id = i.id
+        JOIN bidders p ON p.id = b.bidder_id
+        ORDER BY b.timestamp
+    """).fetchall()
+
+
+# The queries below return rows shaped like get_all_bids:
+# (bid id, item id, item name, bidder name, amount, timestamp)
+
+def get_top_bids(item_id, limit=10):
+    """Get the highest bids on one item, highest first"""
+    conn = get_connection()
+
+    return conn.execute("""
+        SELECT b.id, b.item_id, i.name, p.name, b.bid_amount, b.timestamp
+        FROM bids b
+        JOIN items i ON b.item_id = i.id
+        JOIN bidders p ON p.id = b.bidder_id
+        WHERE b.item_id = ?
+        ORDER BY b.bid_amount DESC
+        LIMIT ?
+    """, (item_id, limit)).fetchall()
+
+
+def get_bidder_history(bidder_name):
+    """Get every bid one bidder has made, oldest first"""
+    conn = get_connection()
+    bidder_id = find_bidder(bidder_name)
+    if bidder_id is None:
+        return []
+
+    # Ordering by id (insert order) keeps this on the bidder index
+    return conn.execute("""
+        SELECT b.id, b.item_id, i.name, p.name, b.bid_amount, b.timestamp
         FROM bids b
         JOIN items i ON b.item_id = i.id
+        JOIN bidders p ON p.id = b.bidder_id
+        WHERE b.bidder_id = ?
+        ORDER BY b.id
+    """, (bidder_id,)).fetchall()
+
+
+def get_bids_since(timestamp):
+    """Get bids made after a timestamp (from clock()), oldest first"""
+    conn = get_connection()
+
+    return conn.execute("""
+        SELECT b.id, b.item_id, i.name, p.name, b.bid_amount, b.timestamp
+        FROM bids b
+        JOIN items i ON b.item_id = i.id
+        JOIN bidders p ON p.id = b.bidder_id
+        WHERE b.timestamp > ?
         ORDER BY b.timestamp
+    """, (timestamp,)).fetchall()
+
+
+# ============ CLOSING ITEMS ============
+# Every item has its own end time. scheduler.py closes each one when its
+# time comes, and late bids push it back (see _extend_close).
+def open_auction(duration, stagger=0):
+    """Give every item without an end time one, duration seconds from now.
+
+    If the auction has finished (no item is still open - e.g. a kiosk
+    restarted after closing time) every item is opened again instead, with
+    a new end time, keeping its bids. With stagger, items close that many
+    seconds apart (in id order) instead of all at once.
+    """
+    with transaction() as conn:
+        now = clock()
+        running = conn.execute("SELECT 1 FROM items WHERE closed = 0 AND end_time > ? LIMIT 1", (now,)).fetchone()
+        reopen = not running and conn.execute("SELECT 1 FROM items WHERE end_time IS NOT NULL LIMIT 1").fetchone()
+        where = "" if reopen else "WHERE end_time IS NULL"
+        ids = [row[0] for row in conn.execute(f"SELECT id FROM items {where} ORDER BY id")]
+        end_times = [(item_id, now + duration + index * stagger) for index, item_id in enumerate(ids)]
+        _schedule(conn, end_times)
+
+    if reopen:
+        print("Auction reopened!")
+
+
+def _schedule(conn, end_times):
+    """Set some items' end times from (item id, end time) pairs - they're open until then"""
+    if not end_times:
+        return
+    conn.executemany("UPDATE items SET end_time = ?, closed = 0 WHERE id = ?",
+                     [(end_time, item_id) for item_id, end_time in end_times])
+    _journal(conn, {"type": "schedule", "end_times": end_times})
+
+
+def _extend_close(conn, item_id, end_time):
+    """Move an item's end time back to end_time, if it's sooner than that"""
+    cursor = conn.execute("""
+        UPDATE items SET end_time = ?
+        WHERE id = ? AND end_time < ?
+    """, (end_time, item_id, end_time))
+    if cursor.rowcount:
+        _journal(conn, {"type": "schedule", "end_times": [(item_id, end_time)]})
+
+
+def is_open(item):
+    """Can the item still be bid on?"""
+    return not item["closed"] and (item["end_time"] is None or item["end_time"] > clock())
+
+
+def get_close_times():
+    """Get (item id, end time) for every open item that has an end time"""
+    conn = get_connection()
+    return conn.execute("""
+        SELECT id, end_time FROM items
+        WHERE closed = 0 AND end_time IS NOT NULL
+    """).fetchall()
+
+
+def get_auction_end():
+    """Get when the last item closes (None if the auction hasn't started)"""
+    def load():
+        return get_connection().execute("SELECT MAX(end_time) FROM items").fetchone()[0]
+
+    return _cached("auction_end", load)
+
+
+def close_item(item_id, end_time):
+    """Close bidding on an item that was due to close at end_time.
+
+    Nothing happens if it has closed already, or if a late bid has pushed
+    its end time back since. Returns the closed item (or None).
+    """
+    with transaction() as conn:
+        cursor = conn.execute("""
+            UPDATE items SET closed = 1
+            WHERE id = ? AND closed = 0 AND end_time <= ?
+        """, (item_id, end_time))
+        if cursor.rowcount == 0:
+            return None
+        now = clock()
+        conn.execute("UPDATE results SET settled = ? WHERE item_id = ?", (now, item_id))
+        _journal(conn, {"type": "close", "item_id": item_id, "timestamp": now})
+        item = get_item(item_id)
+
+    if item["current_bid"] > 0:
+        print(f"Closed item {item_id}: sold to {item['highest_bidder']} for {money.format_money(item['current_bid'])}")
+    else:
+        print(f"Closed item {item_id}: no bids")
+    return item
+
+
+# ============ ITEM STATS & SETTLEMENT ============
+# Results come from two small tables kept up to date as things happen, so
+# reading them takes one row per item however many bids there have been:
+#   item_stats - bid count, distinct bidders, first and last bid per item
+#   results    - the winner of each item, written when it closes
+# Triggers keep them right whoever writes (a kiosk, the server, or journal
+# recovery). Bids are only ever deleted all at once, by clear_bids.
+RESULT_TRIGGERS = {
+    "trg_items_insert_stats": """
+        AFTER INSERT ON items BEGIN
+            INSERT OR IGNORE INTO item_stats (item_id) VALUES (NEW.id);
+            INSERT OR REPLACE INTO results (item_id, winner_id, amount, settled)
+                SELECT NEW.id, NEW.highest_bidder_id, NULLIF(NEW.current_bid, 0), NULL
+                WHERE NEW.closed = 1;
+        END""",
+    "trg_items_delete_stats": """
+        AFTER DELETE ON items BEGIN
+            DELETE FROM item_stats WHERE item_id = OLD.id;
+            DELETE FROM results WHERE item_id = OLD.id;
+        END""",
+    "trg_items_close_result": f"""
+        AFTER UPDATE OF closed ON items WHEN NEW.closed = 1 AND OLD.closed = 0 BEGIN
+            INSERT OR REPLACE INTO results (item_id, winner_id, amount, settled)
+                VALUES (NEW.id, NEW.highest_bidder_id, NULLIF(NEW.current_bid, 0), {_NOW});
+        END""",
+    "trg_items_reopen_result": """
+        AFTER UPDATE OF closed ON items WHEN NEW.closed = 0 AND OLD.closed = 1 BEGIN
+            DELETE FROM results WHERE item_id = NEW.id;
+        END""",
+    # Counting distinct bidders only needs "has this bidder bid here before?" (an index lookup)
+    "trg_bids_insert_stats": """
+        AFTER INSERT ON bids BEGIN
+            INSERT INTO item_stats (item_id, bid_count, bidders, first_bid, last_bid)
+                VALUES (NEW.item_id, 1, 1, NEW.timestamp, NEW.timestamp)
+            ON CONFLICT (item_id) DO UPDATE SET
+                bid_count = bid_count + 1,
+                bidders = bidders + NOT EXISTS (
+                    SELECT 1 FROM bids
+                    WHERE item_id = NEW.item_id AND bidder_id = NEW.bidder_id AND id <> NEW.id),
+                first_bid = MIN(COALESCE(first_bid, NEW.timestamp), NEW.timestamp),
+                last_bid = MAX(COALESCE(last_bid, NEW.timestamp), NEW.timestamp);
+        END""",
+}
+
+
+def create_results_tables(conn):
+    """Create the item_stats and results tables and the triggers that fill them"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS item_stats (
+            item_id INTEGER PRIMARY KEY,
+            bid_count INTEGER NOT NULL DEFAULT 0,
+            bidders INTEGER NOT NULL DEFAULT 0,
+            first_bid REAL,
+            last_bid REAL,
+            FOREIGN KEY (item_id) REFERENCES items(id)
+        )
+    """)
+    _create_results_table(conn)
+    for name, body in RESULT_TRIGGERS.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def _create_results_table(conn, name="results"):
+    """Create the results table (see create_results_tables)"""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {name} (
+            item_id INTEGER PRIMARY KEY,
+            winner_id INTEGER,
+            amount INTEGER,
+            settled REAL,
+            FOREIGN KEY (item_id) REFERENCES items(id),
+            FOREIGN KEY (winner_id) REFERENCES bidders(id)
+        )
+    """)
+
+
+def rebuild_results(conn):
+    """Work item_stats and results out again from scratch (reads every bid)"""
+    conn.execute("DELETE FROM item_stats")
+    conn.execute("""
+        INSERT INTO item_stats (item_id, bid_count, bidders, first_bid, last_bid)
+        SELECT i.id, COUNT(b.id), COUNT(DISTINCT b.bidder_id), MIN(b.timestamp), MAX(b.timestamp)
+        FROM items i
+        LEFT JOIN bids b ON b.item_id = i.id
+        GROUP BY i.id
+    """)
+    # Keep the settle times we have - they can't be worked out again
+    conn.execute("DELETE FROM results WHERE item_id NOT IN (SELECT id FROM items WHERE closed = 1)")
+    conn.execute("""
+        INSERT OR REPLACE INTO results (item_id, winner_id, amount, settled)
+        SELECT i.id, i.highest_bidder_id, NULLIF(i.current_bid, 0), r.settled
+        FROM items i
+        LEFT JOIN results r ON r.item_id = i.id
+        WHERE i.closed = 1
     """)
-    
-    rows = cursor.fetchall()
-    conn.close()
-    
-    return rows
-
-
-def reset_auction():
-    """Reset all bids (for a new auction)"""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    
-    cursor.execute("UPDATE items SET current_bid = 0, highest_bidder = ''")
-    cursor.execute("DELETE FROM bids")
-    
-    conn.commit()
-    conn.close()
-    
+
+
+def clear_bids(conn):
+    """Delete every bid and automatic bid, and zero the item stats to match"""
+    conn.execute("DELETE FROM bids")
+    conn.execute("DELETE FROM proxy_bids")
+    conn.execute("UPDATE item_stats SET bid_count = 0, bidders = 0, first_bid = NULL, last_bid = NULL")
+
+
+def get_results():
+    """Get every item's result in id order - one row per item, never the bids.
+
+    Each result has the item's id, name, winner and amount (None without
+    a bid), closed, bid_count, bidders (how many different people bid),
+    first_bid and last_bid (timestamps) and settled (when it closed).
+    A closed item's winner and amount are what the results table settled
+    it at; an open item's are its current bid. Cached like get_all_items.
+    """
+    def load():
+        rows = get_connection().execute("""
+            SELECT i.id, i.name,
+                   CASE WHEN r.item_id IS NULL THEN i.highest_bidder_id ELSE r.winner_id END,
+                   CASE WHEN r.item_id IS NULL THEN NULLIF(i.current_bid, 0) ELSE r.amount END,
+                   i.closed,
+                   COALESCE(s.bid_count, 0), COALESCE(s.bidders, 0), s.first_bid, s.last_bid, r.settled
+            FROM items i
+            LEFT JOIN item_stats s ON s.item_id = i.id
+            LEFT JOIN results r ON r.item_id = i.id
+            ORDER BY i.id
+        """).fetchall()
+        return [_row_to_result(row) for row in rows]
+
+    return _cached("results", load)
+
+
+def _row_to_result(row):
+    """Turn a get_results row into a dictionary"""
+    item_id, name, bidder_id, amount, closed, bid_count, bidders, first_bid, last_bid, settled = row
+    has_winner = amount is not None
+    return {
+        "item_id": item_id,
+        "item_name": name,
+        "bidder": get_bidder_name(bidder_id) if has_winner else None,
+        "amount": amount if has_winner else None,
+        "closed": bool(closed),
+        "bid_count": bid_count,
+        "bidders": bidders,
+        "first_bid": first_bid,
+        "last_bid": last_bid,
+        "settled": settled,
+    }
+
+
+# ============ RESETS & RESULTS ============
+def reset_auction(duration=None, stagger=0):
+    """Reset all bids (for a new auction).
+
+    With duration, every item gets a new end time too (see open_auction).
+    """
+    with transaction() as conn:
+        conn.execute("UPDATE items SET current_bid = 0, highest_bidder_id = NULL, end_time = NULL, closed = 0")
+        clear_bids(conn)
+        _log_change(conn, "reset")
+        # The bids are gone from the tables, but the journal still has them
+        _journal(conn, {"type": "reset", "timestamp": clock()})
+        if duration is not None:
+            open_auction(duration, stagger)
+
     print("Auction reset!")
 
 
 def print_results():
-    """Print all results to terminal"""
-    print("\n" + "=" * 50)
-    print("AUCTION RESULTS")
-    print("=" * 50)
-    
-    items = get_all_items()
-    for item in items:
-        if item["current_bid"] > 0:
-            print(f"✓ {item['name']}: {item['highest_bidder']} won with £{item['current_bid']:.2f}")
-        else:
-            print(f"✗ {item['name']}: No bids")
-    
-    print("\n" + "-" * 50)
-    print("ALL BIDS:")
-    print("-" * 50)
-    
-    bids = get_all_bids()
-    for bid in bids:
-        print(f"  {bid[3]} bid £{bid[4]:.2f} on {bid[2]}")
-    
-    print("=" * 50 + "\n")
-    
+    """Print every item's result and every bid to the terminal"""
+    # Imported here because export imports this module
+    import export
+    export.write_report(sys.stdout, "text")
+
+
 def reset_to_default_items():
     """Delete all items and bids, then re-add the 8 default items."""
-    conn = sqlite3.connect(DATABASE_FILE)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM bids")
-    cursor.execute("DELETE FROM items")
-    conn.commit()
-    conn.close()
-    add_default_items()
+    with transaction() as conn:
+        clear_bids(conn)
+        conn.execute("DELETE FROM items")
+        add_default_items()
+        _log_change(conn, "reset")
+        _journal(conn, {"type": "reset_items", "timestamp": clock(), "items": read_all_items(conn)})
+
     print("Database reset to original 8 items!")
 
 
-# Initialize database when this module is imported
-def init():
-    """Initialize the database"""
+# Call this once at startup (main.py's AuctionApp does it for you)
+def init(database_file=None):
+    """Initialize the database, optionally switching to another file first"""
+    global DATABASE_FILE
+    if database_file is not None:
+        DATABASE_FILE = database_file
+
+    _forget_bidders()  # they may be numbered differently in this file
     create_tables()
+    migrate()
     add_default_items()
-
-
-# Run init when module loads
-init()
+    prune_changes()
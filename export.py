@@ -0,0 +1,118 @@
+"""
+Export module - writes the auction results and bid history to any open file
+(CSV, JSONL or plain text).
+
+Results come from db.get_results (one row per item, kept up to date as
+bids arrive). Bids are read from the database a few hundred at a time
+and written straight out, so even a whole season of bids never sits in
+memory at once.
+
+Amounts are in pence (see money.py) in CSV and JSONL, and in pounds in
+the text report.
+"""
+import csv
+import json
+
+import db
+import money
+
+FETCH_SIZE = 500  # rows read from the database at a time
+FORMATS = ("text", "csv", "jsonl")
+
+CSV_COLUMNS = ["type", "item_id", "item_name", "bidder", "amount", "timestamp", "bid_count",
+               "bidders", "first_bid", "last_bid", "closed", "settled"]
+
+
+# ============ READING ============
+def _iter_cursor(cursor):
+    """Yield rows from a cursor a batch at a time"""
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        yield from rows
+
+
+def iter_results():
+    """Yield each item's result: winner, winning amount and bid stats"""
+    for result in db.get_results():
+        yield {"type": "result", **result}
+
+
+def iter_bids():
+    """Yield every bid, oldest first"""
+    conn = db.get_connection()
+
+    cursor = conn.execute("""
+        SELECT b.item_id, i.name, p.name, b.bid_amount, b.timestamp
+        FROM bids b
+        JOIN items i ON b.item_id = i.id
+        JOIN bidders p ON p.id = b.bidder_id
+        ORDER BY b.timestamp
+    """)
+
+    for item_id, name, bidder, amount, timestamp in _iter_cursor(cursor):
+        yield {
+            "type": "bid",
+            "item_id": item_id,
+            "item_name": name,
+            "bidder": bidder,
+            "amount": amount,
+            "timestamp": timestamp,
+        }
+
+
+# ============ WRITING ============
+def write_report(file, fmt="text", include_bids=True):
+    """Write the results followed by every bid (unless include_bids is False) to an open file"""
+    bids = iter_bids() if include_bids else ()
+    if fmt == "text":
+        _write_text(file, bids)
+    elif fmt == "csv":
+        writer = csv.DictWriter(file, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        writer.writerows(iter_results())
+        writer.writerows(bids)
+    elif fmt == "jsonl":
+        for record in iter_results():
+            file.write(json.dumps(record) + "\n")
+        for record in bids:
+            file.write(json.dumps(record) + "\n")
+    else:
+        raise ValueError(f"Unknown format {fmt!r} - use one of {FORMATS}")
+
+
+def _write_text(file, bids):
+    """Write the same report print_results shows in the terminal"""
+    file.write("\n" + "=" * 50 + "\n")
+    file.write("AUCTION RESULTS\n")
+    file.write("=" * 50 + "\n")
+
+    for result in iter_results():
+        if result["amount"] is not None:
+            amount = money.format_money(result["amount"])
+            file.write(f"✓ {result['item_name']}: {result['bidder']} won with {amount} "
+                       f"({result['bid_count']} bids from {result['bidders']} bidders)\n")
+        else:
+            file.write(f"✗ {result['item_name']}: No bids\n")
+
+    if bids:
+        file.write("\n" + "-" * 50 + "\n")
+        file.write("ALL BIDS:\n")
+        file.write("-" * 50 + "\n")
+
+        for bid in bids:
+            file.write(f"  {bid['bidder']} bid {money.format_money(bid['amount'])} on {bid['item_name']}\n")
+
+    file.write("=" * 50 + "\n\n")
+
+
+def export_to_file(path, fmt=None):
+    """Save the report to a file, picking the format from its extension"""
+    if fmt is None:
+        extension = path.rsplit(".", 1)[-1].lower()
+        fmt = extension if extension in FORMATS else "text"
+
+    # newline="" stops the csv module doubling line endings on Windows
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        write_report(file, fmt)
@@ -51,15 +51,6 @@ START_Y = 100
 # Main loop
 running = True
 while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            # Switch to bid screen on click (for demo)
-            pygame.quit()
-            gui_bid_screen.bid_screen()
-            running = False
-
     # Fill background
     screen.fill(DARK_BG)
 
@@ -102,4 +93,14 @@ while running:
 
     pygame.display.flip()
 
+    # Nothing on this screen moves, so sleep until there's an event
+    event = pygame.event.wait()
+    if event.type == pygame.QUIT:
+        running = False
+    elif event.type == pygame.MOUSEBUTTONDOWN:
+        # Switch to bid screen on click (for demo)
+        pygame.quit()
+        gui_bid_screen.bid_screen()
+        running = False
+
 pygame.quit()
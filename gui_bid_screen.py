@@ -9,13 +9,13 @@ def bid_screen():
     font = pygame.font.Font(None, 36)
     running = True
     while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-
         screen.fill((30, 30, 50))
         text = font.render("This is the Bid Screen!", True, (255, 105, 180))
         screen.blit(text, (SCREEN_WIDTH // 2 - text.get_width() // 2, SCREEN_HEIGHT // 2 - 20))
         pygame.display.flip()
 
+        # Sleep until there's an event instead of spinning
+        if pygame.event.wait().type == pygame.QUIT:
+            running = False
+
     pygame.quit()
\ No newline at end of file
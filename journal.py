@@ -0,0 +1,388 @@
+"""
+Journal module - an append-only record of every bid, new item and reset,
+kept next to the database (auction.db.journal.jsonl).
+
+Each transaction writes its records to the journal just before it commits
+(see db.transaction), so the journal is never behind the database. The
+file is flushed on every commit and fsynced by a background thread at
+most FSYNC_SECONDS later (one fsync for every commit in between), so a
+bid doesn't wait for the disk - and an idle kiosk doesn't wake up at all.
+Every SNAPSHOT_EVERY records the items are saved to auction.db.snapshot.json
+along with where the journal was.
+
+After a crash, open_journal replays the journal since the last snapshot
+(read through mmap, so it's quick) and puts back anything SQLite lost.
+Resets don't lose anything any more either - the journal keeps every bid
+from before the reset.
+
+One record per line (amounts in pence, like the database):
+
+    {"type": "bid", "item_id": 1, "bidder": "Sam", "amount": 5500, "timestamp": ..., "accepted": true, "seq": 7}
+    {"type": "item", "item": {...}, "seq": 8}
+    {"type": "proxy", "item_id": 1, "bidder": "Sam", "max_amount": 8000, "seq": 9}
+    {"type": "schedule", "end_times": [[1, 1700000600.0], ...], "seq": 10}
+    {"type": "close", "item_id": 1, "timestamp": ..., "seq": 11}
+    {"type": "reset", "timestamp": ..., "seq": 12}
+    {"type": "reset_items", "timestamp": ..., "items": [...], "seq": 13}
+
+Journals from before amounts were in pence have snapshots without a
+"format" - their amounts are converted as they're read, and a new
+snapshot is taken straight away so the old records are never read again.
+"""
+import json
+import mmap
+import os
+import threading
+import time
+
+import db
+import money
+
+JOURNAL_SUFFIX = ".journal.jsonl"
+SNAPSHOT_SUFFIX = ".snapshot.json"
+FSYNC_SECONDS = 0.05     # most time between a commit and the journal being on disk
+SNAPSHOT_EVERY = 5000    # records between snapshots
+FORMAT = 2               # snapshot format: 2 = amounts in pence (1 = pounds)
+
+_decode = json.JSONDecoder().decode  # json.loads without its per-call checks
+
+
+class Journal:
+    """Appends records to the journal file for db.transaction"""
+
+    def __init__(self, path, snapshot_path):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.file = open(path, "a", encoding="utf-8")
+        self.since_snapshot = 0
+
+        self._local = threading.local()  # each thread's records waiting for its commit
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._pending = threading.Event()  # set by a commit, so the fsync thread sleeps until there's work
+        self._running = True
+        self._thread = threading.Thread(target=self._sync_loop, name="journal-fsync", daemon=True)
+        self._thread.start()
+
+    # ============ CALLED BY db.transaction ============
+    def write(self, records):
+        """Hold records until this thread's transaction commits"""
+        if not hasattr(self._local, "records"):
+            self._local.records = []
+        self._local.records.extend(records)
+
+    def mark(self):
+        """How many records this thread has waiting (see discard)"""
+        return len(getattr(self._local, "records", ()))
+
+    def discard(self, mark=0):
+        """Forget this thread's records after mark - all of them if its transaction rolled back"""
+        if hasattr(self._local, "records"):
+            del self._local.records[mark:]
+
+    def before_commit(self, conn):
+        """Append this thread's records - runs while we still hold the write lock"""
+        records = getattr(self._local, "records", None)
+        if not records:
+            return
+        self._local.records = []
+
+        lines = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+        with self._lock:
+            self.file.write(lines)
+            self.file.flush()  # in the OS now, so a crashed kiosk doesn't lose it
+            self._dirty = True
+            self.since_snapshot += len(records)
+        self._pending.set()
+
+        if self.since_snapshot >= SNAPSHOT_EVERY:
+            self.snapshot(conn)
+
+    # ============ SNAPSHOTS ============
+    def snapshot(self, conn):
+        """Save every item and how far the journal has got.
+
+        Call it inside a transaction so nobody adds to the journal meanwhile.
+        """
+        self.sync()  # never point the snapshot past what's on disk
+        snapshot = {
+            "format": FORMAT,
+            "seq": db.get_journal_seq(conn),
+            "offset": os.path.getsize(self.path),
+            "taken": time.time(),
+            "items": db.read_all_items(conn),
+        }
+
+        # Write a new file then swap it in, so a crash can't leave half a snapshot
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(snapshot, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        self.since_snapshot = 0
+
+    # ============ FSYNC ============
+    def sync(self):
+        """Make sure everything written so far is on disk"""
+        with self._lock:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self._dirty = False
+
+    def _sync_loop(self):
+        """Wait for a commit, then fsync at most FSYNC_SECONDS later"""
+        while True:
+            self._pending.wait()
+            self._pending.clear()  # before sleeping, so a commit or close() meanwhile wakes us again
+            if not self._running:
+                return
+            time.sleep(FSYNC_SECONDS)  # commits in the meantime share this fsync
+            if not self._running:
+                return  # close() syncs everything itself
+            if self._dirty:
+                self.sync()
+
+    def close(self):
+        """Save everything and close the file"""
+        self._running = False
+        self._pending.set()
+        self._thread.join()
+        self.sync()
+        self.file.close()
+
+
+# ============ READING ============
+def read_records(path, offset=0):
+    """Yield every record in a journal from a byte offset on.
+
+    The file is memory-mapped, so only the part after offset is read. A
+    half-written last line (from a crash) is skipped.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) <= offset:
+        return
+
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        start = offset
+        while True:
+            end = data.find(b"\n", start)
+            if end == -1:
+                break
+            try:
+                yield _decode(data[start:end].decode("utf-8"))
+            except ValueError:
+                break
+            start = end + 1
+
+
+def load_snapshot(path):
+    """Read a snapshot file (None if there isn't a usable one)"""
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def apply_record(items, record):
+    """Apply one record to a dict of items (id -> item)"""
+    kind = record["type"]
+    if kind == "bid":
+        item = items.get(record["item_id"])
+        if record["accepted"] and item is not None:
+            item["current_bid"] = record["amount"]
+            item["highest_bidder"] = record["bidder"]
+    elif kind == "item":
+        items[record["item"]["id"]] = dict(record["item"])
+    elif kind == "schedule":
+        for item_id, end_time in record["end_times"]:
+            if item_id in items:
+                items[item_id]["end_time"] = end_time
+                items[item_id]["closed"] = False
+    elif kind == "close":
+        if record["item_id"] in items:
+            items[record["item_id"]]["closed"] = True
+    elif kind == "reset":
+        for item in items.values():
+            item["current_bid"] = 0
+            item["highest_bidder"] = ""
+            item["end_time"] = None
+            item["closed"] = False
+    elif kind == "reset_items":
+        items.clear()
+        items.update((item["id"], dict(item)) for item in record["items"])
+
+
+def _upgrade_item(item):
+    """An item from a format 1 journal, with its amounts in pence"""
+    return dict(item, starting_price=money.to_pence(item["starting_price"]),
+                max_bid=money.to_pence(item["max_bid"]), current_bid=money.to_pence(item["current_bid"]))
+
+
+def _upgrade_record(record):
+    """A record from a format 1 journal, with its amounts in pence"""
+    kind = record["type"]
+    if kind == "bid":
+        record["amount"] = money.to_pence(record["amount"])
+    elif kind == "proxy":
+        record["max_amount"] = money.to_pence(record["max_amount"])
+    elif kind == "item":
+        record["item"] = _upgrade_item(record["item"])
+    elif kind == "reset_items":
+        record["items"] = [_upgrade_item(item) for item in record["items"]]
+    return record
+
+
+# ============ RECOVERY ============
+def _save_bids(conn, records):
+    """Put a run of bid records back into the database"""
+    accepted = [record for record in records if record["accepted"]]
+    bidder_ids = {name: db.intern_bidder(conn, name) for name in {record["bidder"] for record in accepted}}
+    conn.executemany("INSERT INTO bids (item_id, bidder_id, bid_amount, timestamp) VALUES (?, ?, ?, ?)",
+                     [(r["item_id"], bidder_ids[r["bidder"]], r["amount"], r["timestamp"]) for r in accepted])
+
+    # Only each item's last bid matters for the items table
+    latest = {record["item_id"]: record for record in accepted}
+    conn.executemany("UPDATE items SET current_bid = ?, highest_bidder_id = ? WHERE id = ?",
+                     [(r["amount"], bidder_ids[r["bidder"]], item_id) for item_id, r in latest.items()])
+
+
+def _save_record(conn, record):
+    """Put one (non-bid) journal record back into the database"""
+    kind = record["type"]
+    if kind == "item":
+        _save_item(conn, record["item"])
+    elif kind == "proxy":
+        conn.execute("""
+            INSERT INTO proxy_bids (item_id, bidder_id, max_amount) VALUES (?, ?, ?)
+            ON CONFLICT (item_id, bidder_id) DO UPDATE SET max_amount = excluded.max_amount
+        """, (record["item_id"], db.intern_bidder(conn, record["bidder"]), record["max_amount"]))
+    elif kind == "schedule":
+        conn.executemany("UPDATE items SET end_time = ?, closed = 0 WHERE id = ?",
+                         [(end_time, item_id) for item_id, end_time in record["end_times"]])
+    elif kind == "close":
+        conn.execute("UPDATE items SET closed = 1 WHERE id = ?", (record["item_id"],))
+        conn.execute("UPDATE results SET settled = ? WHERE item_id = ?", (record["timestamp"], record["item_id"]))
+    elif kind == "reset":
+        conn.execute("UPDATE items SET current_bid = 0, highest_bidder_id = NULL, end_time = NULL, closed = 0")
+        db.clear_bids(conn)
+    elif kind == "reset_items":
+        db.clear_bids(conn)
+        conn.execute("DELETE FROM items")
+        for item in record["items"]:
+            _save_item(conn, item)
+
+
+def _save_item(conn, item):
+    """Insert (or overwrite) an item, keeping its id (the journal has names, not bidder ids)"""
+    bidder_id = db.intern_bidder(conn, item["highest_bidder"]) if item["highest_bidder"] else None
+    conn.execute(f"INSERT OR REPLACE INTO items ({db.ITEM_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                 (item["id"], item["name"], item["description"], item["starting_price"],
+                  item["max_bid"], item["current_bid"], bidder_id,
+                  item.get("end_time"), item.get("closed", False)))
+
+
+def _item_state(item):
+    """The parts of an item that bids and closes change"""
+    return (item["current_bid"], item["highest_bidder"], item.get("end_time"), item.get("closed", False))
+
+
+def recover(journal_path, snapshot_path):
+    """Rebuild the items from the snapshot and journal, and repair the database.
+
+    Records the database hasn't got (it crashed after the journal was
+    written) are saved again, then any item that still disagrees with the
+    journal is set to what the journal says. Without a snapshot the whole
+    journal is read. Returns a summary ("stale" means there's no up to
+    date snapshot to start the next recovery from).
+    """
+    started = time.perf_counter()
+    snapshot = load_snapshot(snapshot_path)
+    summary = {"replayed": 0, "restored": 0, "fixed": 0, "seconds": 0.0,
+               "stale": snapshot is None or snapshot.get("format", 1) != FORMAT}
+
+    with db.transaction() as conn:
+        db_seq = db.get_journal_seq(conn)
+        if snapshot is None:
+            # No snapshot yet (a crash before the first one) - replay the
+            # whole journal on top of what the database has
+            snapshot = {"format": FORMAT, "seq": db_seq, "offset": 0, "items": db.read_all_items(conn)}
+        old_format = snapshot.get("format", 1) != FORMAT
+
+        # Read from the snapshot on - unless the database is even further behind
+        offset = snapshot["offset"] if db_seq >= snapshot["seq"] else 0
+        items = {item["id"]: item for item in snapshot["items"]}
+        records = read_records(journal_path, offset)
+        if old_format:
+            # Written before amounts were in pence
+            items = {item_id: _upgrade_item(item) for item_id, item in items.items()}
+            records = map(_upgrade_record, records)
+        last_seq = db_seq
+
+        bids = []  # bids waiting to be saved together
+        for record in records:
+            if record["seq"] > snapshot["seq"]:
+                apply_record(items, record)
+                summary["replayed"] += 1
+            if record["seq"] <= db_seq:
+                continue
+
+            if record["type"] == "bid":
+                bids.append(record)
+            else:
+                _save_bids(conn, bids)
+                bids = []
+                _save_record(conn, record)
+            summary["restored"] += 1
+            last_seq = record["seq"]
+        _save_bids(conn, bids)
+
+        if last_seq > db_seq:
+            db.set_journal_seq(conn, last_seq)
+
+        # Anything still different? The journal wins.
+        for item in db.read_all_items(conn):
+            expected = items.get(item["id"])
+            if expected is not None and _item_state(item) != _item_state(expected):
+                _save_item(conn, expected)
+                summary["fixed"] += 1
+            items.pop(item["id"], None)
+
+        # Items the database lost completely
+        for item in items.values():
+            _save_item(conn, item)
+            summary["fixed"] += 1
+
+    summary["seconds"] = time.perf_counter() - started
+    return summary
+
+
+def open_journal(database_file=None):
+    """Recover from the journal, then journal every change from now on.
+
+    Call it after db.init. Returns the Journal (close it when you're done).
+    """
+    database_file = database_file or db.DATABASE_FILE
+    journal_path = database_file + JOURNAL_SUFFIX
+    snapshot_path = database_file + SNAPSHOT_SUFFIX
+
+    summary = recover(journal_path, snapshot_path)
+    if summary["restored"] or summary["fixed"]:
+        print(f"📒 Journal: restored {summary['restored']} record(s) and fixed {summary['fixed']} item(s) "
+              f"in {summary['seconds'] * 1000:.0f} ms")
+
+    journal = Journal(journal_path, snapshot_path)
+    db.journal = journal
+
+    # Start every journal with a snapshot to replay from
+    if summary["stale"]:
+        with db.transaction() as conn:
+            journal.snapshot(conn)
+    return journal
+
+
+def close_journal():
+    """Stop journalling and close the file"""
+    journal, db.journal = db.journal, None
+    if journal is not None:
+        journal.close()
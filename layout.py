@@ -0,0 +1,102 @@
+"""
+Layout module - where everything sits on each screen.
+
+Drawing and click handling both read these rectangles, so a click no
+longer needs the screen drawn first just to find the buttons. A layout
+only depends on a couple of numbers (like the scroll position), so each
+one is worked out once and cached - don't change the rectangles you get.
+"""
+from functools import lru_cache
+
+import pygame
+
+import ui
+
+
+def input_area(rect):
+    """Area covered by an input box plus the label drawn above it"""
+    return pygame.Rect(rect.x, rect.y - 20, rect.width, rect.height + 20)
+
+
+def message_area(y):
+    """Area the message line can cover (it's centered, so use the full width)"""
+    return pygame.Rect(0, y - 5, ui.SCREEN_WIDTH, 35)
+
+
+# ============ SCREENS ============
+@lru_cache(maxsize=32)
+def items_screen(scroll_y, num_items):
+    """Rectangles on the items grid screen"""
+    add_x, add_y = ui.get_card_position(num_items, scroll_y)
+    timer_x = ui.SCREEN_WIDTH - 150
+
+    return {
+        "timer": pygame.Rect(timer_x, 20, ui.SCREEN_WIDTH - timer_x, 40),
+        "add": pygame.Rect(add_x, add_y, ui.CARD_WIDTH, ui.CARD_HEIGHT),
+        "bottom_bar": pygame.Rect(0, ui.SCREEN_HEIGHT - 70, ui.SCREEN_WIDTH, 70),
+        "reset": pygame.Rect(ui.SCREEN_WIDTH // 2 - 160, ui.SCREEN_HEIGHT - 60, 100, 40),
+        "end": pygame.Rect(ui.SCREEN_WIDTH // 2 - 40, ui.SCREEN_HEIGHT - 60, 140, 40),
+    }
+
+
+@lru_cache(maxsize=1)
+def detail_screen():
+    """Rectangles on the item detail / bidding screen"""
+    timer_x = ui.SCREEN_WIDTH - 120
+
+    return {
+        "back": pygame.Rect(20, 20, 80, 35),
+        "timer": pygame.Rect(timer_x, 25, ui.SCREEN_WIDTH - timer_x, 40),
+        "info": pygame.Rect(50, 140, 350, 200),
+        "form": pygame.Rect(430, 140, 320, 200),
+        "inputs": {
+            "name": pygame.Rect(450, 210, 280, 35),
+            "bid": pygame.Rect(450, 280, 280, 35),
+        },
+        "bid": pygame.Rect(250, 380, 300, 50),
+        "auto": pygame.Rect(570, 380, 160, 50),
+        "message": message_area(450),
+    }
+
+
+@lru_cache(maxsize=1)
+def add_item_screen():
+    """Rectangles on the add item screen"""
+    return {
+        "back": pygame.Rect(20, 20, 80, 35),
+        "inputs": {
+            "item_name": pygame.Rect(200, 180, 400, 35),
+            "item_desc": pygame.Rect(200, 260, 400, 35),
+            "item_price": pygame.Rect(200, 340, 180, 35),
+            "item_max": pygame.Rect(420, 340, 180, 35),
+        },
+        "add": pygame.Rect(300, 420, 200, 50),
+        "message": message_area(490),
+    }
+
+
+@lru_cache(maxsize=1)
+def results_screen():
+    """Rectangles on the results screen"""
+    return {
+        "rows": pygame.Rect(0, 70, ui.SCREEN_WIDTH, ui.SCREEN_HEIGHT - 150),
+        "bottom_bar": pygame.Rect(0, ui.SCREEN_HEIGHT - 80, ui.SCREEN_WIDTH, 80),
+        "close": pygame.Rect(ui.SCREEN_WIDTH // 2 - 60, ui.SCREEN_HEIGHT - 70, 120, 45),
+    }
+
+
+def clear_cache():
+    """Forget every cached layout (call this after ui.set_screen_size)"""
+    items_screen.cache_clear()
+    detail_screen.cache_clear()
+    add_item_screen.cache_clear()
+    results_screen.cache_clear()
+
+
+# ============ HIT TESTING ============
+def input_at(pos, input_rects):
+    """Find which input box (by name) is under pos, or None"""
+    for name, rect in input_rects.items():
+        if rect.collidepoint(pos):
+            return name
+    return None
@@ -6,475 +6,856 @@ Files:
 - main.py (this file) - the main game loop
 - db.py - database functions (SQLite)
 - ui.py - UI helper functions
+- layout.py - button and box positions for each screen
+- writer.py - saves bids in the background
+- export.py - results reports (text, CSV, JSONL)
+- analytics.py - bid statistics for tuning prices (needs NumPy)
+- recorder.py - records a session's events for replay.py
+- replay.py - plays a recording back as a benchmark
+- bench.py - load test for the bid path
+- server.py / client.py - one auction server shared by many kiosks
+- changes.py - tells screens which items changed
+- journal.py - append-only record of every change, for crash recovery
+- proxy.py - automatic bids ("bid for me up to...")
+- money.py - amounts in pence, and reading and writing them in pounds
+- scheduler.py - closes each item when its time is up
+
+Run it with `python main.py` (see `python main.py --help` for options),
+or create an AuctionApp yourself to drive it from a script.
 """
-import pygame
+import argparse
+import collections
+import os
+import threading
 import time
+from dataclasses import dataclass
+
+import pygame
+
 import db  # Our database module
+import journal
+import money
+import proxy
 import ui  # Our UI module
+import layout  # Where things are on each screen
+from changes import ChangeFeed
+from client import RemoteDB
+from recorder import EventRecorder
+from scheduler import CloseScheduler
+from writer import Writer
+
+
+# ============ SETTINGS ============
+@dataclass
+class AppConfig:
+    """Everything you might want to change when starting the app"""
+    database_file: str = "auction.db"
+    auction_duration: int = 600      # seconds (change to 60 for testing)
+    close_stagger: float = 0         # seconds between one item closing and the next (0 = all together)
+    screen_width: int = ui.SCREEN_WIDTH
+    screen_height: int = ui.SCREEN_HEIGHT
+    headless: bool = False           # no window (SDL dummy driver) - for tests and benchmarks
+    record_file: str = None          # save every click and key press here (see recorder.py)
+    server: str = None               # "host:port" of an auction server (server.py) to use instead of database_file
+    journal: bool = True             # keep a journal next to database_file (see journal.py)
+    bid_increment: int = proxy.BID_INCREMENT  # pence automatic bids go above the bid they beat (None = money.BID_INCREMENTS)
+    max_fps: int = 60                # fastest we redraw (e.g. while scrolling)
+
+
+# Our own events - the loop sleeps until one of these (or input) arrives
+TIMER_TICK = pygame.USEREVENT + 1    # once a second, for the countdown
+ITEM_CLOSING = pygame.USEREVENT + 2  # the next item's time is up
+DB_CHANGED = pygame.USEREVENT + 3    # something changed, here or on another kiosk
+
+IDLE_TIMEOUT_MS = 1000  # wake up at least this often, just in case
+
+
+def post_event(event_type):
+    """Wake up the main loop from another thread"""
+    try:
+        pygame.event.post(pygame.event.Event(event_type))
+    except pygame.error:
+        pass  # pygame has already shut down
+
+
+class AuctionApp:
+    """The whole auction: window, game state and main loop"""
+
+    def __init__(self, config=None, clock=time.time):
+        self.config = config or AppConfig()
+        self.now = clock  # where the countdown gets the time (replay.py uses a fake one)
+
+        # ============ GAME SETUP ============
+        if self.config.headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+        ui.set_screen_size(self.config.screen_width, self.config.screen_height)
+        proxy.BID_INCREMENT = self.config.bid_increment
+        layout.clear_cache()
+
+        pygame.init()
+        self.screen = pygame.display.set_mode((ui.SCREEN_WIDTH, ui.SCREEN_HEIGHT))
+        pygame.display.set_caption("Group 2 - Auction Zone")
+        self.fonts = ui.init_fonts()
+        self.clock = pygame.time.Clock()
+
+        # Either our own database file, or a server shared with other kiosks.
+        # self.db has db.py's read functions and self.writer saves changes.
+        # Both tell on_changes what changed (the server, or a ChangeFeed).
+        self.changes = collections.deque()
+        self.journal = None
+        db.clock = self.now  # item end times are on our clock
+        if self.config.server:
+            self.feed = None
+            self.scheduler = None  # the server closes items
+            self.db = RemoteDB(self.config.server, on_change=self.on_changes)
+            self.writer = self.db
+        else:
+            db.init(self.config.database_file)
+            if self.config.journal:
+                self.journal = journal.open_journal(self.config.database_file)
+            # Items keep their end times (another kiosk may have set them already),
+            # unless the auction has finished - then it starts again
+            db.open_auction(self.config.auction_duration, self.config.close_stagger)
+            self.db = db
+            self.writer = Writer()  # saves bids without freezing the screen
+            self.scheduler = CloseScheduler(self.writer.submit_alone, self.now)
+            self.feed = ChangeFeed()
+            self.feed.subscribe(self.on_changes)
+
+        # Game state variables
+        self.current_screen = "items"  # "items", "detail", "add_item", "results"
+        self.selected_item = None
+        self.scroll_y = 0
+        self.running = True
+        self.results_printed = False  # Flag to only print results once
+
+        # Timers
+        pygame.time.set_timer(TIMER_TICK, 1000)
+        self.schedule_next_close()
+
+        # Input fields
+        self.inputs = {
+            "name": "",
+            "bid": "",
+            "item_name": "",
+            "item_desc": "",
+            "item_price": "",
+            "item_max": "",
+            "active": None  # which input is selected
+        }
+        self.message = ""
+
+        # Bids still being saved: item id -> (future, bid amount, automatic?)
+        self.pending_bids = {}
+
+        # What each part of the screen showed when it was last drawn
+        self.last_drawn = {}
+        self.needs_full_redraw = True
+
+        # Event recording for replay.py
+        self.recorder = None
+        if self.config.record_file:
+            self.recorder = EventRecorder(self.config.record_file, self.config, self.now)
+
+    # ============ HELPER FUNCTIONS ============
+    def get_time_remaining(self, item=None):
+        """Calculate time left in the auction (or on one item)"""
+        end_time = item["end_time"] if item is not None else self.db.get_auction_end()
+        if end_time is None:
+            remaining = self.config.auction_duration  # not started yet
+        else:
+            remaining = max(0, end_time - self.now())
+        minutes = int(remaining // 60)
+        seconds = int(remaining % 60)
+        return minutes, seconds, remaining
+
+    def handle_scroll(self, direction):
+        """Handle scrolling on items screen"""
+        num_items = self.db.item_count() + 1  # +1 for add button
+        rows = (num_items + ui.COLS - 1) // ui.COLS
+        total_height = ui.START_Y + rows * (ui.CARD_HEIGHT + ui.MARGIN_Y) + 80
+        max_scroll = max(0, total_height - ui.SCREEN_HEIGHT + 100)
+    
+        self.scroll_y += direction * 40
+        self.scroll_y = max(-max_scroll, min(0, self.scroll_y))
+
+    def schedule_next_close(self):
+        """Set the ITEM_CLOSING timer for the next item to close"""
+        if self.scheduler:
+            next_close = self.scheduler.next_close()
+        else:
+            next_close = self.db.get_auction_end()  # the server closes items - just wake up at the end
 
-
-# ============ GAME SETUP ============
-pygame.init()
-screen = pygame.display.set_mode((ui.SCREEN_WIDTH, ui.SCREEN_HEIGHT))
-pygame.display.set_caption("Group 2 - Auction Zone")
-fonts = ui.init_fonts()
-clock = pygame.time.Clock()
-
-# Game state variables
-current_screen = "items"  # "items", "detail", "add_item", "results"
-selected_item = None
-scroll_y = 0
-running = True
-results_printed = False  # Flag to only print results once
-
-# Timer (10 minutes)
-AUCTION_DURATION = 600  # seconds (change to 60 for testing)
-start_time = time.time()
-
-# Input fields
-inputs = {
-    "name": "",
-    "bid": "",
-    "item_name": "",
-    "item_desc": "",
-    "item_price": "",
-    "item_max": "",
-    "active": None  # which input is selected
-}
-message = ""
-
-
-# ============ HELPER FUNCTIONS ============
-def get_time_remaining():
-    """Calculate time left in the auction"""
-    elapsed = time.time() - start_time
-    remaining = max(0, AUCTION_DURATION - elapsed)
-    minutes = int(remaining // 60)
-    seconds = int(remaining % 60)
-    return minutes, seconds, remaining
-
-
-def handle_scroll(direction):
-    """Handle scrolling on items screen"""
-    global scroll_y
-    items = db.get_all_items()
-    num_items = len(items) + 1  # +1 for add button
-    rows = (num_items + ui.COLS - 1) // ui.COLS
-    total_height = ui.START_Y + rows * (ui.CARD_HEIGHT + ui.MARGIN_Y) + 80
-    max_scroll = max(0, total_height - ui.SCREEN_HEIGHT + 100)
-    
-    scroll_y += direction * 40
-    scroll_y = max(-max_scroll, min(0, scroll_y))
-
-
-def clear_inputs():
-    """Clear all input fields"""
-    inputs["name"] = ""
-    inputs["bid"] = ""
-    inputs["item_name"] = ""
-    inputs["item_desc"] = ""
-    inputs["item_price"] = ""
-    inputs["item_max"] = ""
-    inputs["active"] = None
-
-
-# ============ SCREEN DRAWING FUNCTIONS ============
-def draw_items_screen():
-    """Draw the main items grid screen"""
-    minutes, seconds, remaining = get_time_remaining()
-    
-    screen.fill(ui.DARK_BG)
-    
-    # Header
-    title = fonts['title'].render("Auction Zone", True, ui.PINK)
-    screen.blit(title, (30, 20))
-    ui.draw_timer(screen, fonts, minutes, seconds, remaining, ui.SCREEN_WIDTH - 150, 20)
-    
-    # Get items from database
-    items = db.get_all_items()
-    
-    # Scroll hint
-    if len(items) > 6:
-        hint = fonts['small'].render("Scroll to see more items", True, ui.LIGHT_GRAY)
-        screen.blit(hint, (ui.SCREEN_WIDTH // 2 - hint.get_width() // 2, 65))
-    
-    # Draw item cards
-    card_rects = []
-    for i, item in enumerate(items):
-        x, y = ui.get_card_position(i, scroll_y)
-        if ui.is_visible(y):
-            rect = ui.draw_item_card(screen, fonts, item, x, y)
-            card_rects.append((rect, item))
+        if next_close is None:
+            pygame.time.set_timer(ITEM_CLOSING, 0)
         else:
-            card_rects.append((pygame.Rect(x, y, ui.CARD_WIDTH, ui.CARD_HEIGHT), item))
-    
-    # Draw add button
-    add_x, add_y = ui.get_card_position(len(items), scroll_y)
-    add_rect = None
-    if ui.is_visible(add_y):
-        add_rect = ui.draw_add_card(screen, fonts, add_x, add_y)
-    else:
-        add_rect = pygame.Rect(add_x, add_y, ui.CARD_WIDTH, ui.CARD_HEIGHT)
-    
-    # Bottom bar with Reset and End Auction buttons
-    pygame.draw.rect(screen, ui.DARK_BG, (0, ui.SCREEN_HEIGHT - 70, ui.SCREEN_WIDTH, 70))
-    reset_btn = ui.draw_button(screen, fonts, "Reset", 
-                                ui.SCREEN_WIDTH // 2 - 160, ui.SCREEN_HEIGHT - 60, 
-                                100, 40, ui.PURPLE)
-    end_btn = ui.draw_button(screen, fonts, "End Auction", 
-                              ui.SCREEN_WIDTH // 2 - 40, ui.SCREEN_HEIGHT - 60, 
-                              140, 40, ui.RED)
+            delay = max(0, next_close - self.now())
+            pygame.time.set_timer(ITEM_CLOSING, max(1, int(delay * 1000) + 1), loops=1)
+
+    def close_due_items(self):
+        """Close any items whose time is up, then wait for the next one"""
+        if self.scheduler:
+            self.scheduler.run_due()
+        self.schedule_next_close()
+        self.check_auction_over()
+
+    def check_auction_over(self):
+        """Switch to the results screen once every item has closed"""
+        _, _, remaining = self.get_time_remaining()
+        if remaining <= 0 and self.current_screen != "results":
+            self.current_screen = "results"
+            if not self.results_printed:
+                self.print_results_in_background()
+                self.results_printed = True
+
+    def on_changes(self, changes):
+        """Queue changes for the main loop (called from the feed's thread)"""
+        self.changes.extend(changes)
+        post_event(DB_CHANGED)
+
+    def apply_changes(self):
+        """Keep the item on the detail screen (and the close times) up to date with everyone's bids"""
+        if self.scheduler and self.changes:
+            self.scheduler.on_changes(list(self.changes))
+        if self.changes:
+            self.schedule_next_close()  # a late bid may have moved it
+
+        while self.changes:
+            change = self.changes.popleft()
+            if self.selected_item is None:
+                continue
+
+            if change["kind"] == "item" and change["item_id"] == self.selected_item["id"]:
+                self.selected_item = change["item"]
+            elif change["kind"] == "reload" or (change["kind"] == "delete" and change["item_id"] == self.selected_item["id"]):
+                self.selected_item = self.db.get_item(self.selected_item["id"])
+
+            # The item was deleted (e.g. the database was reset)
+            if self.selected_item is None and self.current_screen == "detail":
+                self.current_screen = "items"
+
+    def check_pending_bids(self):
+        """Show the result of any bids the writer has finished saving"""
+        for item_id, (future, bid_amount, automatic) in list(self.pending_bids.items()):
+            if not future.done():
+                continue
+            del self.pending_bids[item_id]
+
+            # Only the detail screen for this item shows the outcome
+            if self.current_screen != "detail" or self.selected_item["id"] != item_id:
+                continue
+
+            try:
+                accepted, item = future.result()
+            except Exception:
+                self.message = "Could not save your bid - please try again!"
+                continue
+
+            if item is None:
+                self.message = "This item no longer exists!"
+                continue
+            self.selected_item = item
+
+            if accepted:
+                bidder = self.inputs["name"]
+                self.inputs["name"] = ""
+                self.inputs["bid"] = ""
+                if item["highest_bidder"] != bidder:
+                    # Someone's automatic bid answered straight away
+                    self.message = "Outbid by an automatic bid - try higher!"
+                elif automatic:
+                    self.message = f"Success! Auto-bid set - you're winning at {money.format_money(item['current_bid'])}"
+                else:
+                    self.message = "Success! Your bid has been placed!"
+            else:
+                min_bid = item["current_bid"] if item["current_bid"] > 0 else item["starting_price"]
+                if not db.is_open(item):
+                    self.message = "Sorry - bidding on this item has closed!"
+                elif bid_amount <= min_bid:
+                    self.message = f"Bid must be higher than {money.format_money(min_bid)}!"
+                else:
+                    self.message = f"Bid cannot exceed {money.format_money(item['max_bid'])}!"
+
+    def get_visible_items(self):
+        """Fetch only the items whose cards are on screen, as (index, item) pairs"""
+        num_items = self.db.item_count()
+        start, stop = ui.visible_index_range(self.scroll_y, num_items + 1)  # +1 for the add card
+        stop = min(stop, num_items)
+        if start >= stop:
+            return []
+    
+        after_id = self.db.get_item_ids()[start - 1] if start > 0 else 0
+        return list(enumerate(self.db.get_items_page(after_id, stop - start), start))
+
+    def print_results_in_background(self):
+        """Print the results on another thread so the screen doesn't freeze"""
+        def run():
+            self.writer.flush()  # make sure every bid is in the results
+            self.db.print_results()
+            self.db.close_connection()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def clear_inputs(self):
+        """Clear all input fields"""
+        self.inputs["name"] = ""
+        self.inputs["bid"] = ""
+        self.inputs["item_name"] = ""
+        self.inputs["item_desc"] = ""
+        self.inputs["item_price"] = ""
+        self.inputs["item_max"] = ""
+        self.inputs["active"] = None
+
+    # ============ SCREEN DRAWING FUNCTIONS ============
+    def draw_items_screen(self):
+        """Draw the main items grid screen"""
+        minutes, seconds, remaining = self.get_time_remaining()
+        num_items = self.db.item_count()
+        rects = layout.items_screen(self.scroll_y, num_items)
+    
+        self.screen.fill(ui.DARK_BG)
+    
+        # Header
+        title = ui.render_text(self.fonts, 'title', "Auction Zone", ui.PINK)
+        self.screen.blit(title, (30, 20))
+        ui.draw_timer(self.screen, self.fonts, minutes, seconds, remaining, rects["timer"].x, rects["timer"].y)
+    
+        # Scroll hint
+        if num_items > 6:
+            hint = ui.render_text(self.fonts, 'small', "Scroll to see more items", ui.LIGHT_GRAY)
+            self.screen.blit(hint, (ui.SCREEN_WIDTH // 2 - hint.get_width() // 2, 65))
+    
+        # Draw item cards (only the ones on screen)
+        for i, item in self.get_visible_items():
+            x, y = ui.get_card_position(i, self.scroll_y)
+            ui.draw_item_card(self.screen, self.fonts, item, x, y, item["id"] in self.pending_bids)
+    
+        # Draw add button
+        if ui.is_visible(rects["add"].y):
+            ui.draw_add_card(self.screen, self.fonts, rects["add"].x, rects["add"].y)
+    
+        # Bottom bar with Reset and End Auction buttons
+        pygame.draw.rect(self.screen, ui.DARK_BG, rects["bottom_bar"])
+        ui.draw_button(self.screen, self.fonts, "Reset", *rects["reset"], ui.PURPLE)
+        ui.draw_button(self.screen, self.fonts, "End Auction", *rects["end"], ui.RED)
+
+    def draw_detail_screen(self):
+        """Draw the item detail/bidding screen"""
+        minutes, seconds, remaining = self.get_time_remaining(self.selected_item)
+        rects = layout.detail_screen()
+    
+        self.screen.fill(ui.DARK_BG)
+    
+        # Back button and timer
+        ui.draw_button(self.screen, self.fonts, "< Back", *rects["back"], ui.DARK_GRAY)
+        ui.draw_timer(self.screen, self.fonts, minutes, seconds, remaining, rects["timer"].x, rects["timer"].y)
+    
+        # Title
+        ui.draw_title(self.screen, self.fonts, "Item Information", 80)
+    
+        # Item details box
+        pygame.draw.rect(self.screen, ui.INPUT_BG, rects["info"], border_radius=10)
+        pygame.draw.rect(self.screen, ui.PURPLE, rects["info"], 2, border_radius=10)
+    
+        # Item info
+        current_price = self.selected_item['current_bid'] if self.selected_item['current_bid'] > 0 else self.selected_item['starting_price']
+    
+        info_lines = [
+            (f"Item: {self.selected_item['name']}", ui.WHITE),
+            (f"Current Price: {money.format_money(current_price)}", ui.GREEN),
+            (f"Original Price: {money.format_money(self.selected_item['starting_price'])}", ui.LIGHT_GRAY),
+            (f"Bid Limit: {money.format_money(self.selected_item['max_bid'])}", ui.RED),
+        ]
+    
+        for i, (text, color) in enumerate(info_lines):
+            label = ui.render_text(self.fonts, 'normal', text, color)
+            self.screen.blit(label, (70, 160 + i * 40))
+    
+        if self.selected_item['highest_bidder']:
+            bidder = ui.render_text(self.fonts, 'small', f"Highest Bidder: {self.selected_item['highest_bidder']}", ui.GREEN)
+            self.screen.blit(bidder, (70, 315))
+    
+        # Input form box
+        pygame.draw.rect(self.screen, ui.INPUT_BG, rects["form"], border_radius=10)
+        pygame.draw.rect(self.screen, ui.PURPLE, rects["form"], 2, border_radius=10)
+    
+        title = ui.render_text(self.fonts, 'normal', "Enter Your Details", ui.WHITE)
+        self.screen.blit(title, (480, 155))
+    
+        # Input fields
+        labels = {"name": "Name:", "bid": f"Bid Price: {ui.CURRENCY}"}
+        for key, rect in rects["inputs"].items():
+            ui.draw_input_box(self.screen, self.fonts, labels[key], self.inputs[key],
+                              rect.x, rect.y, rect.width, self.inputs["active"] == key)
+    
+        # BID button, and AUTO BID (bid for me up to this much)
+        ui.draw_button(self.screen, self.fonts, "BID", *rects["bid"], ui.GREEN, ui.BLACK)
+        ui.draw_button(self.screen, self.fonts, "AUTO BID", *rects["auto"], ui.PURPLE)
+    
+        # Message
+        if self.message:
+            if self.selected_item["id"] in self.pending_bids:
+                color = ui.PINK
+            else:
+                color = ui.GREEN if "Success" in self.message else ui.RED
+            msg = ui.render_text(self.fonts, 'normal', self.message, color)
+            self.screen.blit(msg, (ui.SCREEN_WIDTH // 2 - msg.get_width() // 2, rects["message"].y + 5))
+
+    def draw_add_item_screen(self):
+        """Draw the add new item screen"""
+        rects = layout.add_item_screen()
+    
+        self.screen.fill(ui.DARK_BG)
+    
+        # Back button
+        ui.draw_button(self.screen, self.fonts, "< Back", *rects["back"], ui.DARK_GRAY)
+    
+        # Title
+        ui.draw_title(self.screen, self.fonts, "Add New Item", 80)
+    
+        # Input fields
+        labels = {
+            "item_name": "Item Name:",
+            "item_desc": "Description:",
+            "item_price": f"Starting Price: {ui.CURRENCY}",
+            "item_max": f"Max Bid: {ui.CURRENCY}",
+        }
+        for key, rect in rects["inputs"].items():
+            ui.draw_input_box(self.screen, self.fonts, labels[key], self.inputs[key],
+                              rect.x, rect.y, rect.width, self.inputs["active"] == key)
+    
+        # Add button
+        ui.draw_button(self.screen, self.fonts, "Add Item", *rects["add"], ui.GREEN, ui.BLACK)
+    
+        # Message
+        if self.message:
+            msg = ui.render_text(self.fonts, 'normal', self.message, ui.RED)
+            self.screen.blit(msg, (ui.SCREEN_WIDTH // 2 - msg.get_width() // 2, rects["message"].y + 5))
+
+    def draw_results_screen(self):
+        """Draw the auction results screen"""
+        rects = layout.results_screen()
+    
+        self.screen.fill(ui.DARK_BG)
+    
+        # Title
+        ui.draw_title(self.screen, self.fonts, "Auction Results!", 30)
+    
+        # Get final results (the same ones print_results reports)
+        results = self.db.get_results()
+    
+        # Draw results
+        y = 100 + self.scroll_y
+        for result in results:
+            if y + 50 > 70 and y < ui.SCREEN_HEIGHT - 80:
+                ui.draw_result_row(self.screen, self.fonts, result, y)
+        
+            y += 60
+    
+        # Close button
+        pygame.draw.rect(self.screen, ui.DARK_BG, rects["bottom_bar"])
+        ui.draw_button(self.screen, self.fonts, "Close", *rects["close"], ui.RED)
+
+    def draw_current_screen(self):
+        """Draw whichever screen is showing"""
+        if self.current_screen == "items":
+            self.draw_items_screen()
+        elif self.current_screen == "detail":
+            self.draw_detail_screen()
+        elif self.current_screen == "add_item":
+            self.draw_add_item_screen()
+        elif self.current_screen == "results":
+            self.draw_results_screen()
+
+    # ============ DIRTY REGIONS ============
+    def get_screen_regions(self):
+        """Describe the parts of the current screen that can change on their own.
+
+        Returns (screen_key, regions). If screen_key changes the whole screen is
+        redrawn. regions maps a name to (what it shows, where it is).
+        """
+        timer_item = self.selected_item if self.current_screen == "detail" else None
+        minutes, seconds, remaining = self.get_time_remaining(timer_item)
+        timer_state = (minutes, seconds, remaining < 60)
+        regions = {}
+    
+        if self.current_screen == "items":
+            num_items = self.db.item_count()
+            screen_key = ("items", self.scroll_y, num_items)
+            regions["timer"] = (timer_state, layout.items_screen(self.scroll_y, num_items)["timer"])
+            for i, item in self.get_visible_items():
+                x, y = ui.get_card_position(i, self.scroll_y)
+                state = (item["id"], item["current_bid"], item["highest_bidder"], item["closed"],
+                         item["id"] in self.pending_bids)
+                regions[("card", i)] = (state, pygame.Rect(x, y, ui.CARD_WIDTH, ui.CARD_HEIGHT))
+    
+        elif self.current_screen == "detail":
+            rects = layout.detail_screen()
+            screen_key = ("detail", self.selected_item["id"])
+            regions["timer"] = (timer_state, rects["timer"])
+            regions["info"] = (tuple(self.selected_item.values()), rects["info"])
+            for key, rect in rects["inputs"].items():
+                regions[key] = ((self.inputs[key], self.inputs["active"] == key), layout.input_area(rect))
+            pending = self.selected_item["id"] in self.pending_bids
+            regions["message"] = ((self.message, pending), rects["message"])
+    
+        elif self.current_screen == "add_item":
+            rects = layout.add_item_screen()
+            screen_key = ("add_item",)
+            for key, rect in rects["inputs"].items():
+                regions[key] = ((self.inputs[key], self.inputs["active"] == key), layout.input_area(rect))
+            regions["message"] = (self.message, rects["message"])
     
-    return card_rects, add_rect, reset_btn, end_btn
-
-
-def draw_detail_screen():
-    """Draw the item detail/bidding screen"""
-    global message
-    minutes, seconds, remaining = get_time_remaining()
+        else:
+            # Results rows are redrawn whenever any result changes
+            results = self.db.get_results()
+            screen_key = ("results", self.scroll_y, len(results))
+            rows = tuple((result["amount"], result["bidder"]) for result in results)
+            regions["rows"] = (rows, layout.results_screen()["rows"])
+    
+        return screen_key, regions
+
+    def find_dirty_rects(self):
+        """Work out what changed since the last frame.
+
+        Returns None if the whole screen needs drawing, otherwise a (maybe
+        empty) list of rectangles to redraw.
+        """
+        screen_key, regions = self.get_screen_regions()
+    
+        if self.needs_full_redraw or self.last_drawn.get("screen") != screen_key:
+            self.needs_full_redraw = False
+            self.last_drawn = {name: state for name, (state, _) in regions.items()}
+            self.last_drawn["screen"] = screen_key
+            return None
+    
+        dirty = []
+        for name, (state, rect) in regions.items():
+            if self.last_drawn.get(name) != state:
+                self.last_drawn[name] = state
+                dirty.append(rect)
+        return dirty
+
+    # ============ EVENT HANDLERS ============
+    def handle_click(self, mouse_pos):
+        """Send a click to the current screen's handler"""
+    
+        if self.current_screen == "items":
+            self.handle_items_click(mouse_pos)
+        elif self.current_screen == "detail":
+            self.handle_detail_click(mouse_pos)
+        elif self.current_screen == "add_item":
+            self.handle_add_item_click(mouse_pos)
+        elif self.current_screen == "results":
+            if layout.results_screen()["close"].collidepoint(mouse_pos):
+                self.running = False
+
+    def handle_items_click(self, mouse_pos):
+        """Handle clicks on the items screen"""
+        num_items = self.db.item_count()
+        rects = layout.items_screen(self.scroll_y, num_items)
+    
+        # Check reset button FIRST
+        if rects["reset"].collidepoint(mouse_pos):
+            # Every item gets a fresh end time (the close timer follows the change feed)
+            self.writer.reset_auction(self.config.auction_duration, self.config.close_stagger)
+            self.results_printed = False   # Allow printing results again
+            print("\n🔄 Auction Reset! Timer restarted.\n")
+            return
     
-    screen.fill(ui.DARK_BG)
+        # Check end button
+        if rects["end"].collidepoint(mouse_pos):
+            self.current_screen = "results"
+            if not self.results_printed:
+                self.print_results_in_background()
+                self.results_printed = True
+            return
     
-    # Back button and timer
-    back_btn = ui.draw_button(screen, fonts, "< Back", 20, 20, 80, 35, ui.DARK_GRAY)
-    ui.draw_timer(screen, fonts, minutes, seconds, remaining, ui.SCREEN_WIDTH - 120, 25)
-    
-    # Title
-    ui.draw_title(screen, fonts, "Item Information", 80)
-    
-    # Item details box
-    detail_box = pygame.Rect(50, 140, 350, 200)
-    pygame.draw.rect(screen, ui.INPUT_BG, detail_box, border_radius=10)
-    pygame.draw.rect(screen, ui.PURPLE, detail_box, 2, border_radius=10)
-    
-    # Item info
-    current_price = selected_item['current_bid'] if selected_item['current_bid'] > 0 else selected_item['starting_price']
-    
-    info_lines = [
-        (f"Item: {selected_item['name']}", ui.WHITE),
-        (f"Current Price: {ui.CURRENCY}{current_price:.2f}", ui.GREEN),
-        (f"Original Price: {ui.CURRENCY}{selected_item['starting_price']:.2f}", ui.LIGHT_GRAY),
-        (f"Bid Limit: {ui.CURRENCY}{selected_item['max_bid']:.2f}", ui.RED),
-    ]
-    
-    for i, (text, color) in enumerate(info_lines):
-        label = fonts['normal'].render(text, True, color)
-        screen.blit(label, (70, 160 + i * 40))
-    
-    if selected_item['highest_bidder']:
-        bidder = fonts['small'].render(f"Highest Bidder: {selected_item['highest_bidder']}", True, ui.GREEN)
-        screen.blit(bidder, (70, 315))
-    
-    # Input form box
-    input_box = pygame.Rect(430, 140, 320, 200)
-    pygame.draw.rect(screen, ui.INPUT_BG, input_box, border_radius=10)
-    pygame.draw.rect(screen, ui.PURPLE, input_box, 2, border_radius=10)
-    
-    title = fonts['normal'].render("Enter Your Details", True, ui.WHITE)
-    screen.blit(title, (480, 155))
-    
-    # Input fields
-    name_rect = ui.draw_input_box(screen, fonts, "Name:", inputs["name"], 
-                                   450, 210, 280, inputs["active"] == "name")
-    bid_rect = ui.draw_input_box(screen, fonts, f"Bid Price: {ui.CURRENCY}", inputs["bid"], 
-                                  450, 280, 280, inputs["active"] == "bid")
-    
-    # BID button
-    bid_btn = ui.draw_button(screen, fonts, "BID", 250, 380, 300, 50, ui.GREEN, ui.BLACK)
-    
-    # Message
-    if message:
-        color = ui.GREEN if "Success" in message else ui.RED
-        msg = fonts['normal'].render(message, True, color)
-        screen.blit(msg, (ui.SCREEN_WIDTH // 2 - msg.get_width() // 2, 450))
-    
-    return back_btn, name_rect, bid_rect, bid_btn
-
-
-def draw_add_item_screen():
-    """Draw the add new item screen"""
-    screen.fill(ui.DARK_BG)
-    
-    # Back button
-    back_btn = ui.draw_button(screen, fonts, "< Back", 20, 20, 80, 35, ui.DARK_GRAY)
-    
-    # Title
-    ui.draw_title(screen, fonts, "Add New Item", 80)
-    
-    # Input fields
-    name_rect = ui.draw_input_box(screen, fonts, "Item Name:", inputs["item_name"], 
-                                   200, 180, 400, inputs["active"] == "item_name")
-    desc_rect = ui.draw_input_box(screen, fonts, "Description:", inputs["item_desc"], 
-                                   200, 260, 400, inputs["active"] == "item_desc")
-    price_rect = ui.draw_input_box(screen, fonts, f"Starting Price: {ui.CURRENCY}", inputs["item_price"], 
-                                    200, 340, 180, inputs["active"] == "item_price")
-    max_rect = ui.draw_input_box(screen, fonts, f"Max Bid: {ui.CURRENCY}", inputs["item_max"], 
-                                  420, 340, 180, inputs["active"] == "item_max")
-    
-    # Add button
-    add_btn = ui.draw_button(screen, fonts, "Add Item", 300, 420, 200, 50, ui.GREEN, ui.BLACK)
+        # Work out which card was clicked straight from the grid maths
+        index = ui.card_index_at(mouse_pos[0], mouse_pos[1], self.scroll_y)
+        if index is None:
+            return
     
-    # Message
-    if message:
-        msg = fonts['normal'].render(message, True, ui.RED)
-        screen.blit(msg, (ui.SCREEN_WIDTH // 2 - msg.get_width() // 2, 490))
+        # Check item cards
+        if index < num_items:
+            self.selected_item = self.db.get_item(self.db.get_item_ids()[index])
+            if self.selected_item is not None:
+                self.current_screen = "detail"
+                self.clear_inputs()
+                self.message = ""
+            return
     
-    return back_btn, name_rect, desc_rect, price_rect, max_rect, add_btn
-
+        # Check add button (the card right after the last item)
+        if index == num_items:
+            self.current_screen = "add_item"
+            self.clear_inputs()
+            self.message = ""
+            return
 
-def draw_results_screen():
-    """Draw the auction results screen"""
-    screen.fill(ui.DARK_BG)
-    
-    # Title
-    ui.draw_title(screen, fonts, "Auction Results!", 30)
+    def handle_detail_click(self, mouse_pos):
+        """Handle clicks on the detail screen"""
+        rects = layout.detail_screen()
     
-    # Get final results
-    items = db.get_all_items()
+        if rects["back"].collidepoint(mouse_pos):
+            self.current_screen = "items"
+            return
     
-    # Draw results
-    y = 100 + scroll_y
-    for item in items:
-        if y + 50 > 70 and y < ui.SCREEN_HEIGHT - 80:
-            box = pygame.Rect(50, y, ui.SCREEN_WIDTH - 100, 50)
-            pygame.draw.rect(screen, ui.INPUT_BG, box, border_radius=8)
-            pygame.draw.rect(screen, ui.PURPLE, box, 2, border_radius=8)
-            
-            name_text = fonts['normal'].render(item["name"][:20], True, ui.WHITE)
-            screen.blit(name_text, (70, y + 15))
-            
-            if item["current_bid"] > 0:
-                winner = fonts['normal'].render(
-                    f"Winner: {item['highest_bidder']} - {ui.CURRENCY}{item['current_bid']:.2f}", 
-                    True, ui.GREEN)
-            else:
-                winner = fonts['normal'].render("No bids", True, ui.DARK_GRAY)
-            screen.blit(winner, (350, y + 15))
-        
-        y += 60
-    
-    # Close button
-    pygame.draw.rect(screen, ui.DARK_BG, (0, ui.SCREEN_HEIGHT - 80, ui.SCREEN_WIDTH, 80))
-    close_btn = ui.draw_button(screen, fonts, "Close", 
-                                ui.SCREEN_WIDTH // 2 - 60, ui.SCREEN_HEIGHT - 70, 
-                                120, 45, ui.RED)
-    
-    return close_btn
-
-
-# ============ EVENT HANDLERS ============
-def handle_items_click(mouse_pos, card_rects, add_rect, reset_btn, end_btn):
-    """Handle clicks on the items screen"""
-    global current_screen, selected_item, message, start_time, results_printed
-    
-    # Check reset button FIRST
-    if reset_btn.collidepoint(mouse_pos):
-        db.reset_auction()
-        start_time = time.time()  # Reset timer
-        results_printed = False   # Allow printing results again
-        print("\n🔄 Auction Reset! Timer restarted.\n")
-        return
-    
-    # Check end button
-    if end_btn.collidepoint(mouse_pos):
-        current_screen = "results"
-        if not results_printed:
-            db.print_results()
-            results_printed = True
-        return
-    
-    # Check item cards
-    for rect, item in card_rects:
-        if rect.collidepoint(mouse_pos):
-            selected_item = item
-            current_screen = "detail"
-            clear_inputs()
-            message = ""
+        clicked_input = layout.input_at(mouse_pos, rects["inputs"])
+        if clicked_input:
+            self.inputs["active"] = clicked_input
             return
     
-    # Check add button (only if visible - not behind bottom bar)
-    if add_rect.collidepoint(mouse_pos) and add_rect.y < ui.SCREEN_HEIGHT - 70:
-        current_screen = "add_item"
-        clear_inputs()
-        message = ""
-        return
+        automatic = rects["auto"].collidepoint(mouse_pos)
+        if rects["bid"].collidepoint(mouse_pos) or automatic:
+            # Process the bid (for AUTO BID the amount is the most we'll pay)
+            if self.selected_item["id"] in self.pending_bids:
+                self.message = "Please wait - your bid is still saving..."
+                return
 
+            if not db.is_open(self.selected_item):
+                self.message = "Sorry - bidding on this item has closed!"
+                return
 
-def handle_detail_click(mouse_pos, back_btn, name_rect, bid_rect, bid_btn):
-    """Handle clicks on the detail screen"""
-    global current_screen, message, selected_item
-    
-    if back_btn.collidepoint(mouse_pos):
-        current_screen = "items"
-        return
-    
-    if name_rect.collidepoint(mouse_pos):
-        inputs["active"] = "name"
-        return
-    
-    if bid_rect.collidepoint(mouse_pos):
-        inputs["active"] = "bid"
-        return
-    
-    if bid_btn.collidepoint(mouse_pos):
-        # Process the bid
-        if not inputs["name"].strip():
-            message = "Please enter your name!"
-            return
+            if not self.inputs["name"].strip():
+                self.message = "Please enter your name!"
+                return
         
-        if not inputs["bid"].strip():
-            message = "Please enter a bid amount!"
-            return
+            if not self.inputs["bid"].strip():
+                self.message = "Please enter a bid amount!"
+                return
         
-        try:
-            bid_amount = float(inputs["bid"])
-            min_bid = selected_item["current_bid"] if selected_item["current_bid"] > 0 else selected_item["starting_price"]
-            
-            if bid_amount <= min_bid:
-                message = f"Bid must be higher than {ui.CURRENCY}{min_bid:.2f}!"
-            elif bid_amount > selected_item["max_bid"]:
-                message = f"Bid cannot exceed {ui.CURRENCY}{selected_item['max_bid']:.2f}!"
+            try:
+                bid_amount = money.parse_pence(self.inputs["bid"])
+            except ValueError:
+                self.message = "Please enter an amount like 12.50!"
+                return
+
+            # The database checks the bid against the latest price (another
+            # kiosk may have bid since we opened this item). It's saved in the
+            # background and check_pending_bids shows the result.
+            if automatic:
+                future = self.writer.set_proxy_bid(self.selected_item["id"], self.inputs["name"], bid_amount)
             else:
-                # Valid bid - save to database!
-                db.update_bid(selected_item["id"], bid_amount, inputs["name"])
-                selected_item["current_bid"] = bid_amount
-                selected_item["highest_bidder"] = inputs["name"]
-                message = "Success! Your bid has been placed!"
-                inputs["name"] = ""
-                inputs["bid"] = ""
-        except ValueError:
-            message = "Please enter a valid number!"
-
-
-def handle_add_item_click(mouse_pos, back_btn, name_rect, desc_rect, price_rect, max_rect, add_btn):
-    """Handle clicks on the add item screen"""
-    global current_screen, message
-    
-    if back_btn.collidepoint(mouse_pos):
-        current_screen = "items"
-        return
-    
-    if name_rect.collidepoint(mouse_pos):
-        inputs["active"] = "item_name"
-    elif desc_rect.collidepoint(mouse_pos):
-        inputs["active"] = "item_desc"
-    elif price_rect.collidepoint(mouse_pos):
-        inputs["active"] = "item_price"
-    elif max_rect.collidepoint(mouse_pos):
-        inputs["active"] = "item_max"
-    elif add_btn.collidepoint(mouse_pos):
-        # Add the item
-        if not inputs["item_name"].strip():
-            message = "Please enter an item name!"
-            return
-        
-        if not inputs["item_price"].strip() or not inputs["item_max"].strip():
-            message = "Please enter prices!"
+                future = self.writer.place_bid(self.selected_item["id"], self.inputs["name"], bid_amount)
+            future.add_done_callback(lambda _: post_event(DB_CHANGED))
+            self.pending_bids[self.selected_item["id"]] = (future, bid_amount, automatic)
+            self.message = "Placing your bid..."
+
+    def handle_add_item_click(self, mouse_pos):
+        """Handle clicks on the add item screen"""
+        rects = layout.add_item_screen()
+    
+        if rects["back"].collidepoint(mouse_pos):
+            self.current_screen = "items"
             return
+    
+        clicked_input = layout.input_at(mouse_pos, rects["inputs"])
+        if clicked_input:
+            self.inputs["active"] = clicked_input
+        elif rects["add"].collidepoint(mouse_pos):
+            # Add the item
+            if not self.inputs["item_name"].strip():
+                self.message = "Please enter an item name!"
+                return
         
-        try:
-            price = float(inputs["item_price"])
-            max_bid = float(inputs["item_max"])
-            
-            if max_bid <= price:
-                message = "Max bid must be higher than starting price!"
-            else:
-                db.add_item(inputs["item_name"], inputs["item_desc"], price, max_bid)
-                current_screen = "items"
-                message = ""
-        except ValueError:
-            message = "Please enter valid numbers!"
-
-
-def handle_key(event):
-    """Handle keyboard input"""
-    active = inputs["active"]
-    
-    if active is None:
-        return
-    
-    if event.key == pygame.K_BACKSPACE:
-        inputs[active] = inputs[active][:-1]
-    elif event.key == pygame.K_TAB:
-        # Cycle through inputs
-        if current_screen == "detail":
-            inputs["active"] = "bid" if active == "name" else "name"
-        elif current_screen == "add_item":
-            order = ["item_name", "item_desc", "item_price", "item_max"]
-            idx = order.index(active) if active in order else -1
-            inputs["active"] = order[(idx + 1) % len(order)]
-    else:
-        char = event.unicode
-        # Limit input length
-        max_len = 20 if active in ["name", "item_name", "item_desc"] else 10
-        
-        if len(inputs[active]) < max_len:
-            # Only allow numbers for price fields
-            if active in ["bid", "item_price", "item_max"]:
-                if char.isdigit() or char == ".":
-                    inputs[active] += char
-            else:
-                inputs[active] += char
-
-
-# ============ MAIN GAME LOOP ============
-print("\n🎯 Auction System Started!")
-print("📁 Database file: auction.db")
-print("⏰ Auction duration: 10 minutes\n")
-
-while running:
-    # Check if time is up
-    _, _, remaining = get_time_remaining()
-    if remaining <= 0 and current_screen != "results":
-        current_screen = "results"
-        if not results_printed:
-            db.print_results()
-            results_printed = True
-    
-    # Handle events
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        
-        elif event.type == pygame.MOUSEWHEEL:
-            if current_screen in ["items", "results"]:
-                handle_scroll(event.y)
+            if not self.inputs["item_price"].strip() or not self.inputs["item_max"].strip():
+                self.message = "Please enter prices!"
+                return
         
-        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            mouse_pos = pygame.mouse.get_pos()
-            
-            if current_screen == "items":
-                card_rects, add_rect, reset_btn, end_btn = draw_items_screen()
-                handle_items_click(mouse_pos, card_rects, add_rect, reset_btn, end_btn)
+            try:
+                price = money.parse_pence(self.inputs["item_price"])
+                max_bid = money.parse_pence(self.inputs["item_max"])
             
-            elif current_screen == "detail":
-                back_btn, name_rect, bid_rect, bid_btn = draw_detail_screen()
-                handle_detail_click(mouse_pos, back_btn, name_rect, bid_rect, bid_btn)
-            
-            elif current_screen == "add_item":
-                back_btn, name_rect, desc_rect, price_rect, max_rect, add_btn = draw_add_item_screen()
-                handle_add_item_click(mouse_pos, back_btn, name_rect, desc_rect, price_rect, max_rect, add_btn)
-            
-            elif current_screen == "results":
-                close_btn = draw_results_screen()
-                if close_btn.collidepoint(mouse_pos):
-                    running = False
+                if max_bid <= price:
+                    self.message = "Max bid must be higher than starting price!"
+                else:
+                    self.writer.add_item(self.inputs["item_name"], self.inputs["item_desc"], price, max_bid)
+                    self.current_screen = "items"
+                    self.message = ""
+            except ValueError:
+                self.message = "Please enter prices like 12.50!"
+
+    def handle_key(self, event):
+        """Handle keyboard input"""
+        active = self.inputs["active"]
+    
+        if active is None:
+            return
+    
+        if event.key == pygame.K_BACKSPACE:
+            self.inputs[active] = self.inputs[active][:-1]
+        elif event.key == pygame.K_TAB:
+            # Cycle through inputs
+            if self.current_screen == "detail":
+                self.inputs["active"] = "bid" if active == "name" else "name"
+            elif self.current_screen == "add_item":
+                order = ["item_name", "item_desc", "item_price", "item_max"]
+                idx = order.index(active) if active in order else -1
+                self.inputs["active"] = order[(idx + 1) % len(order)]
+        else:
+            char = event.unicode
+            # Limit input length
+            max_len = 20 if active in ["name", "item_name", "item_desc"] else 10
         
-        elif event.type == pygame.KEYDOWN:
-            handle_key(event)
-    
-    # Draw current screen
-    if current_screen == "items":
-        draw_items_screen()
-    elif current_screen == "detail":
-        draw_detail_screen()
-    elif current_screen == "add_item":
-        draw_add_item_screen()
-    elif current_screen == "results":
-        draw_results_screen()
-    
-    pygame.display.flip()
-    clock.tick(60)
-
-pygame.quit()
-print("\n👋 Thanks for using Auction System!")
+            if len(self.inputs[active]) < max_len:
+                # Only allow numbers for price fields
+                if active in ["bid", "item_price", "item_max"]:
+                    if char.isdigit() or char == ".":
+                        self.inputs[active] += char
+                else:
+                    self.inputs[active] += char
+
+    # ============ MAIN LOOP ============
+    def handle_events(self, events):
+        """Handle a batch of pygame events"""
+        for event in events:
+            if self.recorder:
+                self.recorder.record(event)
+
+            if event.type == pygame.QUIT:
+                self.running = False
+
+            elif event.type in (TIMER_TICK, ITEM_CLOSING):
+                self.close_due_items()
+
+            elif event.type == DB_CHANGED:
+                self.apply_changes()
+
+            elif event.type == pygame.MOUSEWHEEL:
+                if self.current_screen in ["items", "results"]:
+                    self.handle_scroll(event.y)
+
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                self.handle_click(event.pos)
+
+            elif event.type == pygame.KEYDOWN:
+                self.handle_key(event)
+
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.needs_full_redraw = True
+
+    def render(self):
+        """Draw only what changed - or nothing at all if the screen is the same"""
+        dirty_rects = self.find_dirty_rects()
+        if dirty_rects is None:
+            self.draw_current_screen()
+            pygame.display.flip()
+        elif dirty_rects:
+            self.screen.set_clip(dirty_rects[0].unionall(dirty_rects[1:]))
+            self.draw_current_screen()
+            self.screen.set_clip(None)
+            pygame.display.update(dirty_rects)
+
+    def step(self, events):
+        """Run one frame: handle events, then draw"""
+        # Pick up bids the writer has finished saving
+        self.check_pending_bids()
+        self.handle_events(events)
+        self.render()
+
+    def run(self):
+        """Run the auction until the window is closed"""
+        print("\n🎯 Auction System Started!")
+        if self.config.server:
+            print(f"🛰  Auction server: {self.config.server}")
+        else:
+            print(f"📁 Database file: {self.config.database_file}")
+        minutes, seconds = divmod(self.config.auction_duration, 60)
+        duration = f"{minutes} minutes" if seconds == 0 else f"{self.config.auction_duration} seconds"
+        print(f"⏰ Auction duration: {duration}\n")
+
+        # A local file needs the feed thread (the server pushes changes to RemoteDB)
+        if self.feed:
+            self.feed.start()
+
+        while self.running:
+            # Sleep until something happens, then grab anything else waiting
+            events = [pygame.event.wait(IDLE_TIMEOUT_MS)] + pygame.event.get()
+            self.step(events)
+
+            # Don't redraw faster than max_fps when events pour in
+            self.clock.tick(self.config.max_fps)
+
+        self.close()
+
+    def run_script(self, script):
+        """Play a list of frames, each a list of pygame events, as fast as possible.
+
+        Nothing waits for real time, so a whole recorded auction can be
+        replayed quickly. Returns the number of frames and how long they took.
+        """
+        started = time.perf_counter()
+        frames = 0
+        for events in script:
+            if not self.running:
+                break
+            # No feed thread here - check for changes once a frame instead
+            if self.feed:
+                self.feed.poll()
+            # Timer events and the like still arrive through pygame's own queue
+            self.step(list(events) + pygame.event.get())
+            frames += 1
+
+        # Let queued bids finish so the last frame shows their results
+        self.writer.flush()
+        if self.feed:
+            self.feed.poll()
+        self.step([])
+
+        seconds = time.perf_counter() - started
+        return {"frames": frames, "seconds": seconds, "fps": frames / seconds if seconds else 0.0}
+
+    def close(self):
+        """Save anything still queued, shut pygame down and print cache stats"""
+        self.running = False
+        if self.feed and self.feed.running:
+            self.feed.stop()
+        pygame.quit()
+        self.writer.stop()
+        if self.journal:
+            journal.close_journal()
+        if self.recorder:
+            self.recorder.close()
+
+        stats = self.db.get_cache_stats()
+        print(f"\n📊 Item cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+        stats = ui.text_cache.stats()
+        print(f"📊 Text cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+        stats = ui.card_cache.stats()
+        print(f"📊 Card cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
+        print("👋 Thanks for using Auction System!")
+
+
+def main():
+    """Start the auction from the command line"""
+    defaults = AppConfig()
+    parser = argparse.ArgumentParser(description="Group 2 - Auction Zone")
+    parser.add_argument("--db", default=defaults.database_file, help="database file")
+    parser.add_argument("--duration", type=int, default=defaults.auction_duration,
+                        help="auction length in seconds (if one isn't running already)")
+    parser.add_argument("--stagger", type=float, default=defaults.close_stagger,
+                        help="seconds between one item closing and the next")
+    parser.add_argument("--size", type=int, nargs=2, default=(defaults.screen_width, defaults.screen_height),
+                        metavar=("WIDTH", "HEIGHT"), help="window size")
+    parser.add_argument("--headless", action="store_true", help="run without a window")
+    parser.add_argument("--record", metavar="FILE", help="record this session for replay.py")
+    parser.add_argument("--server", metavar="HOST:PORT", help="use an auction server instead of a database file")
+    parser.add_argument("--no-journal", action="store_true", help="don't keep a journal next to the database")
+    parser.add_argument("--increment", type=money.parse_pence, default=defaults.bid_increment,
+                        help="how far automatic bids go above the bid they beat, in pounds "
+                             "(default: more for pricier items)")
+    parser.add_argument("--fps", type=int, default=defaults.max_fps, help="most frames drawn per second")
+    args = parser.parse_args()
+
+    config = AppConfig(database_file=args.db, auction_duration=args.duration, close_stagger=args.stagger,
+                       screen_width=args.size[0], screen_height=args.size[1],
+                       headless=args.headless, record_file=args.record,
+                       server=args.server, journal=not args.no_journal,
+                       bid_increment=args.increment, max_fps=args.fps)
+    AuctionApp(config).run()
+
+
+if __name__ == "__main__":
+    main()
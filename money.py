@@ -0,0 +1,74 @@
+"""
+Money module - every amount in the auction is a whole number of pence.
+
+Prices, bids and maximums are stored, compared and sent around as ints
+(£12.50 is 1250), so there's no rounding to go wrong: a bid of exactly
+the limit is always allowed, and SQLite compares whole numbers. Pounds
+only appear at the edges - parse_pence reads what someone typed and
+format_money writes an amount for people to read.
+
+BID_INCREMENTS says how far an automatic bid goes above the bid it
+beats, which grows with the price (see proxy.py).
+"""
+import bisect
+import re
+from functools import lru_cache
+
+CURRENCY = "£"
+PENCE_PER_POUND = 100
+FORMAT_CACHE_SIZE = 4096  # formatted amounts kept (each card shows the same few every frame)
+
+# Automatic bid steps: (from this price, go up by) - both in pence, lowest price first
+BID_INCREMENTS = [
+    (0, 10),         # under £1: 10p
+    (100, 25),       # £1 - £5: 25p
+    (500, 50),       # £5 - £25: 50p
+    (2500, 100),     # £25 - £100: £1
+    (10000, 250),    # £100 - £250: £2.50
+    (25000, 500),    # £250 and up: £5
+]
+_INCREMENT_PRICES = [price for price, _ in BID_INCREMENTS]
+
+# "12", "12.5", "12.50", ".50" or "£12.50" - never more than two decimal places
+_AMOUNT = re.compile(r"\s*£?\s*(\d*)(?:\.(\d{0,2}))?\s*")
+
+
+def parse_pence(text):
+    """Read an amount someone typed (in pounds) as pence - "12.5" is 1250.
+
+    Raises ValueError if it isn't an amount of money.
+    """
+    match = _AMOUNT.fullmatch(text)
+    if match is None or not (match[1] or match[2]):
+        raise ValueError(f"Not an amount of money: {text!r}")
+    pounds, pence = match[1] or "0", match[2] or ""
+    return int(pounds) * PENCE_PER_POUND + int(pence.ljust(2, "0"))
+
+
+def check_pence(amount):
+    """Make sure an amount is a whole number of pence (an int) - returns it.
+
+    Raises TypeError for anything else, like 12.5 or 1050.0 (which might
+    be pounds, or part of a penny).
+    """
+    if isinstance(amount, bool) or not isinstance(amount, int):
+        raise TypeError(f"Amounts are whole pence (an int), not {amount!r}")
+    return amount
+
+
+def to_pence(pounds):
+    """Convert an amount in pounds (a float from an older file) to pence"""
+    return round(pounds * PENCE_PER_POUND)
+
+
+@lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def format_money(pence):
+    """Write pence for people to read - 1250 is "£12.50" (cached)"""
+    sign = "-" if pence < 0 else ""
+    pounds, pence = divmod(abs(pence), PENCE_PER_POUND)
+    return f"{sign}{CURRENCY}{pounds}.{pence:02d}"
+
+
+def bid_increment(price):
+    """How far an automatic bid goes above price (see BID_INCREMENTS)"""
+    return BID_INCREMENTS[bisect.bisect_right(_INCREMENT_PRICES, price) - 1][1]
@@ -0,0 +1,55 @@
+"""
+Proxy module - automatic bidding ("bid for me up to £X").
+
+A bidder tells the auction the most they'll pay for an item. Whenever
+someone else bids, the auction bids for them - just enough to stay in
+front, never more than their maximum. The maximum stays secret.
+
+db.py keeps the maximums in the proxy_bids table, with an index that puts
+each item's highest maximum first, so finding the top two is a quick
+lookup however many people have set one. This module only does the
+maths: given an item and its top two maximums, what is the one bid that
+settles things?
+
+Amounts are in pence (see money.py).
+"""
+import money
+
+BID_INCREMENT = None  # pence an automatic bid goes above the one it beats (None = money.BID_INCREMENTS)
+
+
+def resolve(item, proxies, increment=None):
+    """Work out the bid the proxies make on an item, if any.
+
+    proxies is the top two (bidder_id, max_amount) pairs, highest first
+    (if two are equal, the one set first is first). Returns
+    (bidder_id, amount) for the one bid to place, or None. The bid goes
+    increment above what it beats (by default BID_INCREMENT, or the step
+    from money.BID_INCREMENTS for that price).
+    """
+    if not proxies:
+        return None
+
+    leader, leader_max = proxies[0]
+    has_bid = item["current_bid"] > 0
+    price = item["current_bid"] if has_bid else item["starting_price"]
+
+    # The best offer the leader has to beat: the runner-up's maximum,
+    # or the current bid if somebody else holds it
+    rival = proxies[1][1] if len(proxies) > 1 else None
+    if has_bid and item["highest_bidder_id"] != leader:
+        rival = max(rival or 0, item["current_bid"])
+
+    # Already winning and nobody is pushing
+    if item["highest_bidder_id"] == leader and (rival is None or rival <= item["current_bid"]):
+        return None
+
+    base = rival if rival is not None else item["starting_price"]
+    if increment is None:
+        increment = BID_INCREMENT if BID_INCREMENT is not None else money.bid_increment(base)
+    amount = min(leader_max, base + increment, item["max_bid"])
+
+    # The leader's maximum isn't enough to beat the current price
+    if amount <= price:
+        return None
+    return leader, amount
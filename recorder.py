@@ -0,0 +1,100 @@
+"""
+Recorder module - saves the clicks, key presses and scrolls from a real
+auction so replay.py can play them back later as a benchmark.
+
+A recording is a text file with one JSON list per line. The first line
+describes the session, every other line is one event:
+
+    {"version": 1, "screen": [800, 650], "duration": 600, "started": 1760000000.0}
+    [1.25, "click", 1, 100, 150]
+    [2.5, "key", 97, "a"]
+    [3.0, "wheel", 0, -1]
+    [9.75, "quit"]
+
+The first number is seconds since the app started ("started" in the
+header is when that was, on the app's clock - older recordings don't have
+it). Files ending in .gz are gzipped.
+"""
+import gzip
+import json
+import time
+
+import pygame
+
+RECORDING_VERSION = 1
+
+
+def open_recording(path, mode="r"):
+    """Open a recording file as text, gzipped if the name ends in .gz"""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def event_to_row(t, event):
+    """Turn a pygame event into a recording row (None for events we don't keep)"""
+    if event.type == pygame.MOUSEBUTTONDOWN:
+        return [t, "click", event.button, *event.pos]
+    if event.type == pygame.KEYDOWN:
+        return [t, "key", event.key, event.unicode]
+    if event.type == pygame.MOUSEWHEEL:
+        return [t, "wheel", event.x, event.y]
+    if event.type == pygame.QUIT:
+        return [t, "quit"]
+    return None
+
+
+def row_to_event(row):
+    """Turn a recording row back into (time, pygame event)"""
+    t, kind, *args = row
+    if kind == "click":
+        button, x, y = args
+        event = pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=button, pos=(x, y))
+    elif kind == "key":
+        key, char = args
+        event = pygame.event.Event(pygame.KEYDOWN, key=key, unicode=char, mod=0)
+    elif kind == "wheel":
+        x, y = args
+        event = pygame.event.Event(pygame.MOUSEWHEEL, x=x, y=y)
+    elif kind == "quit":
+        event = pygame.event.Event(pygame.QUIT)
+    else:
+        raise ValueError(f"Unknown event {kind!r} in recording")
+    return t, event
+
+
+def load_recording(path):
+    """Read a recording - returns (header, list of (time, pygame event))"""
+    with open_recording(path) as file:
+        header = json.loads(file.readline())
+        if header.get("version") != RECORDING_VERSION:
+            raise ValueError(f"{path} is recording version {header.get('version')}, "
+                             f"expected {RECORDING_VERSION}")
+        events = [row_to_event(json.loads(line)) for line in file if line.strip()]
+    return header, events
+
+
+class EventRecorder:
+    """Writes the events the app handles to a recording file"""
+
+    def __init__(self, path, config, clock=time.monotonic):
+        self.clock = clock
+        self.start = clock()
+        self.file = open_recording(path, "w")
+        header = {
+            "version": RECORDING_VERSION,
+            "screen": [config.screen_width, config.screen_height],
+            "duration": config.auction_duration,
+            "started": self.start,
+        }
+        self.file.write(json.dumps(header) + "\n")
+
+    def record(self, event):
+        """Save one event (ignores events a replay doesn't need)"""
+        row = event_to_row(round(self.clock() - self.start, 3), event)
+        if row is not None:
+            self.file.write(json.dumps(row, separators=(",", ":"), ensure_ascii=False) + "\n")
+
+    def close(self):
+        """Finish the recording"""
+        self.file.close()
@@ -0,0 +1,202 @@
+"""
+Replay module - plays a recorded auction back through the game as a benchmark.
+
+Record a real session with `python main.py --record night.jsonl`, then
+`python replay.py night.jsonl` runs it again with no window and a fake
+clock, on a fresh copy of the database, and reports how long each frame
+took, how many SQL statements it ran and how much memory it allocated.
+Same recording in, same frames out - so run it before and after a change
+to see whether the change helped.
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+import pygame
+
+import db
+from bench import percentiles
+from main import AppConfig, AuctionApp, TIMER_TICK, ITEM_CLOSING
+from recorder import load_recording
+
+FRAME_SECONDS = 1 / AppConfig.max_fps  # events closer together than this share a frame (at the default frame rate)
+
+
+class VirtualClock:
+    """A clock that only moves when the replay moves it"""
+
+    def __init__(self, start=0.0):
+        self.time = start
+
+    def __call__(self):
+        return self.time
+
+
+# ============ FRAMES ============
+def build_frames(events):
+    """Group recorded events into frames like the live loop would see them.
+
+    Returns a list of (time, events). A countdown tick is added every whole
+    second, just like the real timer.
+    """
+    end = events[-1][0] if events else 0.0
+    ticks = [(float(second), pygame.event.Event(TIMER_TICK)) for second in range(1, int(end) + 1)]
+    timeline = sorted(events + ticks, key=lambda pair: pair[0])
+
+    frames = []
+    last_slot = None
+    for t, event in timeline:
+        slot = int(t / FRAME_SECONDS)
+        if slot != last_slot:
+            frames.append((t, []))
+            last_slot = slot
+        frames[-1][1].append(event)
+    return frames
+
+
+# ============ REPLAY ============
+def start_time(header, database_file=None):
+    """When the recorded session started, on the auction's clock.
+
+    The header says, unless the recording is older than that - then it's
+    worked out from the database (its first item closes "duration" seconds
+    after the start), or 0 on a fresh database.
+    """
+    if "started" in header:
+        return header["started"]
+    if not database_file:
+        return 0.0
+    conn = sqlite3.connect(database_file)
+    try:
+        first_close = conn.execute("SELECT MIN(end_time) FROM items").fetchone()[0]
+    finally:
+        conn.close()
+    return 0.0 if first_close is None else first_close - header["duration"]
+
+
+def replay_once(header, frames, database_file=None, track_allocations=False):
+    """Play the frames once on a fresh database - returns per-frame measurements"""
+    workdir = tempfile.mkdtemp(prefix="auction-replay-")
+    db_path = os.path.join(workdir, "replay.db")
+    if database_file:
+        shutil.copyfile(database_file, db_path)
+
+    start = start_time(header, database_file)
+    clock = VirtualClock(start)
+    config = AppConfig(database_file=db_path, auction_duration=header["duration"],
+                       screen_width=header["screen"][0], screen_height=header["screen"][1],
+                       headless=True)
+    app = AuctionApp(config, clock=clock)
+    db.count_queries()
+
+    frame_ms, queries, alloc_kb = [], [], []
+    if track_allocations:
+        tracemalloc.start()
+
+    try:
+        for t, events in frames:
+            if not app.running:
+                break
+            clock.time = start + t
+
+            # Real pygame timers would tick at wall-clock speed, so drop them -
+            # the countdown ticks are already in the frames
+            queued = [event for event in pygame.event.get() if event.type not in (TIMER_TICK, ITEM_CLOSING)]
+
+            db.query_stats["count"] = 0
+            if track_allocations:
+                tracemalloc.reset_peak()
+                before, _ = tracemalloc.get_traced_memory()
+
+            started = time.perf_counter()
+            app.step(queued + events)
+            frame_ms.append((time.perf_counter() - started) * 1000)
+
+            queries.append(db.query_stats["count"])
+            if track_allocations:
+                _, peak = tracemalloc.get_traced_memory()
+                alloc_kb.append((peak - before) / 1024)
+
+            # Wait for the writer and read its changes between frames (not
+            # timed), so bids finish on the same frame every run
+            app.writer.flush()
+            app.feed.poll()
+    finally:
+        if track_allocations:
+            tracemalloc.stop()
+        db.count_queries(False)
+        app.close()
+        db.close_connection()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {"frame_ms": frame_ms, "queries": queries, "alloc_kb": alloc_kb}
+
+
+def replay(path, database_file=None, track_allocations=True):
+    """Replay a recording and build the benchmark report.
+
+    Timings come from a run without tracemalloc (it slows everything down);
+    allocations come from a second run of the same frames.
+    """
+    header, events = load_recording(path)
+    frames = build_frames(events)
+
+    started = time.perf_counter()
+    timing = replay_once(header, frames, database_file)
+    wall_seconds = time.perf_counter() - started
+
+    report = {
+        "recording": path,
+        "events": len(events),
+        "frames": len(timing["frame_ms"]),
+        "virtual_seconds": frames[-1][0] if frames else 0.0,
+        "wall_seconds": wall_seconds,
+        "frame_ms": percentiles(timing["frame_ms"]),
+        "queries_per_frame": percentiles(timing["queries"]),
+        "total_queries": sum(timing["queries"]),
+    }
+
+    if track_allocations:
+        allocations = replay_once(header, frames, database_file, track_allocations=True)
+        report["alloc_kb_per_frame"] = percentiles(allocations["alloc_kb"])
+
+    return report
+
+
+def print_report(report):
+    """Print a short summary of a replay report"""
+    print(f"\n⏱  Replayed {report['events']} events in {report['frames']} frames "
+          f"({report['virtual_seconds']:.1f}s of auction in {report['wall_seconds']:.2f}s)")
+    rows = [("Frame time (ms)", "frame_ms"), ("SQL per frame", "queries_per_frame"),
+            ("Alloc per frame (KB)", "alloc_kb_per_frame")]
+    for label, key in rows:
+        if key in report:
+            stats = report[key]
+            print(f"  {label:<21} p50 {stats['p50']:8.2f}  p95 {stats['p95']:8.2f}  "
+                  f"p99 {stats['p99']:8.2f}  max {stats['max']:8.2f}")
+
+
+def main():
+    """Replay a recording from the command line"""
+    parser = argparse.ArgumentParser(description="Replay a recorded auction as a benchmark")
+    parser.add_argument("recording", help="file made with main.py --record")
+    parser.add_argument("--db", help="start from a copy of this database instead of an empty one")
+    parser.add_argument("--no-allocations", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--json", metavar="FILE", help="also save the report as JSON")
+    args = parser.parse_args()
+
+    report = replay(args.recording, args.db, track_allocations=not args.no_allocations)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Scheduler module - closes each item when its own time is up.
+
+Every item has an end time in the database (db.open_auction sets them).
+A CloseScheduler keeps the open items' end times in a heap, so the next
+close is always on top: checking it is O(1) and adding or moving an end
+time is O(log n), however many items there are.
+
+When an item's time comes it's handed to `settle` (usually a Writer's
+submit_alone) to be closed in its own small transaction, in the
+background - items closing at different times spread the work out
+instead of settling the whole auction at once.
+
+A bid in an item's last db.SOFT_CLOSE_SECONDS pushes its end time back.
+The scheduler hears about that through the change feed and pushes the
+new time; the old heap entry is just skipped when it comes up.
+
+    scheduler = CloseScheduler(writer.submit_alone)
+    feed.subscribe(scheduler.on_changes)
+    ...
+    scheduler.run_due()   # whenever next_close() has passed
+"""
+import heapq
+import time
+
+import db
+
+
+class CloseScheduler:
+    """Keeps upcoming item closes in a min-heap and settles them when due"""
+
+    def __init__(self, settle, clock=time.time):
+        self.settle = settle  # settle(db.close_item, item_id, end_time) - returns straight away
+        self.clock = clock    # must match db.clock
+        self._heap = []       # (end time, item id) - including some that have moved since
+        self._end_times = {}  # item id -> its end time, for open items only
+        self.load()
+
+    def load(self):
+        """Read every open item's end time from the database"""
+        self._end_times = dict(db.get_close_times())
+        self._heap = [(end_time, item_id) for item_id, end_time in self._end_times.items()]
+        heapq.heapify(self._heap)
+
+    def update(self, item):
+        """Note an item's (maybe new) end time, or that it has closed"""
+        item_id = item["id"]
+        if item["closed"] or item["end_time"] is None:
+            self._end_times.pop(item_id, None)
+        elif self._end_times.get(item_id) != item["end_time"]:
+            self._end_times[item_id] = item["end_time"]
+            heapq.heappush(self._heap, (item["end_time"], item_id))
+
+    def on_changes(self, changes):
+        """Keep up with a batch of changes from a ChangeFeed (or the server)"""
+        for change in changes:
+            if change["kind"] in ("reset", "reload"):
+                self.load()
+            elif change["kind"] == "item" and change["item"] is not None:
+                self.update(change["item"])
+            elif change["item_id"] is not None:
+                self._end_times.pop(change["item_id"], None)  # deleted
+
+    def next_close(self):
+        """When the next item closes (None if nothing is waiting to close)"""
+        heap = self._heap
+        # Drop entries for items that have closed or moved their end time
+        while heap and self._end_times.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def run_due(self):
+        """Settle every item whose time is up - returns their ids"""
+        now = self.clock()
+        due = []
+        while (end_time := self.next_close()) is not None and end_time <= now:
+            _, item_id = heapq.heappop(self._heap)
+            del self._end_times[item_id]
+            self.settle(db.close_item, item_id, end_time)
+            due.append(item_id)
+        return due
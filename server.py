@@ -0,0 +1,282 @@
+"""
+Server module - one process owns the auction database and every kiosk
+talks to it over the network, instead of all of them fighting over the
+lock on a shared auction.db.
+
+The protocol is JSON lines over TCP. A kiosk sends requests like
+
+    {"id": 1, "op": "place_bid", "args": {"item_id": 3, "bidder_name": "Sam", "bid_amount": 1250}}
+
+and gets back {"id": 1, "result": ...} or {"id": 1, "error": "..."}
+(amounts are in pence, see money.py).
+Requests don't have to wait for each other - replies come back tagged
+with their id as soon as they're ready - and every write goes through
+one Writer, so bids arriving together are saved in one transaction.
+
+After "subscribe" a kiosk is also sent {"event": "changes", "changes": [...]}
+whenever something changes (see changes.py) - from this server or
+anything else writing to the same file. A kiosk that was disconnected can
+subscribe with "since" set to the last change it saw to catch up. See
+client.py for the kiosk side.
+
+The server also closes each item when its time is up (see scheduler.py).
+
+Run it with `python server.py --db auction.db --port 8765`
+(--duration and --stagger set when items close, --increment sets how far
+automatic bids go above the bid they beat).
+"""
+import argparse
+import asyncio
+import io
+import json
+import time
+
+import db
+import export
+import journal
+import money
+import proxy
+from changes import ChangeFeed
+from scheduler import CloseScheduler
+from writer import Writer
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_DURATION = 600     # seconds until items close
+CLOSE_CHECK_SECONDS = 1.0  # longest the closing task sleeps without looking
+
+
+class BidServer:
+    """Answers kiosk requests and pushes item changes to subscribers"""
+
+    def __init__(self, database_file=db.DATABASE_FILE, host=DEFAULT_HOST, port=DEFAULT_PORT,
+                 duration=DEFAULT_DURATION, stagger=0):
+        self.database_file = database_file
+        self.host = host
+        self.port = port
+        self.duration = duration  # for items that haven't got an end time yet
+        self.stagger = stagger
+        self.subscribers = set()
+        self.db_writer = None
+        self.feed = None
+        self.scheduler = None
+        self.closer = None
+        self.closes_changed = None
+        self.server = None
+
+        self.handlers = {
+            "list_items": self.list_items,
+            "get_item": self.get_item,
+            "place_bid": self.place_bid,
+            "set_proxy_bid": self.set_proxy_bid,
+            "add_item": self.add_item,
+            "reset_auction": self.reset_auction,
+            "subscribe": self.subscribe,
+            "flush": self.flush,
+            "report": self.report,
+            "results": self.results,
+        }
+
+    # ============ STARTING AND STOPPING ============
+    async def start(self):
+        """Open the database and start listening"""
+        db.init(self.database_file)
+        journal.open_journal(self.database_file)
+        db.open_auction(self.duration, self.stagger)
+        self.db_writer = Writer()
+
+        self.scheduler = CloseScheduler(self.db_writer.submit_alone)
+        self.closes_changed = asyncio.Event()
+        self.closer = asyncio.create_task(self.close_items())
+
+        # The feed runs on its own thread - hand its changes to the event loop
+        loop = asyncio.get_running_loop()
+        self.feed = ChangeFeed()
+        self.feed.subscribe(lambda changes: loop.call_soon_threadsafe(self.broadcast_changes, changes))
+        self.feed.start()
+
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]  # in case port 0 picked one
+        print(f"🛰  Auction server listening on {self.host}:{self.port}")
+
+    async def serve_forever(self):
+        """Start (if needed) and answer kiosks until cancelled"""
+        if self.server is None:
+            await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        """Stop listening and save anything still queued"""
+        self.server.close()
+        self.closer.cancel()
+        await asyncio.gather(self.closer, return_exceptions=True)  # let it finish cancelling
+        for stream in list(self.subscribers):
+            stream.close()
+        await asyncio.to_thread(self.db_writer.stop)
+        await asyncio.to_thread(self.feed.stop)
+        journal.close_journal()
+
+    # ============ CONNECTIONS ============
+    async def handle_client(self, reader, stream):
+        """Read one kiosk's requests and start each one straight away"""
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self.handle_request(line, stream))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except ConnectionError:
+            pass
+        finally:
+            self.subscribers.discard(stream)
+            if tasks:
+                await asyncio.wait(tasks)
+            stream.close()
+
+    async def handle_request(self, line, stream):
+        """Run one request and send back its reply"""
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            handler = self.handlers.get(request.get("op"))
+            if handler is None:
+                raise ValueError(f"Unknown op {request.get('op')!r}")
+            reply = {"id": request_id, "result": await handler(stream, **request.get("args", {}))}
+        except Exception as error:
+            reply = {"id": request_id, "error": f"{type(error).__name__}: {error}"}
+        self.send(stream, reply)
+
+    def send(self, stream, message):
+        """Send one JSON line (quietly skips kiosks that have gone)"""
+        if not stream.is_closing():
+            stream.write((json.dumps(message) + "\n").encode("utf-8"))
+
+    def broadcast_changes(self, changes):
+        """Send new changes to every subscribed kiosk"""
+        self.scheduler.on_changes(changes)
+        self.closes_changed.set()
+
+        message = {"event": "changes", "changes": changes}
+        for stream in list(self.subscribers):
+            self.send(stream, message)
+
+    async def close_items(self):
+        """Close each item when its time is up (runs until the server stops)"""
+        while True:
+            self.scheduler.run_due()
+            next_close = self.scheduler.next_close()
+            delay = CLOSE_CHECK_SECONDS
+            if next_close is not None:
+                delay = min(delay, max(0.0, next_close - time.time()))
+
+            # Sleep until then - or until a change moves the next close
+            self.closes_changed.clear()
+            try:
+                await asyncio.wait_for(self.closes_changed.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def write(self, func, *args):
+        """Queue a db write on the Writer and wait for it to be committed"""
+        return await asyncio.wrap_future(self.db_writer.submit(func, *args))
+
+    # ============ REQUESTS ============
+    async def list_items(self, stream):
+        """Every item, in id order"""
+        return db.get_all_items()
+
+    async def get_item(self, stream, item_id):
+        """One item (or None)"""
+        return db.get_item(item_id)
+
+    async def place_bid(self, stream, item_id, bidder_name, bid_amount):
+        """Place a bid - replies [accepted, item] like db.place_bid"""
+        money.check_pence(bid_amount)
+        accepted, item = await self.write(db.place_bid, item_id, bidder_name, bid_amount)
+        return [accepted, item]
+
+    async def set_proxy_bid(self, stream, item_id, bidder_name, max_amount):
+        """Bid automatically up to max_amount - replies [accepted, item]"""
+        money.check_pence(max_amount)
+        accepted, item = await self.write(db.set_proxy_bid, item_id, bidder_name, max_amount)
+        return [accepted, item]
+
+    async def add_item(self, stream, name, description, starting_price, max_bid):
+        """Add an item - replies with its id"""
+        money.check_pence(starting_price)
+        money.check_pence(max_bid)
+        return await self.write(db.add_item, name, description, starting_price, max_bid)
+
+    async def reset_auction(self, stream, duration=None, stagger=None):
+        """Clear every bid and start the items' clocks again"""
+        duration = self.duration if duration is None else duration
+        stagger = self.stagger if stagger is None else stagger
+        await self.write(db.reset_auction, duration, stagger)
+        return None
+
+    async def subscribe(self, stream, since=None):
+        """Start sending this kiosk changes.
+
+        With since, replies {"changes": [...]} - everything after that
+        change. Otherwise (or if those changes are gone) replies
+        {"seq": latest change, "items": every item}. The kiosk may later be
+        sent changes it has already seen here - it skips them by seq.
+        """
+        self.subscribers.add(stream)
+        # (A since from before the server's database was replaced gets every item)
+        if since is not None and since <= db.get_change_seq():
+            changes = db.get_changes(since)
+            if not changes or changes[0]["kind"] != "reload":
+                return {"changes": changes}
+
+        # Read seq first, so the items are at least that new
+        seq = db.get_change_seq()
+        return {"seq": seq, "items": db.get_all_items()}
+
+    async def flush(self, stream):
+        """Reply once every write queued before this one is saved"""
+        await self.write(lambda: None)
+        return None
+
+    async def results(self, stream):
+        """Every item's result, like db.get_results"""
+        await self.write(lambda: None)  # include every bid sent before this
+        return db.get_results()
+
+    async def report(self, stream):
+        """The text results report, like db.print_results (see export.py)"""
+        await self.write(lambda: None)  # include every bid sent before this
+        report = io.StringIO()
+        export.write_report(report, "text")
+        return report.getvalue()
+
+
+def main():
+    """Run the server from the command line"""
+    parser = argparse.ArgumentParser(description="Group 2 - Auction Zone server")
+    parser.add_argument("--db", default=db.DATABASE_FILE, help="database file")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="address to listen on (0.0.0.0 for the LAN)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on")
+    parser.add_argument("--duration", type=int, default=DEFAULT_DURATION,
+                        help="seconds until items close (if an auction isn't running already)")
+    parser.add_argument("--stagger", type=float, default=0,
+                        help="seconds between one item closing and the next")
+    parser.add_argument("--increment", type=money.parse_pence, default=proxy.BID_INCREMENT,
+                        help="how far automatic bids go above the bid they beat, in pounds "
+                             "(default: more for pricier items)")
+    args = parser.parse_args()
+    proxy.BID_INCREMENT = args.increment
+
+    try:
+        server = BidServer(args.db, args.host, args.port, args.duration, args.stagger)
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Shared pytest fixtures - every test gets its own fresh auction database"""
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+
+
+@pytest.fixture
+def auction_db(tmp_path, monkeypatch):
+    """A new database with the 8 default items (and no journal)"""
+    monkeypatch.setattr(db, "journal", None)
+    monkeypatch.setattr(db, "clock", time.time)
+    db.init(str(tmp_path / "auction.db"))
+    yield db
+    db.close_connection()
+
+
+@pytest.fixture
+def app(auction_db, monkeypatch):
+    """A headless AuctionApp (no window, no journal) on the test database"""
+    import proxy
+    from main import AppConfig, AuctionApp
+
+    monkeypatch.setattr(proxy, "BID_INCREMENT", proxy.BID_INCREMENT)  # the app sets it
+    kiosk = AuctionApp(AppConfig(database_file=db.DATABASE_FILE, headless=True, journal=False))
+    yield kiosk
+    if kiosk.running:
+        kiosk.close()
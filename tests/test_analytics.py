@@ -0,0 +1,92 @@
+"""Tests for analytics.py"""
+import hashlib
+import sqlite3
+import sys
+
+import pytest
+
+import analytics
+import db
+
+
+def _digest(path):
+    """A hash of a file's bytes"""
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def test_archived_database_is_left_alone(auction_db, tmp_path, monkeypatch):
+    """Running the analytics reads the file without changing it"""
+    db.place_bid(1, "Sam", 6000)
+    db.close_connection()
+    conn = sqlite3.connect(db.DATABASE_FILE)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    before = _digest(db.DATABASE_FILE)
+
+    report = tmp_path / "report.json"
+    monkeypatch.setattr(sys, "argv", ["analytics.py", "--db", db.DATABASE_FILE, "--json", str(report)])
+    analytics.main()
+
+    assert _digest(db.DATABASE_FILE) == before
+    assert report.exists()
+
+
+def test_old_schema_is_refused(tmp_path):
+    """A file the auction hasn't upgraded yet isn't analysed (or upgraded)"""
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE bids (id INTEGER PRIMARY KEY, bidder_name TEXT)")
+    conn.close()
+
+    with pytest.raises(ValueError, match="schema version 0"):
+        analytics.open_database(path)
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 0
+    conn.close()
+
+
+@pytest.fixture
+def history(auction_db):
+    """A few bids at known times on items 1 (max £150) and 2"""
+    db.update_bids_many([
+        (1, "Ann", 6000, 1000.0),
+        (1, "Sam", 7000, 1030.0),
+        (2, "Sam", 4000, 1060.0),
+        (1, "Ann", 14000, 1150.0),
+    ])
+    return analytics.load_bids(chunk_size=1), analytics.load_items()
+
+
+def test_item_figures(history):
+    """Each item's figures match working them out by hand"""
+    report = analytics.analyse(*history)
+    first, second, third = report["items"][:3]
+
+    assert (first["final_price"], first["bid_count"], first["bidders"]) == (14000, 3, 2)
+    assert first["final_to_max"] == pytest.approx(14000 / 15000)
+    assert first["bids_per_minute"] == pytest.approx(3 / 2.5)
+    assert first["near_max_share"] == pytest.approx(1 / 3)
+    assert first["concentration"] == pytest.approx(5 / 9)
+    assert first["top_bidder_share"] == pytest.approx(2 / 3)
+    assert first["time_to_first_bid"] == 0
+
+    assert (second["final_price"], second["time_to_first_bid"], second["bids_per_minute"]) == (4000, 60, 1)
+    assert (third["final_price"], third["bid_count"], third["concentration"]) == (None, 0, None)
+
+
+def test_auction_totals(history):
+    """Totals for the whole auction, with bids counted per minute since it opened"""
+    report = analytics.analyse(*history)
+    assert (report["opened"], report["bids"], report["bidders"], report["items_with_bids"]) == (1000.0, 4, 2, 2)
+    assert report["bids_per_minute"] == [2, 1, 1]
+    assert report["concentration"] == pytest.approx(0.5)
+
+    assert analytics.analyse(*history, opened=940.0)["bids_per_minute"] == [0, 2, 1, 1]
+
+
+def test_price_curves(history):
+    """One row per bid, by item then time, counted from the item's first bid"""
+    ann, sam = db.find_bidder("Ann"), db.find_bidder("Sam")
+    assert list(analytics.price_curves(*history)) == [
+        (1, 0.0, 6000, ann), (1, 30.0, 7000, sam), (1, 150.0, 14000, ann), (2, 0.0, 4000, sam)]
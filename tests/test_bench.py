@@ -0,0 +1,41 @@
+"""Tests for the load test in bench.py"""
+import sqlite3
+
+import pytest
+
+import bench
+import db
+
+
+def test_percentiles():
+    """Nearest-rank percentiles, and zeros when there's nothing to measure"""
+    assert bench.percentiles(list(range(1, 101))) == {"p50": 51, "p95": 96, "p99": 100, "max": 100}
+    assert bench.percentiles([]) == {"p50": 0, "p95": 0, "p99": 0, "max": 0}
+
+
+def test_lost_updates_are_counted(tmp_path):
+    """A bid lower than one before it, or an item showing less than its best bid, is a lost update"""
+    path = str(tmp_path / "lost.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE bids (id INTEGER PRIMARY KEY, item_id INTEGER, bid_amount INTEGER)")
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, current_bid INTEGER)")
+    conn.executemany("INSERT INTO bids (item_id, bid_amount) VALUES (?, ?)",
+                     [(1, 100), (1, 200), (1, 150), (2, 300)])
+    conn.executemany("INSERT INTO items VALUES (?, ?)", [(1, 150), (2, 300)])
+    conn.commit()
+    conn.close()
+
+    assert bench.count_lost_updates(path) == 2
+
+
+@pytest.mark.parametrize("mode", bench.MODES)
+def test_every_bid_is_accounted_for(auction_db, mode):
+    """A small run with threads finishes every bid - and only the legacy path may lose any"""
+    result = bench.run_scenario(mode, "threads", bidders=3, bids_per_bidder=20, num_items=4, seed=1,
+                                busy_timeout_ms=db.BUSY_TIMEOUT_MS)
+    assert result["attempted"] == 60
+    assert result["accepted"] + result["rejected"] == 60
+    assert result["errors"] == 0
+    assert result["accepted"] > 0
+    if mode != "legacy":
+        assert result["lost_updates"] == 0
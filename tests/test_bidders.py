@@ -0,0 +1,50 @@
+"""Tests for the bidders table in db.py"""
+import threading
+
+import pytest
+
+import db
+
+
+def test_unknown_bidder_id(auction_db):
+    """An id nobody has gives None, not an error"""
+    assert db.get_bidder_name(None) == ""
+    assert db.get_bidder_name(12345) is None
+    assert db.find_bidder("Nobody") is None
+
+
+def test_rolled_back_bidder_is_never_shared(auction_db):
+    """Another thread can't see a bidder whose transaction hasn't committed (or rolled back)"""
+    added, release = threading.Event(), threading.Event()
+    seen = []
+
+    def add_then_fail():
+        with pytest.raises(RuntimeError):
+            with db.transaction() as conn:
+                seen.append(db.intern_bidder(conn, "Zed"))
+                added.set()
+                release.wait()
+                raise RuntimeError("changed my mind")
+
+    thread = threading.Thread(target=add_then_fail)
+    thread.start()
+    added.wait()
+    seen.append(db.find_bidder("Zed"))  # while the other transaction is still open
+    release.set()
+    thread.join()
+
+    assert seen[1] is None
+    assert db.find_bidder("Zed") is None
+    assert db.get_bidder_name(seen[0]) is None
+    db.place_bid(1, "Amy", 6000)
+    assert db.get_item(1)["highest_bidder"] == "Amy"
+
+
+def test_new_bidder_is_shared_after_commit(auction_db):
+    """A bidder added in a transaction can be looked up in it, and by everyone once it commits"""
+    with db.transaction() as conn:
+        bidder_id = db.intern_bidder(conn, "Sam")
+        assert db.find_bidder("Sam") == bidder_id
+        assert db.get_bidder_name(bidder_id) == "Sam"
+        assert "Sam" not in db._bidder_ids
+    assert db._bidder_ids["Sam"] == bidder_id
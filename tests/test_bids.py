@@ -0,0 +1,171 @@
+"""Tests for placing bids through db.py"""
+import json
+import threading
+
+import pytest
+
+import db
+
+
+def test_amounts_must_be_whole_pence(auction_db):
+    """A float amount is refused before anything is saved"""
+    with pytest.raises(TypeError):
+        db.place_bid(5, "Sam", 1060.25)
+    with pytest.raises(TypeError):
+        db.update_bids_many([(5, "Sam", 1050.5, None)])
+
+    assert db.get_item(5)["current_bid"] == 0
+    assert db.get_all_bids() == []
+
+
+def test_old_bid_log_in_pounds(auction_db, tmp_path):
+    """A log in pounds is refused unless it's read with pounds=True"""
+    log = tmp_path / "bids.jsonl"
+    log.write_text(json.dumps({"item_id": 5, "bidder": "Sam", "amount": 10.5}) + "\n")
+
+    with pytest.raises(TypeError):
+        db.update_bids_many(str(log))
+    assert db.update_bids_many(str(log), pounds=True) == [True]
+    assert db.get_item(5)["current_bid"] == 1050
+
+
+def test_finished_auction_opens_again(auction_db, monkeypatch):
+    """Starting up after every item has closed opens them all again, keeping their bids"""
+    db.open_auction(60)
+    db.place_bid(1, "Sam", 6000)
+    later = db.get_item(1)["end_time"] + 1
+    monkeypatch.setattr(db, "clock", lambda: later)
+    for item_id, end_time in db.get_close_times():
+        db.close_item(item_id, end_time)
+
+    db.open_auction(600, stagger=10)
+    items = db.get_all_items()
+    assert not any(item["closed"] for item in items)
+    assert [item["end_time"] - later for item in items[:2]] == [600, 610]
+    assert items[0]["current_bid"] == 6000
+
+
+def test_automatic_bids_answer_imported_bids(auction_db):
+    """A bid from update_bids_many is answered by a higher automatic bid"""
+    db.set_proxy_bid(1, "Tom", 9000)
+    assert db.update_bids_many([(1, "Sam", 6000, None)]) == [True]
+
+    item = db.get_item(1)
+    assert item["highest_bidder"] == "Tom"
+    assert 6000 < item["current_bid"] <= 9000
+
+
+def test_imported_bids_follow_closing_times(auction_db, monkeypatch):
+    """update_bids_many refuses bids once time is up and extends a close like place_bid"""
+    db.open_auction(10)
+    end = db.get_item(1)["end_time"]
+    monkeypatch.setattr(db, "clock", lambda: end - 5)
+    assert db.update_bids_many([(1, "Sam", 6000, None)]) == [True]
+    assert db.get_item(1)["end_time"] == end - 5 + db.SOFT_CLOSE_SECONDS
+
+    later = db.get_item(2)["end_time"] + 1
+    monkeypatch.setattr(db, "clock", lambda: later)
+    assert db.update_bids_many([(2, "Sam", 6000, None)]) == [False]
+    assert db.get_item(2)["current_bid"] == 0
+
+
+def test_backup_restored_after_the_close(auction_db, monkeypatch):
+    """Imported bids are judged by when they were made, not when they're imported"""
+    db.open_auction(10)
+    end = db.get_item(1)["end_time"]
+    monkeypatch.setattr(db, "clock", lambda: end + 100)
+
+    backup = [(1, "Sam", 6000, end - 5), (1, "Ann", 6500, end + 2), (1, "Tom", 7000, end + 2 + db.SOFT_CLOSE_SECONDS)]
+    assert db.update_bids_many(backup) == [True, True, False]
+    item = db.get_item(1)
+    assert (item["current_bid"], item["highest_bidder"]) == (6500, "Ann")
+    assert item["end_time"] == end + 2 + db.SOFT_CLOSE_SECONDS
+    assert [bid[5] for bid in db.get_all_bids()] == [end - 5, end + 2]
+
+
+def test_timestamps_come_from_the_auction_clock(auction_db, monkeypatch):
+    """Bids and closes are stamped with db.clock, not the computer's clock"""
+    db.open_auction(60)
+    end = db.get_item(1)["end_time"]
+    monkeypatch.setattr(db, "clock", lambda: end - 50)
+    db.place_bid(1, "Sam", 6000)
+    db.update_bids_many([(2, "Ann", 6000, None)])
+    assert [bid[5] for bid in db.get_all_bids()] == [end - 50, end - 50]
+
+    monkeypatch.setattr(db, "clock", lambda: end + 1)
+    db.close_item(1, end)
+    assert db.get_results()[0]["settled"] == end + 1
+
+
+def test_results_come_from_the_settled_result(auction_db):
+    """A closed item's winner and amount are read from the results table"""
+    db.place_bid(1, "Sam", 6000)
+    db.place_bid(2, "Ann", 6000)
+    db.get_connection().execute("UPDATE items SET closed = 1 WHERE id = 1")
+    db.get_connection().execute("UPDATE results SET amount = 5900 WHERE item_id = 1")
+    db._invalidate_cache()
+
+    first, second = db.get_results()[:2]
+    assert (first["bidder"], first["amount"], first["closed"]) == ("Sam", 5900, True)
+    assert (second["bidder"], second["amount"], second["closed"]) == ("Ann", 6000, False)
+
+
+def test_bid_has_to_beat_the_price(auction_db):
+    """Bids at or under the price, over the limit, or on a missing item are refused"""
+    assert db.place_bid(1, "Sam", 5000) == (False, db.get_item(1))  # the starting price
+    assert db.place_bid(1, "Sam", 6000)[0] is True
+    assert db.place_bid(1, "Ann", 6000)[0] is False
+    assert db.place_bid(1, "Ann", 15001)[0] is False
+    assert db.place_bid(99, "Ann", 6000) == (False, None)
+
+    item = db.get_item(1)
+    assert (item["current_bid"], item["highest_bidder"]) == (6000, "Sam")
+    assert [bid[4] for bid in db.get_all_bids()] == [6000]
+
+
+def test_racing_bids_never_go_down(auction_db):
+    """Kiosks bidding at once can't overwrite a higher bid with a lower one"""
+    def bid(bidder):
+        for amount in range(5100 + bidder, 9000, 97):
+            db.place_bid(1, f"Bidder {bidder}", amount)
+        db.close_connection()
+
+    threads = [threading.Thread(target=bid, args=(bidder,)) for bidder in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    amounts = [bid[4] for bid in sorted(db.get_all_bids())]  # in the order they were saved
+    assert amounts == sorted(set(amounts))
+    assert db.get_item(1)["current_bid"] == amounts[-1]
+
+
+def test_bulk_bids_are_saved_a_chunk_at_a_time(auction_db):
+    """One commit per chunk, and a bad amount stops the import after the chunks before it"""
+    commits = []
+
+    def committed():
+        commits.append(1)
+
+    db.add_commit_listener(committed)
+    try:
+        bids = [{"item_id": 1, "bidder": "Sam", "amount": 5100 + step * 100} for step in range(5)]
+        assert db.update_bids_many(bids, chunk_size=2) == [True] * 5
+        assert len(commits) == 3
+
+        with pytest.raises(TypeError):
+            db.update_bids_many([(2, "Ann", 4000, None), (2, "Ann", 4100, None), (2, "Ann", 42.5, None)],
+                                chunk_size=2)
+    finally:
+        db.remove_commit_listener(committed)
+    assert db.get_item(1)["current_bid"] == 5500
+    assert db.get_item(2)["current_bid"] == 4100
+
+
+def test_bulk_bids_follow_the_same_rules(auction_db):
+    """Low bids are refused in memory just like place_bid refuses them"""
+    results = db.update_bids_many([(1, "Sam", 6000, 1.0), (1, "Ann", 5900, 2.0), (1, "Ann", 6100, 3.0),
+                                   (99, "Ann", 6000, 4.0)])
+    assert results == [True, False, True, False]
+    assert [(bid[3], bid[4]) for bid in db.get_all_bids()] == [("Sam", 6000), ("Ann", 6100)]
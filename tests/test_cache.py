@@ -0,0 +1,50 @@
+"""Tests for the cached reads in db.py"""
+import sqlite3
+
+import pytest
+
+import db
+
+
+def _name_inside_failed_block(block):
+    """Rename item 1 inside block(), read it back, then fail"""
+    with pytest.raises(RuntimeError):
+        with block():
+            db.get_connection().execute("UPDATE items SET name = 'Gone' WHERE id = 1")
+            assert db.get_all_items()[0]["name"] == "Gone"
+            raise RuntimeError("undo")
+
+
+def test_reads_are_cached_until_a_commit(auction_db):
+    """A second read is a hit, and our own commit makes it a miss again"""
+    db.get_all_items()
+    hits = db.cache_stats["hits"]
+    db.get_all_items()
+    assert db.cache_stats["hits"] == hits + 1
+
+    db.place_bid(1, "Sam", 6000)
+    assert db.get_all_items()[0]["current_bid"] == 6000
+
+
+def test_another_connection_commit_is_seen(auction_db):
+    """A write from another kiosk (another connection) isn't hidden by the cache"""
+    db.get_all_items()
+    other = sqlite3.connect(db.DATABASE_FILE)
+    other.execute("UPDATE items SET name = 'Renamed' WHERE id = 1")
+    other.commit()
+    other.close()
+    assert db.get_all_items()[0]["name"] == "Renamed"
+
+
+@pytest.mark.parametrize("block", [db.transaction, db.savepoint], ids=["transaction", "savepoint"])
+def test_rolled_back_reads_are_forgotten(auction_db, block):
+    """Reads made inside a block that rolls back aren't served afterwards"""
+    name = db.get_all_items()[0]["name"]
+    db._invalidate_cache()  # so the read inside the block is the one that's cached
+    if block is db.savepoint:
+        with db.transaction():
+            _name_inside_failed_block(block)
+            assert db.get_all_items()[0]["name"] == name  # before the outer commit
+    else:
+        _name_inside_failed_block(block)
+    assert db.get_all_items()[0]["name"] == name
@@ -0,0 +1,57 @@
+"""Tests for the change feed (changes.py and db.get_changes)"""
+import threading
+
+import changes as changes_module
+import db
+from changes import ChangeFeed
+
+
+def test_poll_hands_over_each_change_once(auction_db):
+    """A bid shows up as an "item" change with the item as it is now"""
+    feed = ChangeFeed()
+    seen = []
+    feed.subscribe(seen.append)
+    db.place_bid(1, "Sam", 6000)
+
+    changes = feed.poll()
+    assert [(change["kind"], change["item_id"]) for change in changes] == [("item", 1)]
+    assert changes[0]["item"]["current_bid"] == 6000
+    assert seen == [changes]
+    assert feed.seq == db.get_change_seq()
+    assert feed.poll() == []
+
+
+def test_since_catches_up(auction_db):
+    """A feed started from an older change gets everything after it"""
+    start = db.get_change_seq()
+    db.place_bid(1, "Sam", 6000)
+    db.place_bid(2, "Ann", 6000)
+
+    assert ChangeFeed().poll() == []
+    assert [change["item_id"] for change in ChangeFeed(since_seq=start).poll()] == [1, 2]
+    assert [change["item_id"] for change in db.get_changes(start + 1)] == [2]
+
+
+def test_pruned_changes_mean_reload(auction_db):
+    """Asking for changes that have been pruned gets a single "reload" instead"""
+    start = db.get_change_seq()
+    for amount in (5500, 6000, 6500):
+        db.place_bid(1, "Sam", amount)
+    db.prune_changes(keep=1)
+
+    assert db.get_changes(start) == [{"seq": db.get_change_seq(), "kind": "reload", "item_id": None, "item": None}]
+    assert len(db.get_changes(db.get_change_seq() - 1)) == 1
+
+
+def test_background_feed_sees_our_commits(auction_db, monkeypatch):
+    """The feed's thread wakes up for a commit without waiting for POLL_SECONDS"""
+    monkeypatch.setattr(changes_module, "POLL_SECONDS", 60)
+    feed = ChangeFeed()
+    arrived = threading.Event()
+    feed.subscribe(lambda changes: arrived.set())
+    feed.start()
+    try:
+        db.place_bid(1, "Sam", 6000)
+        assert arrived.wait(5)
+    finally:
+        feed.stop()
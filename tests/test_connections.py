@@ -0,0 +1,41 @@
+"""Tests for the per-thread connections in db.py"""
+import threading
+
+import db
+
+
+def test_one_connection_per_thread(auction_db):
+    """A thread keeps reusing its connection; other threads get their own"""
+    conn = db.get_connection()
+    assert db.get_connection() is conn
+
+    other = []
+
+    def connect():
+        other.append(db.get_connection())
+        db.close_connection()
+
+    thread = threading.Thread(target=connect)
+    thread.start()
+    thread.join()
+    assert other[0] is not conn
+
+
+def test_connection_settings(auction_db):
+    """WAL, so readers don't wait for a writer, and we run transactions ourselves"""
+    conn = db.get_connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == db.BUSY_TIMEOUT_MS
+    assert conn.isolation_level is None
+
+
+def test_new_database_file_gets_a_new_connection(auction_db, tmp_path):
+    """Changing DATABASE_FILE (or closing) opens a fresh connection next time"""
+    conn = db.get_connection()
+    db.close_connection()
+    reopened = db.get_connection()
+    assert reopened is not conn
+
+    db.init(str(tmp_path / "second.db"))
+    assert db.get_connection() is not reopened
+    assert db.item_count() == 8
@@ -0,0 +1,74 @@
+"""Tests for export.py and db.print_results"""
+import csv
+import io
+import json
+
+import pytest
+
+import db
+import export
+
+
+def _bid_twice(auction_db):
+    """Two bids on item 1 and none anywhere else"""
+    db.place_bid(1, "Ann", 5500)
+    db.place_bid(1, "Sam", 6000)
+
+
+def test_print_results_lists_every_bid(auction_db, capsys):
+    """The terminal report has each item's result and then ALL BIDS, like it always did"""
+    _bid_twice(auction_db)
+    capsys.readouterr()
+    db.print_results()
+    out = capsys.readouterr().out
+
+    assert "✓ Wireless Headphones: Sam won with £60.00 (2 bids from 2 bidders)" in out
+    assert "✗ Gaming Controller: No bids" in out
+    assert out.index("ALL BIDS:") < out.index("  Ann bid £55.00 on Wireless Headphones") \
+        < out.index("  Sam bid £60.00 on Wireless Headphones")
+
+
+def test_csv_has_results_then_bids(auction_db):
+    """One row per item, then one per bid, amounts in pence"""
+    _bid_twice(auction_db)
+    out = io.StringIO()
+    export.write_report(out, "csv")
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+
+    results = [row for row in rows if row["type"] == "result"]
+    bids = [row for row in rows if row["type"] == "bid"]
+    assert len(results) == db.item_count()
+    assert (results[0]["bidder"], results[0]["amount"], results[0]["bid_count"]) == ("Sam", "6000", "2")
+    assert [(bid["bidder"], bid["amount"]) for bid in bids] == [("Ann", "5500"), ("Sam", "6000")]
+    assert rows.index(bids[0]) > rows.index(results[-1])
+
+
+def test_jsonl_without_bids(auction_db, monkeypatch):
+    """include_bids=False leaves the bid history out (and bids are read in batches)"""
+    monkeypatch.setattr(export, "FETCH_SIZE", 1)
+    _bid_twice(auction_db)
+
+    with_bids = io.StringIO()
+    export.write_report(with_bids, "jsonl")
+    records = [json.loads(line) for line in with_bids.getvalue().splitlines()]
+    assert [record["amount"] for record in records if record["type"] == "bid"] == [5500, 6000]
+
+    results_only = io.StringIO()
+    export.write_report(results_only, "jsonl", include_bids=False)
+    records = [json.loads(line) for line in results_only.getvalue().splitlines()]
+    assert {record["type"] for record in records} == {"result"}
+    assert records[0]["amount"] == 6000
+
+
+def test_export_to_file_picks_the_format(auction_db, tmp_path):
+    """The file extension picks the format, anything else gets the text report"""
+    _bid_twice(auction_db)
+    export.export_to_file(str(tmp_path / "night.jsonl"))
+    export.export_to_file(str(tmp_path / "night.log"))
+
+    first = json.loads((tmp_path / "night.jsonl").read_text(encoding="utf-8").splitlines()[0])
+    assert first["type"] == "result"
+    assert "AUCTION RESULTS" in (tmp_path / "night.log").read_text(encoding="utf-8")
+
+    with pytest.raises(ValueError, match="Unknown format"):
+        export.write_report(io.StringIO(), "xml")
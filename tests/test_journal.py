@@ -0,0 +1,87 @@
+"""Tests for journal.py"""
+import os
+import threading
+import time
+
+import pytest
+
+import db
+import journal
+
+
+def test_fsync_thread_only_syncs_after_a_commit(tmp_path, monkeypatch):
+    """Nothing is fsynced while nothing is written, and a commit is on disk soon after"""
+    log = journal.Journal(str(tmp_path / "auction.db.journal.jsonl"), str(tmp_path / "auction.db.snapshot.json"))
+    syncs = []
+    sync = log.sync
+    monkeypatch.setattr(log, "sync", lambda: syncs.append(True) or sync())
+    try:
+        time.sleep(journal.FSYNC_SECONDS * 3)
+        assert syncs == []
+
+        log.write([{"type": "reset", "timestamp": 0}])
+        log.before_commit(None)
+        deadline = time.monotonic() + 1
+        while not syncs and time.monotonic() < deadline:
+            time.sleep(journal.FSYNC_SECONDS)
+        assert syncs == [True]
+    finally:
+        log.close()
+
+
+def test_close_straight_after_a_commit(tmp_path):
+    """close() doesn't hang when it comes while the fsync thread is waiting to sync"""
+    log = journal.Journal(str(tmp_path / "auction.db.journal.jsonl"), str(tmp_path / "auction.db.snapshot.json"))
+    log.write([{"type": "reset", "timestamp": 0}])
+    log.before_commit(None)
+
+    closer = threading.Thread(target=log.close, daemon=True)
+    closer.start()
+    closer.join(timeout=5)
+    assert not closer.is_alive()
+    assert log.file.closed
+
+
+def _lose_bids(seq):
+    """Pretend the database crashed before saving the bids journaled after seq"""
+    with db.transaction() as conn:
+        db.clear_bids(conn)
+        conn.execute("UPDATE items SET current_bid = 0, highest_bidder_id = NULL")
+        db.set_journal_seq(conn, seq)
+
+
+@pytest.mark.parametrize("keep_snapshot", [True, False])
+def test_lost_bids_are_restored(auction_db, keep_snapshot):
+    """Bids the database lost come back from the journal (with or without a snapshot)"""
+    journal.open_journal()
+    seq = db.get_journal_seq()
+    db.place_bid(1, "Sam", 6000)
+    db.place_bid(2, "Ann", 4000)
+    journal.close_journal()
+
+    _lose_bids(seq)
+    if not keep_snapshot:
+        os.remove(db.DATABASE_FILE + journal.SNAPSHOT_SUFFIX)
+    journal.open_journal()
+    journal.close_journal()
+
+    assert (db.get_item(1)["current_bid"], db.get_item(1)["highest_bidder"]) == (6000, "Sam")
+    assert (db.get_item(2)["current_bid"], db.get_item(2)["highest_bidder"]) == (4000, "Ann")
+    assert len(db.get_all_bids()) == 2
+
+
+def test_torn_last_line_is_ignored(auction_db):
+    """A half-written record from a crash is skipped, and everything before it recovers"""
+    journal.open_journal()
+    seq = db.get_journal_seq()
+    db.place_bid(1, "Sam", 6000)
+    journal.close_journal()
+    with open(db.DATABASE_FILE + journal.JOURNAL_SUFFIX, "a", encoding="utf-8") as file:
+        file.write('{"type": "bid", "item_id": 2, "bidder": "Ann", "amo')
+
+    _lose_bids(seq)
+    summary = journal.recover(db.DATABASE_FILE + journal.JOURNAL_SUFFIX, db.DATABASE_FILE + journal.SNAPSHOT_SUFFIX)
+
+    assert summary["restored"] == 1
+    assert db.get_item(1)["current_bid"] == 6000
+    assert db.get_item(2)["current_bid"] == 0
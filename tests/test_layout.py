@@ -0,0 +1,53 @@
+"""Tests for layout.py and click handling without drawing"""
+import pytest
+
+import layout
+import ui
+
+
+@pytest.fixture
+def screen_size():
+    """Put the screen size (and the cached layouts) back after the test"""
+    width, height = ui.SCREEN_WIDTH, ui.SCREEN_HEIGHT
+    yield
+    ui.set_screen_size(width, height)
+    layout.clear_cache()
+
+
+def test_layouts_are_worked_out_once():
+    """The same arguments get the same rectangles back"""
+    assert layout.items_screen(0, 8) is layout.items_screen(0, 8)
+    assert layout.detail_screen() is layout.detail_screen()
+    assert layout.items_screen(-40, 8)["add"].y == layout.items_screen(0, 8)["add"].y - 40
+
+
+def test_clear_cache_follows_the_screen_size(screen_size):
+    """After set_screen_size, clear_cache gives rectangles for the new size"""
+    layout.results_screen()
+    ui.set_screen_size(1024, 768)
+    layout.clear_cache()
+    assert layout.results_screen()["rows"].width == 1024
+    assert layout.items_screen(0, 8)["bottom_bar"].bottom == 768
+
+
+def test_input_at():
+    """Clicking inside an input box finds it by name"""
+    inputs = layout.detail_screen()["inputs"]
+    assert layout.input_at(inputs["bid"].center, inputs) == "bid"
+    assert layout.input_at((0, 0), inputs) is None
+
+
+def test_clicks_work_without_drawing(app, monkeypatch):
+    """Clicks find their buttons from the layout, so nothing needs drawing first"""
+    def draw():
+        raise AssertionError("a click shouldn't draw")
+
+    monkeypatch.setattr(app, "draw_current_screen", draw)
+    x, y = ui.get_card_position(1, app.scroll_y)
+    app.handle_click((x + 10, y + 10))
+    assert (app.current_screen, app.selected_item["id"]) == ("detail", 2)
+
+    app.handle_click(layout.detail_screen()["inputs"]["bid"].center)
+    assert app.inputs["active"] == "bid"
+    app.handle_click(layout.detail_screen()["back"].center)
+    assert app.current_screen == "items"
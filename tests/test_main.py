@@ -0,0 +1,95 @@
+"""Tests for the kiosk app in main.py (run headless)"""
+import pygame
+
+import db
+import layout
+import ui
+
+
+def test_frame_rate_comes_from_the_config(app):
+    """The main loop limits redraws to config.max_fps"""
+    app.config.max_fps = 24
+    ticks = []
+
+    class Clock:
+        def tick(self, fps):
+            ticks.append(fps)
+
+    app.clock = Clock()
+
+    pygame.event.post(pygame.event.Event(pygame.QUIT))
+    app.run()
+
+    assert ticks == [24]
+
+
+def test_results_screen_shows_the_settled_results(app):
+    """The results screen reads db.get_results, like the printed report"""
+    app.writer.place_bid(1, "Sam", 6000).result()
+    db.get_connection().execute("UPDATE items SET closed = 1 WHERE id = 1")
+    db.get_connection().execute("UPDATE results SET amount = 5900 WHERE item_id = 1")
+    db._invalidate_cache()
+
+    app.current_screen = "results"
+    app.render()
+    _, regions = app.get_screen_regions()
+    rows, _ = regions["rows"]
+    assert rows[0] == (5900, "Sam")
+    assert rows[1] == (None, None)
+
+
+def test_only_changed_parts_are_redrawn(app):
+    """After the first full draw, a frame with nothing new draws nothing and a bid redraws just its card"""
+    app.now = lambda: 0.0  # keep the countdown still
+    assert app.find_dirty_rects() is None
+    assert app.find_dirty_rects() == []
+
+    app.writer.place_bid(1, "Sam", 6000).result()
+    x, y = ui.get_card_position(0, app.scroll_y)
+    assert app.find_dirty_rects() == [pygame.Rect(x, y, ui.CARD_WIDTH, ui.CARD_HEIGHT)]
+
+    # Scrolling changes the whole screen
+    app.handle_scroll(-1)
+    assert app.find_dirty_rects() is None
+
+
+def test_idle_frames_skip_drawing(app, monkeypatch):
+    """step draws once, then not again until something changes (or the window is uncovered)"""
+    app.now = lambda: 0.0
+    draws = []
+    monkeypatch.setattr(app, "draw_current_screen", lambda: draws.append(app.current_screen))
+
+    app.step([])
+    app.step([])
+    assert draws == ["items"]
+
+    app.step([pygame.event.Event(pygame.VIDEOEXPOSE)])
+    assert draws == ["items", "items"]
+
+
+def _click(pos):
+    """A left click at pos"""
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=pos)
+
+
+def _typed(text):
+    """Key presses that type text"""
+    return [pygame.event.Event(pygame.KEYDOWN, key=ord(char), unicode=char, mod=0) for char in text]
+
+
+def test_headless_script_places_a_bid(app):
+    """A script of clicks and key presses runs without a window, just like a person bidding"""
+    rects = layout.detail_screen()
+    x, y = ui.get_card_position(0, app.scroll_y)
+    script = [
+        [_click((x + 10, y + 10))],
+        [_click(rects["inputs"]["name"].center), *_typed("Sam")],
+        [_click(rects["inputs"]["bid"].center), *_typed("60.50")],
+        [_click(rects["bid"].center)],
+    ]
+
+    run = app.run_script(script)
+    assert run["frames"] == 4
+    item = db.get_item(1)
+    assert (item["current_bid"], item["highest_bidder"]) == (6050, "Sam")
+    assert app.pending_bids == {}
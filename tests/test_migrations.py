@@ -0,0 +1,87 @@
+"""Tests for upgrading old auction.db files (db.MIGRATIONS)"""
+import sqlite3
+
+import pytest
+
+import db
+
+
+def _make_old_database(path, version):
+    """An auction.db as the first versions made it: money in pounds (REAL) and bidder names"""
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            description TEXT,
+            starting_price REAL NOT NULL,
+            max_bid REAL NOT NULL,
+            current_bid REAL DEFAULT 0,
+            highest_bidder TEXT DEFAULT ''
+        );
+        CREATE TABLE bids (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_id INTEGER,
+            bidder_name TEXT NOT NULL,
+            bid_amount REAL NOT NULL,
+            timestamp REAL,
+            FOREIGN KEY (item_id) REFERENCES items(id)
+        );
+        INSERT INTO items (name, description, starting_price, max_bid, current_bid, highest_bidder) VALUES
+            ('Lamp', 'Old', 10.5, 80.0, 12.25, 'Sam'),
+            ('Clock', 'Older', 5.0, 20.1, 0, '');
+        INSERT INTO bids (item_id, bidder_name, bid_amount, timestamp) VALUES
+            (1, 'Ann', 11.0, 100.0),
+            (1, 'Sam', 12.25, 200.0),
+            (2, 'Ann', 6.0, 300.0);
+        DELETE FROM bids WHERE id = 3;
+    """)
+    if version >= 1:
+        db._migrate_add_bid_indexes(conn)
+    conn.execute(f"PRAGMA user_version = {version}")
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def old_database(tmp_path, monkeypatch):
+    """Where to put an old database file (the connection is closed afterwards)"""
+    monkeypatch.setattr(db, "journal", None)
+    db._forget_bidders()
+    yield str(tmp_path / "old.db")
+    db.close_connection()
+    db._forget_bidders()
+
+
+@pytest.mark.parametrize("version", [0, 1])
+def test_old_database_is_upgraded(old_database, version):
+    """Pounds become pence, names become bidder ids, and nothing is lost"""
+    _make_old_database(old_database, version)
+    db.init(old_database)
+    conn = db.get_connection()
+
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(db.MIGRATIONS) == 8
+    assert [(item["starting_price"], item["max_bid"], item["current_bid"], item["highest_bidder"])
+            for item in db.get_all_items()] == [(1050, 8000, 1225, "Sam"), (500, 2010, 0, "")]
+    assert db.item_count() == 2  # no default items added to a file that has some
+
+    ann, sam = db.find_bidder("Ann"), db.find_bidder("Sam")
+    assert None not in (ann, sam) and ann != sam
+    assert conn.execute("SELECT id, item_id, bidder_id, bid_amount FROM bids ORDER BY id").fetchall() == [
+        (1, 1, ann, 1100), (2, 1, sam, 1225)]
+    assert conn.execute("SELECT highest_bidder_id FROM items WHERE id = 1").fetchone()[0] == sam
+
+    # Money columns hold whole numbers now, and every table and index is there
+    assert conn.execute("SELECT typeof(current_bid) FROM items WHERE id = 1").fetchone()[0] == "integer"
+    indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert set(db.INDEXES) <= indexes
+    assert db.get_results()[0]["bid_count"] == 2
+
+    # A deleted bid's id isn't handed out again, and bidding still works
+    db.place_bid(2, "Cat", 2000)
+    assert conn.execute("SELECT MAX(id) FROM bids").fetchone()[0] == 4
+
+
+def test_new_database_needs_no_upgrade(auction_db):
+    """A file made by this version starts at the latest schema"""
+    assert db.get_connection().execute("PRAGMA user_version").fetchone()[0] == len(db.MIGRATIONS)
@@ -0,0 +1,51 @@
+"""Tests for money.py"""
+import pytest
+
+import db
+import money
+
+
+@pytest.mark.parametrize("text, pence", [
+    ("12", 1200), ("12.5", 1250), ("12.50", 1250), (".5", 50), ("£ 3.07", 307), (" 0.99 ", 99),
+])
+def test_parse_pence(text, pence):
+    """What people type, in pounds, becomes whole pence"""
+    assert money.parse_pence(text) == pence
+
+
+@pytest.mark.parametrize("text", ["", ".", "12.345", "abc", "-5", "1,000"])
+def test_parse_pence_refuses_anything_else(text):
+    """Anything that isn't an amount of money is a ValueError"""
+    with pytest.raises(ValueError):
+        money.parse_pence(text)
+
+
+def test_format_money():
+    """Pence are written as pounds for people to read"""
+    assert [money.format_money(pence) for pence in (0, 5, 1250, 100000, -250)] == \
+        ["£0.00", "£0.05", "£12.50", "£1000.00", "-£2.50"]
+
+
+def test_check_pence():
+    """Only ints get through - floats and bools are refused"""
+    assert money.check_pence(1250) == 1250
+    for amount in (12.5, 1250.0, True, "1250"):
+        with pytest.raises(TypeError):
+            money.check_pence(amount)
+
+
+def test_bid_increment_grows_with_the_price():
+    """Each price band has its own step, starting at its lower bound"""
+    assert [money.bid_increment(price) for price in (0, 99, 100, 2499, 2500, 10000, 1000000)] == \
+        [10, 10, 25, 50, 100, 250, 500]
+
+
+def test_to_pence_rounds_old_amounts():
+    """Float pounds from an older file round to the nearest penny"""
+    assert [money.to_pence(pounds) for pounds in (10.5, 0.1 + 0.2, 19.99)] == [1050, 30, 1999]
+
+
+def test_bid_of_exactly_the_limit(auction_db):
+    """With whole pence there's no rounding: the item's max bid itself is allowed"""
+    assert db.place_bid(1, "Sam", 15000)[0] is True
+    assert db.place_bid(2, "Sam", 10001)[0] is False
@@ -0,0 +1,50 @@
+"""Tests for item pages and the virtual item grid"""
+import pytest
+
+import db
+import ui
+
+
+def test_pages_follow_on_from_the_last_id(auction_db):
+    """Each page starts after the last id of the one before, with nothing missed or repeated"""
+    for number in range(20):
+        db.add_item(f"Extra {number}", "", 1000, 5000)
+    ids = db.get_item_ids()
+
+    seen, after_id = [], 0
+    while page := db.get_items_page(after_id, limit=7):
+        seen.extend(item["id"] for item in page)
+        after_id = page[-1]["id"]
+    assert seen == ids
+    assert db.get_items_page(ids[-1]) == []
+
+
+@pytest.mark.parametrize("scroll_y", range(0, -2000, -37))
+def test_visible_range_matches_checking_every_card(scroll_y):
+    """The grid maths picks the same cards as testing each one"""
+    count = 40
+    visible = [i for i in range(count) if ui.is_visible(ui.get_card_position(i, scroll_y)[1])]
+    start, stop = ui.visible_index_range(scroll_y, count)
+    assert list(range(start, stop)) == visible
+
+
+def test_card_index_at_finds_the_card():
+    """A point inside a card finds that card; gaps find nothing"""
+    for index in range(6):
+        x, y = ui.get_card_position(index)
+        assert ui.card_index_at(x + 1, y + 1) == index
+        assert ui.card_index_at(x + ui.CARD_WIDTH + 1, y + 1) is None
+    assert ui.card_index_at(5, 5) is None  # the header
+
+
+def test_only_visible_items_are_read(app):
+    """With lots of items, a frame fetches just the cards on screen"""
+    for number in range(100):
+        db.add_item(f"Extra {number}", "", 1000, 5000)
+    app.scroll_y = -1000
+
+    visible = app.get_visible_items()
+    start, stop = ui.visible_index_range(app.scroll_y, db.item_count() + 1)
+    assert [index for index, _ in visible] == list(range(start, stop))
+    assert [item["id"] for _, item in visible] == db.get_item_ids()[start:stop]
+    assert len(visible) < 20
@@ -0,0 +1,50 @@
+"""Tests for automatic bids (proxy.py and db.set_proxy_bid)"""
+import pytest
+
+import db
+import proxy
+
+
+def _item(current_bid=0, highest_bidder_id=None, starting_price=5000, max_bid=15000):
+    """Just the item fields proxy.resolve reads"""
+    return {"current_bid": current_bid, "highest_bidder_id": highest_bidder_id,
+            "starting_price": starting_price, "max_bid": max_bid}
+
+
+@pytest.mark.parametrize("item, proxies, expected", [
+    (_item(), [], None),
+    (_item(), [(7, 9000)], (7, 5100)),                                   # opens one step above the start
+    (_item(6000, 7), [(7, 9000)], None),                                 # already winning, nobody pushing
+    (_item(6000, 3), [(7, 9000), (8, 8000)], (7, 8100)),                 # one step above the runner-up
+    (_item(6000, 3), [(7, 5500)], None),                                 # maximum doesn't beat the price
+    (_item(14000, 3), [(7, 15000), (8, 14950)], (7, 15000)),             # never over the item's limit
+    (_item(6000, 7), [(7, 9000), (8, 9000)], (7, 9000)),                 # a tie goes to the first one set
+])
+def test_resolve(item, proxies, expected):
+    """The one bid that settles things between the proxies"""
+    assert proxy.resolve(item, proxies) == expected
+
+
+def test_resolve_with_a_fixed_increment():
+    """increment (or BID_INCREMENT) replaces the price-based steps"""
+    assert proxy.resolve(_item(6000, 3), [(7, 9000)], increment=500) == (7, 6500)
+
+
+def test_automatic_bids_compete(auction_db):
+    """The higher maximum wins, one step above the other - the earlier one on a tie"""
+    assert db.set_proxy_bid(1, "Tom", 9000)[0] is True
+    assert db.set_proxy_bid(1, "Ann", 8000)[0] is True
+    item = db.get_item(1)
+    assert (item["highest_bidder"], item["current_bid"]) == ("Tom", 8100)
+
+    db.set_proxy_bid(1, "Sam", 9000)
+    item = db.get_item(1)
+    assert (item["highest_bidder"], item["current_bid"]) == ("Tom", 9000)
+
+
+def test_maximum_has_to_beat_the_price(auction_db):
+    """A maximum at or under the price, or over the item's limit, is refused"""
+    db.place_bid(1, "Sam", 6000)
+    assert db.set_proxy_bid(1, "Tom", 6000)[0] is False
+    assert db.set_proxy_bid(1, "Tom", 15001)[0] is False
+    assert db.get_item(1)["highest_bidder"] == "Sam"
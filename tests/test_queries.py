@@ -0,0 +1,45 @@
+"""Tests for the bid history queries and the indexes behind them"""
+import pytest
+
+import db
+
+
+@pytest.fixture
+def bids(auction_db):
+    """Bids from two bidders on two items, at known times"""
+    db.update_bids_many([
+        (1, "Ann", 6000, 100.0),
+        (2, "Sam", 4000, 110.0),
+        (1, "Sam", 7000, 120.0),
+        (1, "Ann", 8000, 130.0),
+    ])
+
+
+def test_top_bids(bids):
+    """Highest first, just for the one item"""
+    assert [(bid[3], bid[4]) for bid in db.get_top_bids(1, limit=2)] == [("Ann", 8000), ("Sam", 7000)]
+
+
+def test_bidder_history(bids):
+    """One bidder's bids, oldest first (and nothing for a name that never bid)"""
+    assert [(bid[1], bid[4]) for bid in db.get_bidder_history("Sam")] == [(2, 4000), (1, 7000)]
+    assert db.get_bidder_history("Nobody") == []
+
+
+def test_bids_since(bids):
+    """Only bids after the timestamp, oldest first"""
+    assert [bid[5] for bid in db.get_bids_since(110.0)] == [120.0, 130.0]
+
+
+@pytest.mark.parametrize("sql, index", [
+    ("SELECT id FROM bids WHERE item_id = ? ORDER BY bid_amount DESC LIMIT 10", "idx_bids_item_amount"),
+    ("SELECT id FROM bids WHERE bidder_id = ? ORDER BY id", "idx_bids_bidder"),
+    ("SELECT id FROM bids WHERE timestamp > ? ORDER BY timestamp", "idx_bids_timestamp"),
+    ("SELECT bidder_id, max_amount FROM proxy_bids WHERE item_id = ? ORDER BY max_amount DESC, id LIMIT 2",
+     "idx_proxy_bids_item_max"),
+])
+def test_queries_use_their_index(auction_db, sql, index):
+    """Each lookup searches its index - no table scan and no sorting afterwards"""
+    plan = " ".join(db.explain_query(sql, (1,)))
+    assert index in plan
+    assert "SCAN" not in plan and "TEMP B-TREE" not in plan
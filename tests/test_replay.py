@@ -0,0 +1,44 @@
+"""Tests for replay.py"""
+import pytest
+
+import db
+import replay
+from main import AppConfig, AuctionApp
+from recorder import EventRecorder, load_recording
+
+HEADER = {"version": 1, "screen": [800, 650], "duration": 600}
+
+
+@pytest.fixture
+def seen_times(auction_db, monkeypatch):
+    """The auction clock at each replayed frame"""
+    times = []
+    step = AuctionApp.step
+    monkeypatch.setattr(AuctionApp, "step", lambda app, events: times.append(db.clock()) or step(app, events))
+    db.open_auction(600)
+    db.close_connection()  # so the database file has everything in it
+    return times
+
+
+def test_replay_starts_when_the_recording_did(seen_times):
+    """Frame times are on the recorded session's clock, not counted from 0"""
+    started = db.get_item(1)["end_time"] - 600
+    db.close_connection()
+    replay.replay_once({**HEADER, "started": started}, [(0.5, []), (2.0, [])], db.DATABASE_FILE)
+    assert seen_times == [started + 0.5, started + 2.0]
+
+
+def test_old_recording_starts_from_the_first_close(seen_times):
+    """Without "started" in the header, the start is worked out from the database"""
+    first_close = min(end_time for _, end_time in db.get_close_times())
+    db.close_connection()
+    replay.replay_once(HEADER, [(1.0, [])], db.DATABASE_FILE)
+    assert seen_times == [first_close - 600 + 1.0]
+
+
+def test_recording_says_when_it_started(tmp_path):
+    """The header has the start time that event times count from"""
+    path = str(tmp_path / "night.jsonl")
+    EventRecorder(path, AppConfig(), clock=lambda: 1000.0).close()
+    header, events = load_recording(path)
+    assert (header["started"], events) == (1000.0, [])
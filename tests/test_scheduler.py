@@ -0,0 +1,78 @@
+"""Tests for scheduler.py and soft closes"""
+import pytest
+
+import db
+from changes import ChangeFeed
+from scheduler import CloseScheduler
+
+
+class FakeClock:
+    """A clock the test moves by hand"""
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(auction_db, monkeypatch):
+    """The auction clock, shared by db and the scheduler"""
+    fake = FakeClock(1000.0)
+    monkeypatch.setattr(db, "clock", fake)
+    db.open_auction(60, stagger=10)  # item 1 closes at 1060, item 2 at 1070, ...
+    return fake
+
+
+def _run_now(func, *args):
+    """settle straight away instead of on a Writer"""
+    func(*args)
+
+
+def test_items_close_in_order(clock):
+    """run_due closes just the items whose time is up, and next_close moves on"""
+    scheduler = CloseScheduler(_run_now, clock)
+    assert scheduler.next_close() == 1060
+
+    clock.now = 1075
+    assert scheduler.run_due() == [1, 2]
+    assert [item["closed"] for item in db.get_all_items()[:3]] == [True, True, False]
+    assert scheduler.next_close() == 1080
+    assert scheduler.run_due() == []
+
+
+def test_late_bid_pushes_the_close_back(clock):
+    """A bid in the last SOFT_CLOSE_SECONDS moves the end time, and the scheduler follows it"""
+    scheduler = CloseScheduler(_run_now, clock)
+    feed = ChangeFeed()
+    feed.subscribe(scheduler.on_changes)
+
+    clock.now = 1055
+    db.place_bid(1, "Sam", 6000)
+    feed.poll()
+    new_end = 1055 + db.SOFT_CLOSE_SECONDS
+    assert db.get_item(1)["end_time"] == new_end
+
+    clock.now = 1065
+    assert 1 not in scheduler.run_due()
+    assert not db.get_item(1)["closed"]
+
+    clock.now = new_end
+    assert 1 in scheduler.run_due()
+    assert db.get_results()[0]["bidder"] == "Sam"
+
+
+def test_early_bid_leaves_the_close_alone(clock):
+    """A bid well before the end doesn't move it"""
+    db.place_bid(1, "Sam", 6000)
+    assert db.get_item(1)["end_time"] == 1060
+
+
+def test_close_item_skips_a_moved_end_time(clock):
+    """A close queued before a late bid moved the end time does nothing"""
+    clock.now = 1059
+    db.place_bid(1, "Sam", 6000)
+    clock.now = 1060
+    assert db.close_item(1, 1060) is None
+    assert not db.get_item(1)["closed"]
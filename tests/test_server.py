@@ -0,0 +1,110 @@
+"""Tests for server.py and client.py, talking over a loopback socket"""
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+
+import client
+import db
+from client import RemoteDB, RemoteError
+from server import BidServer
+
+
+def _wait_for(condition, timeout=5):
+    """Wait until condition() is true - returns whether it became true in time"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def server(auction_db):
+    """A BidServer on a free port, running its event loop on a thread"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    bid_server = BidServer(db.DATABASE_FILE, port=0)
+    asyncio.run_coroutine_threadsafe(bid_server.start(), loop).result(10)
+    yield bid_server
+    asyncio.run_coroutine_threadsafe(bid_server.stop(), loop).result(10)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(10)
+    loop.close()
+
+
+@pytest.fixture
+def connect(server, monkeypatch):
+    """Open RemoteDB connections to the server (closed afterwards)"""
+    monkeypatch.setattr(client, "RECONNECT_DELAY", 0.05)
+    kiosks = []
+
+    def open_kiosk(on_change=None):
+        kiosk = RemoteDB(f"127.0.0.1:{server.port}", on_change=on_change)
+        kiosks.append(kiosk)
+        return kiosk
+
+    yield open_kiosk
+    for kiosk in kiosks:
+        kiosk.stop()
+
+
+def test_bid_through_the_server(connect):
+    """A bid comes back accepted with the item, and is saved in the database"""
+    kiosk = connect()
+    accepted, item = kiosk.place_bid(1, "Sam", 6000).result(5)
+    assert accepted is True
+    assert (item["current_bid"], item["highest_bidder"]) == (6000, "Sam")
+    assert db.get_item(1)["current_bid"] == 6000
+
+
+def test_server_refuses_amounts_that_arent_pence(connect):
+    """A float amount is an error, and nothing is saved"""
+    kiosk = connect()
+    with pytest.raises(RemoteError, match="TypeError"):
+        kiosk.place_bid(1, "Sam", 60.5).result(5)
+    assert db.get_item(1)["current_bid"] == 0
+
+
+def test_changes_are_pushed_to_other_kiosks(connect):
+    """One kiosk's bid shows up in another kiosk's copy of the items"""
+    changes = []
+    watcher = connect(on_change=changes.extend)
+    connect().place_bid(2, "Ann", 6000).result(5)
+
+    assert _wait_for(lambda: watcher.get_item(2)["current_bid"] == 6000)
+    assert any(change["item_id"] == 2 for change in changes)
+
+
+def test_kiosk_catches_up_after_reconnecting(connect):
+    """A dropped connection comes back and fetches only the changes it missed"""
+    changes = []
+    kiosk = connect(on_change=changes.extend)
+    other = connect()
+    seq = kiosk.seq
+    changes.clear()  # (connecting sent a "reload")
+
+    kiosk.sock.shutdown(socket.SHUT_RDWR)  # the network goes away...
+    assert other.place_bid(3, "Ann", 4000).result(5)[0]  # ...while someone else bids
+
+    assert _wait_for(lambda: kiosk.get_item(3)["current_bid"] == 4000)
+    assert kiosk.stats["reconnects"] == 1
+    assert kiosk.seq > seq
+    assert not any(change["kind"] == "reload" for change in changes)  # caught up, didn't reload
+
+    accepted, _ = kiosk.place_bid(3, "Sam", 4500).result(5)
+    assert accepted is True
+
+
+def test_kiosk_results_come_from_the_server(connect):
+    """RemoteDB.get_results matches db.get_results, and is fetched again after a change"""
+    kiosk = connect()
+    assert kiosk.get_results() == db.get_results()
+
+    kiosk.place_bid(1, "Sam", 6000).result(5)
+    assert _wait_for(lambda: kiosk.get_item(1)["current_bid"] == 6000)
+    assert kiosk.get_results()[0]["amount"] == 6000
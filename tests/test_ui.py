@@ -0,0 +1,61 @@
+"""Tests for the surface caches in ui.py"""
+import db
+import ui
+
+
+def test_surface_cache_drops_the_least_recently_used():
+    """A full cache forgets whatever was used longest ago, and counts what happened"""
+    cache = ui.SurfaceCache(2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"  # now "b" is the oldest
+    cache.put("c", "C")
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("A", None, "C")
+    assert cache.stats() == {"entries": 2, "hits": 3, "misses": 1, "evictions": 1, "hit_rate": 0.75}
+
+
+def test_text_is_rendered_once(app):
+    """The same text in the same font and colour reuses its surface"""
+    first = ui.render_text(app.fonts, "normal", "Bid now!", ui.PINK)
+    assert ui.render_text(app.fonts, "normal", "Bid now!", ui.PINK) is first
+    assert ui.render_text(app.fonts, "normal", "Bid now!", ui.GREEN) is not first
+    assert ui.render_text(app.fonts, "small", "Bid now!", ui.PINK) is not first
+
+
+def test_new_fonts_clear_the_text_cache(app):
+    """Text drawn with old fonts isn't reused after init_fonts"""
+    first = ui.render_text(app.fonts, "normal", "Bid now!", ui.PINK)
+    fonts = ui.init_fonts()
+    assert ui.render_text(fonts, "normal", "Bid now!", ui.PINK) is not first
+
+
+def _drawn(app, item, pending=False):
+    """Draw a card - returns True if it had to be drawn rather than copied from the cache"""
+    misses = ui.card_cache.misses
+    ui.draw_item_card(app.screen, app.fonts, item, 0, 0, pending)
+    return ui.card_cache.misses > misses
+
+
+def test_card_is_drawn_again_only_when_it_changes(app):
+    """The same item reuses its card; a bid or a pending bid draws a new one"""
+    item = db.get_item(1)
+    assert _drawn(app, item)
+    assert not _drawn(app, db.get_item(1))
+    assert _drawn(app, item, pending=True)
+
+    db.place_bid(1, "Sam", 6000)
+    assert _drawn(app, db.get_item(1))
+    assert not _drawn(app, item)  # the old card is still there
+
+
+def test_result_rows_are_cached(app):
+    """A result row is drawn once until its winner or amount changes"""
+    result = db.get_results()[0]
+    ui.draw_result_row(app.screen, app.fonts, result, 100)
+    misses = ui.card_cache.misses
+    ui.draw_result_row(app.screen, app.fonts, result, 200)
+    assert ui.card_cache.misses == misses
+
+    ui.draw_result_row(app.screen, app.fonts, {**result, "amount": 6000, "bidder": "Sam"}, 100)
+    assert ui.card_cache.misses == misses + 1
@@ -0,0 +1,74 @@
+"""Tests for writer.py"""
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+import db
+import writer as writer_module
+from writer import Writer
+
+
+def test_failed_command_is_undone_without_losing_its_batch(auction_db):
+    """A command that raises part way through leaves nothing behind, and the rest still commit"""
+    def bad_command():
+        db.get_connection().execute("UPDATE items SET current_bid = 999 WHERE id = 1")
+        raise RuntimeError("failed half way")
+
+    writer = Writer()
+    try:
+        batch = [(Future(), db.place_bid, (2, "Sam", 4000)),
+                 (Future(), bad_command, ()),
+                 (Future(), db.place_bid, (3, "Ann", 2000))]
+        writer._commit(batch)
+    finally:
+        writer.stop()
+
+    assert batch[0][0].result()[0] is True
+    with pytest.raises(RuntimeError):
+        batch[1][0].result()
+    assert batch[2][0].result()[0] is True
+
+    assert db.get_item(1)["current_bid"] == 0
+    assert db.get_item(2)["current_bid"] == 4000
+    assert db.get_item(3)["current_bid"] == 2000
+
+
+def test_submit_alone_gets_its_own_transaction(auction_db, monkeypatch):
+    """A command sent with submit_alone is never batched with the commands around it"""
+    writer = Writer()
+    batches = []
+    commit = writer._commit
+    monkeypatch.setattr(writer, "_commit", lambda batch: batches.append(len(batch)) or commit(batch))
+    try:
+        # Hold the writer up so everything below is waiting at once
+        started, release = threading.Event(), threading.Event()
+        writer.submit(lambda: started.set() or release.wait())
+        started.wait()
+        writer.place_bid(1, "Sam", 6000)
+        writer.place_bid(2, "Sam", 6000)
+        closed = writer.submit_alone(db.close_item, 3, float("inf"))
+        writer.place_bid(4, "Sam", 6000)
+        release.set()
+        writer.flush()
+    finally:
+        writer.stop()
+
+    assert batches == [1, 2, 1, 2]
+    assert closed.result() is None  # item 3 has no end time, so it stays open
+
+
+def test_change_log_is_pruned_as_the_writer_runs(auction_db, monkeypatch):
+    """The writer trims the change log every PRUNE_EVERY batches"""
+    monkeypatch.setattr(writer_module, "PRUNE_EVERY", 2)
+    prunes = []
+    monkeypatch.setattr(db, "prune_changes", lambda: prunes.append(True))
+
+    writer = Writer()
+    try:
+        for item_id in range(1, 5):
+            writer.place_bid(item_id, "Sam", 6000).result()
+    finally:
+        writer.stop()
+
+    assert len(prunes) == 2
@@ -1,12 +1,16 @@
 """
 UI module - simple helper functions for drawing UI elements
 """
+from collections import OrderedDict
+
 import pygame
 
+import money
+
 # ============ SETTINGS ============
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 650
-CURRENCY = "£"
+CURRENCY = money.CURRENCY
 
 # Colors (easy to change!)
 WHITE = (255, 255, 255)
@@ -28,10 +32,102 @@ CARD_HEIGHT = 140
 MARGIN_X = 30
 MARGIN_Y = 20
 START_Y = 100
+ROW_HEIGHT = CARD_HEIGHT + MARGIN_Y
+
+# Cards are only visible between the header and the bottom button bar
+VISIBLE_TOP = 80
+VISIBLE_BOTTOM = SCREEN_HEIGHT - 70
+
+
+# Results screen rows
+RESULT_ROW_X = 50
+RESULT_ROW_WIDTH = SCREEN_WIDTH - 100
+RESULT_ROW_HEIGHT = 50
+
+# Cache sizes (surfaces kept in memory)
+TEXT_CACHE_SIZE = 512   # rendered strings
+CARD_CACHE_SIZE = 128   # finished cards and result rows
+
+
+# ============ SURFACE CACHE ============
+class SurfaceCache:
+    """Keeps recently drawn surfaces so they don't have to be drawn again.
+
+    When it's full, the surface that was used least recently is dropped.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Get a cached surface (or None) and mark it as recently used"""
+        surface = self._surfaces.get(key)
+        if surface is None:
+            self.misses += 1
+            return None
+        self._surfaces.move_to_end(key)
+        self.hits += 1
+        return surface
+
+    def put(self, key, surface):
+        """Add a surface, dropping the oldest one if the cache is full"""
+        self._surfaces[key] = surface
+        self._surfaces.move_to_end(key)
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Forget every cached surface"""
+        self._surfaces.clear()
+
+    def stats(self):
+        """Get hits, misses, evictions, size and hit rate (0.0 - 1.0)"""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._surfaces),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+text_cache = SurfaceCache(TEXT_CACHE_SIZE)
+card_cache = SurfaceCache(CARD_CACHE_SIZE)
+
+
+def render_text(fonts, font_key, text, color, antialias=True):
+    """Render text with fonts[font_key], reusing the surface if it's been drawn before"""
+    key = (font_key, text, color, antialias)
+    surface = text_cache.get(key)
+    if surface is None:
+        surface = fonts[font_key].render(text, antialias, color)
+        text_cache.put(key, surface)
+    return surface
+
+
+def set_screen_size(width, height):
+    """Change the screen size used by all the drawing and layout helpers"""
+    global SCREEN_WIDTH, SCREEN_HEIGHT, VISIBLE_BOTTOM, RESULT_ROW_WIDTH
+    SCREEN_WIDTH = width
+    SCREEN_HEIGHT = height
+    VISIBLE_BOTTOM = SCREEN_HEIGHT - 70
+    RESULT_ROW_WIDTH = SCREEN_WIDTH - 100
+
+    # Result rows are as wide as the screen
+    card_cache.clear()
 
 
 def init_fonts():
     """Initialize and return fonts dictionary"""
+    # Cached text and cards were drawn with the old fonts
+    text_cache.clear()
+    card_cache.clear()
     return {
         'normal': pygame.font.Font(None, 26),
         'small': pygame.font.Font(None, 20),
@@ -46,7 +142,7 @@ def draw_button(screen, fonts, text, x, y, width, height, color, text_color=WHIT
     pygame.draw.rect(screen, color, rect, border_radius=8)
     pygame.draw.rect(screen, WHITE, rect, 2, border_radius=8)
     
-    text_surface = fonts['normal'].render(text, True, text_color)
+    text_surface = render_text(fonts, 'normal', text, text_color)
     text_x = x + (width - text_surface.get_width()) // 2
     text_y = y + (height - text_surface.get_height()) // 2
     screen.blit(text_surface, (text_x, text_y))
@@ -57,7 +153,7 @@ def draw_button(screen, fonts, text, x, y, width, height, color, text_color=WHIT
 def draw_input_box(screen, fonts, label, value, x, y, width, is_active):
     """Draw an input box and return its rectangle"""
     # Label above the box
-    label_surface = fonts['small'].render(label, True, LIGHT_GRAY)
+    label_surface = render_text(fonts, 'small', label, LIGHT_GRAY)
     screen.blit(label_surface, (x, y - 20))
     
     # The input box
@@ -67,7 +163,7 @@ def draw_input_box(screen, fonts, label, value, x, y, width, is_active):
     pygame.draw.rect(screen, border_color, rect, 2, border_radius=5)
     
     # Text inside the box
-    text_surface = fonts['normal'].render(value, True, WHITE)
+    text_surface = render_text(fonts, 'normal', value, WHITE)
     screen.blit(text_surface, (x + 10, y + 8))
     
     return rect
@@ -76,61 +172,114 @@ def draw_input_box(screen, fonts, label, value, x, y, width, is_active):
 def draw_timer(screen, fonts, minutes, seconds, remaining, x, y):
     """Draw the countdown timer"""
     color = RED if remaining < 60 else GREEN
-    timer_text = fonts['title'].render(f"{minutes:02d}:{seconds:02d}", True, color)
+    timer_text = render_text(fonts, 'title', f"{minutes:02d}:{seconds:02d}", color)
     screen.blit(timer_text, (x, y))
 
 
 def draw_title(screen, fonts, text, y, color=PINK):
     """Draw a centered title"""
-    title = fonts['title'].render(text, True, color)
+    title = render_text(fonts, 'title', text, color)
     screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, y))
 
 
-def draw_item_card(screen, fonts, item, x, y):
-    """Draw a single item card"""
-    rect = pygame.Rect(x, y, CARD_WIDTH, CARD_HEIGHT)
+def draw_item_card(screen, fonts, item, x, y, pending=False):
+    """Draw a single item card (pending=True while a bid on it is saving)"""
+    # A card only needs drawing again when something shown on it changes
+    key = ("item", item["id"], item["name"], item["description"], item["starting_price"],
+           item["current_bid"], item["highest_bidder"], item["closed"], pending)
+    surface = card_cache.get(key)
+    if surface is None:
+        surface = _render_item_card(fonts, item, pending)
+        card_cache.put(key, surface)
+
+    screen.blit(surface, (x, y))
+    return pygame.Rect(x, y, CARD_WIDTH, CARD_HEIGHT)
+
+
+def _render_item_card(fonts, item, pending):
+    """Draw an item card onto its own surface"""
+    card = pygame.Surface((CARD_WIDTH, CARD_HEIGHT), pygame.SRCALPHA)
+    rect = card.get_rect()
     
     # Card background
-    pygame.draw.rect(screen, CARD_BG, rect, border_radius=12)
-    pygame.draw.rect(screen, PURPLE, rect, 2, border_radius=12)
+    pygame.draw.rect(card, CARD_BG, rect, border_radius=12)
+    pygame.draw.rect(card, PINK if pending else PURPLE, rect, 2, border_radius=12)
     
     # Item name
-    name_text = fonts['normal'].render(item["name"][:18], True, WHITE)
-    screen.blit(name_text, (x + 10, y + 15))
+    name_text = render_text(fonts, 'normal', item["name"][:18], WHITE)
+    card.blit(name_text, (10, 15))
     
     # Description
-    desc_text = fonts['small'].render(item["description"][:25], True, LIGHT_GRAY)
-    screen.blit(desc_text, (x + 10, y + 42))
+    desc_text = render_text(fonts, 'small', item["description"][:25], LIGHT_GRAY)
+    card.blit(desc_text, (10, 42))
     
     # Current bid or starting price
     if item["current_bid"] > 0:
-        bid_label = fonts['small'].render("Current Bid:", True, GREEN)
-        screen.blit(bid_label, (x + 10, y + 70))
-        bid_text = fonts['normal'].render(f"{CURRENCY}{item['current_bid']:.2f}", True, GREEN)
-        screen.blit(bid_text, (x + 10, y + 88))
-        bidder_text = fonts['small'].render(f"by {item['highest_bidder'][:12]}", True, LIGHT_GRAY)
-        screen.blit(bidder_text, (x + 10, y + 115))
+        bid_label = render_text(fonts, 'small', "Current Bid:", GREEN)
+        card.blit(bid_label, (10, 70))
+        bid_text = render_text(fonts, 'normal', money.format_money(item['current_bid']), GREEN)
+        card.blit(bid_text, (10, 88))
+        bidder_text = render_text(fonts, 'small', f"by {item['highest_bidder'][:12]}", LIGHT_GRAY)
+        card.blit(bidder_text, (10, 115))
     else:
-        price_label = fonts['small'].render("Starting:", True, LIGHT_GRAY)
-        screen.blit(price_label, (x + 10, y + 80))
-        price_text = fonts['normal'].render(f"{CURRENCY}{item['starting_price']:.2f}", True, PINK)
-        screen.blit(price_text, (x + 10, y + 100))
+        price_label = render_text(fonts, 'small', "Starting:", LIGHT_GRAY)
+        card.blit(price_label, (10, 80))
+        price_text = render_text(fonts, 'normal', money.format_money(item['starting_price']), PINK)
+        card.blit(price_text, (10, 100))
     
-    return rect
+    if pending:
+        saving_text = render_text(fonts, 'small', "Saving...", PINK)
+        card.blit(saving_text, (CARD_WIDTH - saving_text.get_width() - 10, 115))
+    elif item["closed"]:
+        closed_text = render_text(fonts, 'small', "SOLD" if item["current_bid"] > 0 else "CLOSED", RED)
+        card.blit(closed_text, (CARD_WIDTH - closed_text.get_width() - 10, 115))
+    
+    return card
 
 
 def draw_add_card(screen, fonts, x, y):
     """Draw the + button card for adding items"""
-    rect = pygame.Rect(x, y, CARD_WIDTH, CARD_HEIGHT)
-    
-    pygame.draw.rect(screen, (40, 40, 60), rect, border_radius=12)
-    pygame.draw.rect(screen, PURPLE, rect, 2, border_radius=12)
+    surface = card_cache.get("add")
+    if surface is None:
+        surface = pygame.Surface((CARD_WIDTH, CARD_HEIGHT), pygame.SRCALPHA)
+        rect = surface.get_rect()
+        
+        pygame.draw.rect(surface, (40, 40, 60), rect, border_radius=12)
+        pygame.draw.rect(surface, PURPLE, rect, 2, border_radius=12)
+        
+        plus_text = render_text(fonts, 'title', "+", PURPLE)
+        surface.blit(plus_text, (CARD_WIDTH // 2 - plus_text.get_width() // 2,
+                                 CARD_HEIGHT // 2 - plus_text.get_height() // 2))
+        card_cache.put("add", surface)
     
-    plus_text = fonts['title'].render("+", True, PURPLE)
-    screen.blit(plus_text, (x + CARD_WIDTH // 2 - plus_text.get_width() // 2,
-                            y + CARD_HEIGHT // 2 - plus_text.get_height() // 2))
+    screen.blit(surface, (x, y))
+    return pygame.Rect(x, y, CARD_WIDTH, CARD_HEIGHT)
+
+
+def draw_result_row(screen, fonts, result, y):
+    """Draw one item's row on the results screen (result is one of db.get_results)"""
+    key = ("result", result["item_id"], result["item_name"], result["amount"], result["bidder"])
+    surface = card_cache.get(key)
+    if surface is None:
+        surface = pygame.Surface((RESULT_ROW_WIDTH, RESULT_ROW_HEIGHT), pygame.SRCALPHA)
+        rect = surface.get_rect()
+        pygame.draw.rect(surface, INPUT_BG, rect, border_radius=8)
+        pygame.draw.rect(surface, PURPLE, rect, 2, border_radius=8)
+        
+        name_text = render_text(fonts, 'normal', result["item_name"][:20], WHITE)
+        surface.blit(name_text, (20, 15))
+        
+        if result["amount"] is not None:
+            winner = render_text(
+                fonts, 'normal', f"Winner: {result['bidder']} - {money.format_money(result['amount'])}",
+                GREEN)
+        else:
+            winner = render_text(fonts, 'normal', "No bids", DARK_GRAY)
+        surface.blit(winner, (300, 15))
+        card_cache.put(key, surface)
     
-    return rect
+    screen.blit(surface, (RESULT_ROW_X, y))
+    return pygame.Rect(RESULT_ROW_X, y, RESULT_ROW_WIDTH, RESULT_ROW_HEIGHT)
 
 
 def get_card_position(index, scroll_y=0):
@@ -142,6 +291,40 @@ def get_card_position(index, scroll_y=0):
     return x, y
 
 
+def card_index_at(x, y, scroll_y=0):
+    """Find the index of the card under a point, or None (the reverse of get_card_position).
+
+    Only points inside the visible part of the grid count, so clicks on the
+    header or the bottom bar never land on a card hidden behind them.
+    """
+    if not VISIBLE_TOP <= y < VISIBLE_BOTTOM or x < MARGIN_X:
+        return None
+    
+    col, x_in_card = divmod(x - MARGIN_X, CARD_WIDTH + MARGIN_X)
+    row, y_in_card = divmod(y - START_Y - scroll_y, ROW_HEIGHT)
+    
+    # In the gap between two cards, or outside the grid
+    if col >= COLS or x_in_card >= CARD_WIDTH or row < 0 or y_in_card >= CARD_HEIGHT:
+        return None
+    return row * COLS + col
+
+
 def is_visible(y):
     """Check if a card at y position is visible on screen"""
-    return y + CARD_HEIGHT > 80 and y < SCREEN_HEIGHT - 70
+    return y + CARD_HEIGHT > VISIBLE_TOP and y < VISIBLE_BOTTOM
+
+
+def visible_index_range(scroll_y, count):
+    """Work out which card indexes are on screen as (start, stop).
+
+    Uses the grid maths directly instead of checking every card, so it
+    costs the same for 10 items or 10,000.
+    """
+    # First row whose bottom edge is below VISIBLE_TOP
+    first_row = max(0, (VISIBLE_TOP - CARD_HEIGHT - START_Y - scroll_y) // ROW_HEIGHT + 1)
+    # Rows that start above VISIBLE_BOTTOM (rounded up)
+    end_row = max(first_row, -((START_Y + scroll_y - VISIBLE_BOTTOM) // ROW_HEIGHT))
+
+    start = min(count, first_row * COLS)
+    stop = min(count, end_row * COLS)
+    return start, stop
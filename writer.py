@@ -0,0 +1,139 @@
+"""
+Writer module - saves bids and new items on a background thread
+so the game loop never has to wait for the disk (or another kiosk's lock).
+
+Each call returns a Future straight away. The writer thread picks up
+everything that's waiting and commits it together in one transaction.
+Each command runs in its own savepoint, so one that fails part way
+through is undone without losing the rest of the batch. Commands sent
+with submit_alone (like closing an item) get a transaction to themselves.
+Every PRUNE_EVERY batches the writer also trims the change log, so it
+doesn't grow for as long as the auction runs.
+"""
+import queue
+import threading
+from concurrent.futures import Future
+
+import db
+
+MAX_BATCH = 50       # most commands saved in one transaction
+PRUNE_EVERY = 1000   # batches between change log prunes (see db.prune_changes)
+
+
+class Writer:
+    """Background thread that runs db write functions in batches"""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    # ============ COMMANDS ============
+    def place_bid(self, item_id, bidder_name, bid_amount):
+        """Queue a bid - the Future's result is db.place_bid's (accepted, item)"""
+        return self.submit(db.place_bid, item_id, bidder_name, bid_amount)
+
+    def set_proxy_bid(self, item_id, bidder_name, max_amount):
+        """Queue an automatic bid - the Future's result is (accepted, item)"""
+        return self.submit(db.set_proxy_bid, item_id, bidder_name, max_amount)
+
+    def add_item(self, name, description, starting_price, max_bid):
+        """Queue a new item - the Future's result is the new item's id"""
+        return self.submit(db.add_item, name, description, starting_price, max_bid)
+
+    def reset_auction(self, duration=None, stagger=0):
+        """Queue an auction reset (with duration, the items get new end times)"""
+        return self.submit(db.reset_auction, duration, stagger)
+
+    def submit(self, func, *args):
+        """Queue any db write function and return a Future for its result"""
+        return self._put(False, func, args)
+
+    def submit_alone(self, func, *args):
+        """Like submit, but func is committed in a transaction of its own"""
+        return self._put(True, func, args)
+
+    def _put(self, alone, func, args):
+        """Queue a command - (alone, (future, func, args)) - and return its Future"""
+        future = Future()
+        self._queue.put((alone, (future, func, args)))
+        return future
+
+    def flush(self):
+        """Wait until everything queued so far has been saved"""
+        self.submit(lambda: None).result()
+
+    def stop(self):
+        """Save everything still queued, then stop the thread"""
+        self._queue.put(None)
+        self._thread.join()
+
+    # ============ WRITER THREAD ============
+    def _run(self):
+        """Wait for commands and commit them in batches"""
+        running = True
+        held = None  # a command saved alone, which has to wait for the next batch
+        batches = 0
+        while running:
+            entry = held or self._queue.get()
+            held = None
+            if entry is None:
+                break
+            alone, command = entry
+            batch = [command]
+
+            # Grab whatever else is already waiting (unless this one is saved alone)
+            while not alone and len(batch) < MAX_BATCH:
+                try:
+                    entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    running = False
+                    break
+                if entry[0]:
+                    held = entry
+                    break
+                batch.append(entry[1])
+
+            self._commit(batch)
+            batches += 1
+            if batches % PRUNE_EVERY == 0:
+                self._prune()
+
+        db.close_connection()
+
+    def _prune(self):
+        """Forget old changes (in a transaction of its own, so it can't lose a batch)"""
+        try:
+            db.prune_changes()
+        except Exception as error:
+            print(f"Could not prune the change log: {error}")
+
+    def _commit(self, batch):
+        """Run a batch of commands in one transaction and hand back results"""
+        results = []
+        try:
+            with db.transaction():
+                for future, func, args in batch:
+                    # One bad command shouldn't lose the others in the batch
+                    # (or leave half its changes behind)
+                    try:
+                        with db.savepoint():
+                            results.append((future, func(*args), None))
+                    except Exception as error:
+                        results.append((future, None, error))
+        except Exception as error:
+            # The commit itself failed, so nothing in the batch was saved
+            print(f"Could not save {len(batch)} change(s): {error}")
+            for future, _, _ in batch:
+                future.set_exception(error)
+            return
+
+        # Only report results once they're safely committed
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                print(f"Could not save change: {error}")
+                future.set_exception(error)